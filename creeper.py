@@ -8,16 +8,17 @@ Creeper v2.0.0 - 网页爬虫工具
 
 import sys
 import asyncio
-from pathlib import Path
+from typing import Iterable
 from tqdm import tqdm
-from tqdm.asyncio import tqdm as async_tqdm
 
 from src.base_crawler import BaseCrawler
-from src.parser import MarkdownParser
+from src.parser import MarkdownParser, URLItem, resolve_input_files
+from src.input_manifest import InputManifest
 from src.dedup import DedupManager
 from src.async_fetcher import AsyncWebFetcher
 from src.cookie_manager import CookieManager
 from src.storage import StorageManager
+from src.image_downloader import shutdown_image_download_service
 from src.config import config
 from src.utils import setup_logger
 from src.cli_parser import create_argument_parser
@@ -63,43 +64,51 @@ class AsyncCrawler(BaseCrawler):
             logger.info(f"Creeper v2.0.0 - 异步并发模式")
             logger.info("=" * 60)
 
-            # 1. 解析 Markdown 文件
-            logger.info(f"正在解析文件: {self.args.input_file}")
-            self.parser = MarkdownParser(self.args.input_file)
-            items = self.parser.parse()
-
-            if not items:
-                logger.warning("未找到任何 URL,程序退出")
-                return
-
-            self.stats['total'] = len(items)
-            logger.info(f"共找到 {self.stats['total']} 个 URL")
+            # 1. 打开 Markdown 文件(文件、目录或 glob;爬取时边读边解析,不一次性读入)
+            input_files = resolve_input_files(self.args.input_file)
+            logger.info(f"正在解析输入: {self.args.input_file} ({len(input_files)} 个文件)")
+            self.parsers = [MarkdownParser(str(path)) for path in input_files]
             logger.info(f"并发数: {self.fetcher.concurrency}")
 
-            # 显示文档结构(如果是调试模式)
+            # 显示文档结构(如果是调试模式,需要先完整解析一遍)
             if config.DEBUG:
-                self.parser.display_structure()
+                for parser in self.parsers:
+                    parser.parse()
+                    parser.display_structure()
 
             # 2. 测试 Redis 连接
             if not self.dedup.test_connection():
                 logger.warning("Redis 连接失败,将跳过去重检查")
 
-            # 3. 异步处理每个 URL
+            # 3. 异步处理每个 URL(增量模式只调度上次运行后新增的 URL,--force 时完整检查)
+            if config.INCREMENTAL_INPUT:
+                manifests = [InputManifest(str(path), load=not self.args.force) for path in input_files]
+            else:
+                manifests = [None] * len(self.parsers)
+
             logger.info("开始爬取网页(异步并发)...")
-            tasks = []
-            for item in items:
-                task = self._process_url(item)
-                tasks.append(task)
+            await self._crawl(*(
+                parser.iter_items(manifest) for parser, manifest in zip(self.parsers, manifests)
+            ))
+
+            if config.INCREMENTAL_INPUT:
+                self._save_manifests(manifests)
+
+            if not self.stats['total']:
+                if config.INCREMENTAL_INPUT and not self.args.force:
+                    logger.info("输入文件没有新增 URL,程序退出(使用 --force 完整检查)")
+                else:
+                    logger.warning("未找到任何 URL,程序退出")
+                return
 
-            # 使用 tqdm 显示进度
-            for coro in async_tqdm.as_completed(tasks, desc="爬取进度", unit="url", total=len(tasks)):
-                await coro
+            # 4. 等待后台图片下载完成(有最长期限)
+            await self.storage.drain_images()
 
-            # 4. 保存失败的 URL
+            # 5. 保存失败的 URL
             if self.failed_items:
                 self.storage.save_failed_urls(self.failed_items)
 
-            # 5. 显示统计信息
+            # 6. 显示统计信息
             self._display_stats()
 
             logger.info("=" * 60)
@@ -121,6 +130,85 @@ class AsyncCrawler(BaseCrawler):
 
             # 清理资源
             self.dedup.close()
+            await self.storage.close()
+            await shutdown_image_download_service()
+
+    def _save_manifests(self, manifests):
+        """
+        保存输入文件清单(爬取失败的 URL 不记入,下次运行重新调度)
+
+        Args:
+            manifests: 每个输入文件的 InputManifest
+        """
+        failed_urls = {url for url, _, _, _ in self.failed_items}
+        for manifest in manifests:
+            manifest.forget(failed_urls)
+            manifest.save()
+
+            stats = manifest.get_stats()
+            logger.info(
+                f"输入清单 {manifest.input_path.name}: 新增 {stats['added']} 个 URL, "
+                f"移除 {stats['removed']} 个, 未变化 {stats['unchanged_lines']} 行"
+            )
+
+    async def _crawl(self, *sources: Iterable[URLItem], workers: int = None):
+        """
+        流式处理 URL: 生产者把解析出的 URL 放入有界队列,固定数量的工作协程取出处理
+
+        每个输入文件一个生产者,多个文件交替解析,共用同一个队列、抓取器和并发限制。
+        同一 URL 出现在多个文件(或同一文件多次)时只爬取一次,使用最先解析到的 H1/H2。
+        队列满时生产者暂停读取文件,驻留内存的 URL 不超过队列容量加工作协程数;
+        第一个 URL 解析出来即开始爬取,不等整个文件解析完。
+
+        Args:
+            sources: 每个输入文件的 URLItem 迭代器(通常是 MarkdownParser.iter_items())
+            workers: 工作协程数,默认使用配置中的值(0 表示并发数的 2 倍)
+        """
+        workers = workers or config.CRAWL_WORKERS or self.fetcher.concurrency * 2
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        progress = tqdm(desc="爬取进度", unit="url")
+        seen = set()
+
+        async def produce(items):
+            for item in items:
+                if item.url in seen:
+                    self.stats['duplicates'] += 1
+                    continue
+                seen.add(item.url)
+                self.stats['total'] += 1
+                await queue.put(item)
+
+        async def produce_all():
+            tasks = [asyncio.ensure_future(produce(items)) for items in sources]
+            try:
+                await asyncio.gather(*tasks)
+                # 文件读完后才知道总数
+                progress.total = self.stats['total']
+                progress.refresh()
+            finally:
+                # 某个文件解析失败时停止其他生产者
+                for task in tasks:
+                    task.cancel()
+                # 每个工作协程一个结束标记
+                for _ in range(workers):
+                    await queue.put(None)
+
+        async def work():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                await self._process_url(item)
+                progress.update(1)
+
+        producer = asyncio.create_task(produce_all())
+        try:
+            await asyncio.gather(*(work() for _ in range(workers)))
+            # 解析异常(如文件编码错误)在这里抛出
+            await producer
+        finally:
+            producer.cancel()
+            progress.close()
 
     async def _process_url(self, item):
         """
@@ -130,6 +218,12 @@ class AsyncCrawler(BaseCrawler):
             item: URLItem 对象
         """
         url = item.url
+        writer = None
+
+        def on_translate(page):
+            # 流式翻译开始: 边翻译边写入临时文件
+            nonlocal writer
+            writer = asyncio.ensure_future(self.storage.write_progressive(item, page, page.stream))
 
         try:
             # 去重检查
@@ -139,31 +233,34 @@ class AsyncCrawler(BaseCrawler):
                 return
 
             # 异步爬取网页
-            page = await self.fetcher.fetch(url)
+            page = await self.fetcher.fetch(url, on_translate=on_translate)
 
             if not page.success:
                 logger.error(f"✗ 爬取失败: {url} - {page.error}")
-                self.stats['failed'] += 1
-                self.failed_items.append((item, page.error or "未知错误"))
+                self._record_failure(item, page.error or "未知错误")
                 return
 
             # 保存文件(异步操作)
             file_path = await self.storage.save_async(item, page)
 
+            # 页面已写入文件,释放正文等大字段
+            page.release()
+
             if file_path:
                 # 标记为已爬取
                 self.dedup.mark_crawled(url)
                 self.stats['success'] += 1
                 logger.info(f"✓ 成功: {url}")
             else:
-                self.stats['failed'] += 1
-                self.failed_items.append((item, "保存文件失败"))
+                self._record_failure(item, "保存文件失败")
                 logger.error(f"✗ 保存失败: {url}")
 
         except Exception as e:
             logger.error(f"✗ 处理异常: {url} - {e}")
-            self.stats['failed'] += 1
-            self.failed_items.append((item, str(e)))
+            self._record_failure(item, f"{type(e).__name__}: {e}")
+        finally:
+            if writer is not None:
+                self.storage.remove_partial(await writer)
 
 
 async def do_interactive_login(args):
@@ -234,9 +331,20 @@ def main():
         import logging
         logging.getLogger("creeper").setLevel(logging.DEBUG)
 
+    url_list_mode = bool(args.urls or args.urls_file)
+
+    # --urls 与 --urls-file 只能二选一(同时指定时不静默丢弃其中一个)
+    if args.urls and args.urls_file:
+        logger.error("错误: --urls 与 --urls-file 不能同时使用")
+        sys.exit(1)
+
     # 验证 --with-images 参数组合
-    if args.with_images and not args.urls:
-        logger.error("错误: --with-images 参数必须配合 --urls 使用")
+    if args.with_images and not url_list_mode:
+        logger.error("错误: --with-images 参数必须配合 --urls 或 --urls-file 使用")
+        sys.exit(1)
+
+    if args.ndjson and not url_list_mode:
+        logger.error("错误: --ndjson 参数必须配合 --urls 或 --urls-file 使用")
         sys.exit(1)
 
     # 处理交互式登录
@@ -246,7 +354,7 @@ def main():
         sys.exit(0 if success else 1)
 
     # 处理URL列表模式
-    if args.urls:
+    if url_list_mode:
 
         # 检查 --with-images 参数组合
         if args.with_images:
@@ -265,16 +373,18 @@ def main():
             url_string=args.urls,
             concurrency=args.concurrency,
             use_playwright=not args.no_playwright,
-            with_images=args.with_images
+            with_images=args.with_images,
+            ndjson=args.ndjson,
+            urls_file=args.urls_file
         ))
         return
 
     # 检查输入文件
     if not args.input_file:
-        logger.error("错误: 必须提供输入文件，或使用 --urls 或 --login-url 参数")
+        logger.error("错误: 必须提供输入文件，或使用 --urls、--urls-file 或 --login-url 参数")
         sys.exit(1)
 
-    if not Path(args.input_file).exists():
+    if not resolve_input_files(args.input_file):
         logger.error(f"输入文件不存在: {args.input_file}")
         sys.exit(1)
 
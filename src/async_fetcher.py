@@ -6,8 +6,7 @@
 import asyncio
 import time
 import random
-from typing import Optional, List
-from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Iterable, Optional, List, Union
 
 import aiohttp
 import trafilatura
@@ -17,35 +16,103 @@ from playwright.async_api import async_playwright, TimeoutError as PlaywrightTim
 from .config import config
 from .utils import setup_logger, extract_domain, get_timestamp, current_url
 from .cookie_manager import CookieManager
+from .image_filter import extract_image_size_hints
+from .image_downloader import ImageDownloadService, get_image_download_service
 
 logger = setup_logger(__name__)
 
 
-@dataclass
 class WebPage:
-    """网页数据类"""
-    url: str
-    title: str
-    description: str
-    content: str
-    author: str = ""
-    published_date: str = ""
-    crawled_at: str = ""
-    method: str = "static"  # static 或 dynamic
-    success: bool = True
-    error: Optional[str] = None
-    translated: bool = False  # 是否已翻译
-    original_language: str = "unknown"  # 原始语言
-
-    def __post_init__(self):
-        if not self.crawled_at:
-            self.crawled_at = get_timestamp()
+    """
+    网页数据类
+
+    爬取并发较高时同时存在大量实例,使用 __slots__ 省去每个实例的 __dict__
+    (Python 3.8 的 dataclass 不支持 slots=True,因此手写)。
+    """
+
+    __slots__ = (
+        'url', 'title', 'description', 'content', 'author', 'published_date', 'crawled_at',
+        'method', 'success', 'error', 'translated', 'original_language',
+        'translation_ttft', 'translation_tps', 'stream', 'image_hints'
+    )
+
+    def __init__(
+        self,
+        url: str,
+        title: str,
+        description: str,
+        content: str,
+        author: str = "",
+        published_date: str = "",
+        crawled_at: str = "",
+        method: str = "static",  # static 或 dynamic
+        success: bool = True,
+        error: Optional[str] = None,
+        translated: bool = False,  # 是否已翻译
+        original_language: str = "unknown",  # 原始语言
+        translation_ttft: Optional[float] = None,  # 翻译首 token 时间(秒,流式翻译时记录)
+        translation_tps: Optional[float] = None,   # 翻译生成速度(tokens/秒)
+        stream: Any = None,  # 正文译文的增量缓冲区(StreamBuffer)
+        image_hints: Optional[Dict[str, Any]] = None  # HTML 中声明的图片尺寸 {URL: (宽, 高)}
+    ):
+        self.url = url
+        self.title = title
+        self.description = description
+        self.content = content
+        self.author = author
+        self.published_date = published_date
+        self.crawled_at = crawled_at or get_timestamp()
+        self.method = method
+        self.success = success
+        self.error = error
+        self.translated = translated
+        self.original_language = original_language
+        self.translation_ttft = translation_ttft
+        self.translation_tps = translation_tps
+        self.stream = stream
+        self.image_hints = {} if image_hints is None else image_hints
+
+    def __repr__(self):
+        return (f"WebPage(url={self.url}, title={self.title}, method={self.method}, "
+                f"success={self.success}, error={self.error})")
+
+    def release(self):
+        """
+        页面已写入文件后释放正文等大字段
+
+        保留 url、title、success 等元数据,后台图片任务已持有自己的尺寸提示引用。
+        """
+        self.description = ""
+        self.content = ""
+        self.author = ""
+        self.stream = None
+        self.image_hints = {}
+
+
+async def _as_async_iter(items: Iterable[str]) -> AsyncIterator[str]:
+    """把普通可迭代对象包装为异步迭代器"""
+    for item in items:
+        yield item
+
+
+async def _next_or_none(iterator: AsyncIterator[str]) -> Optional[str]:
+    """读取异步迭代器的下一项,结束时返回 None"""
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return None
 
 
 class AsyncWebFetcher:
     """异步网页爬取器"""
 
-    def __init__(self, use_playwright: bool = True, concurrency: int = None, cookie_manager: Optional[CookieManager] = None):
+    def __init__(
+        self,
+        use_playwright: bool = True,
+        concurrency: int = None,
+        cookie_manager: Optional[CookieManager] = None,
+        translation_concurrency: int = None
+    ):
         """
         初始化异步爬取器
 
@@ -53,12 +120,18 @@ class AsyncWebFetcher:
             use_playwright: 是否启用 Playwright 动态渲染
             concurrency: 并发数,默认使用配置中的值
             cookie_manager: Cookie 管理器(可选)
+            translation_concurrency: 翻译并发数,默认使用配置中的值
         """
         self.use_playwright = use_playwright
         self.concurrency = concurrency or config.CONCURRENCY
         self.cookie_manager = cookie_manager
         self.semaphore = asyncio.Semaphore(self.concurrency)
 
+        # 翻译阶段独立的并发控制（与爬取并发槽分离）
+        self.translation_concurrency = translation_concurrency or config.TRANSLATION_CONCURRENCY
+        self.translation_semaphore = asyncio.Semaphore(self.translation_concurrency)
+        self.translation_waiting = 0
+
         # 初始化翻译器
         self.translator = None
         if config.ENABLE_TRANSLATION and config.DEEPSEEK_API_KEY:
@@ -69,7 +142,7 @@ class AsyncWebFetcher:
                 base_url=config.DEEPSEEK_BASE_URL,
                 model=config.DEEPSEEK_MODEL
             )
-            logger.info("翻译功能已启用 (DeepSeek)")
+            logger.info(f"翻译功能已启用 (DeepSeek, 翻译并发数: {self.translation_concurrency})")
 
 
         if cookie_manager:
@@ -87,13 +160,20 @@ class AsyncWebFetcher:
         logger.debug(f"延迟 {delay:.2f} 秒...")
         await asyncio.sleep(delay)
 
-    async def fetch(self, url: str, retry_count: int = 0) -> WebPage:
+    async def fetch(
+        self,
+        url: str,
+        retry_count: int = 0,
+        on_translate: Optional[Callable[[WebPage], None]] = None
+    ) -> WebPage:
         """
         异步爬取网页(自动降级策略)
 
         Args:
             url: 目标 URL
             retry_count: 当前重试次数
+            on_translate: 开始流式翻译时的回调(可选),参数为带有 stream 缓冲区的 WebPage,
+                调用方可据此边翻译边写入
 
         Returns:
             WebPage 对象
@@ -102,9 +182,9 @@ class AsyncWebFetcher:
         while True:
             result = await self._fetch_with_semaphore(url, retry_count)
 
-            # 如果成功，直接返回
+            # 如果成功，进入翻译阶段（在爬取信号量外执行，不占用网络并发槽）
             if result.success:
-                return result
+                return await self._translate(result, on_translate)
 
             # 如果已达到最大重试次数，更新错误信息并返回
             if retry_count >= config.MAX_RETRIES:
@@ -117,6 +197,54 @@ class AsyncWebFetcher:
             await asyncio.sleep(retry_delay)
             retry_count += 1
 
+    async def _translate(
+        self,
+        page: WebPage,
+        on_translate: Optional[Callable[[WebPage], None]] = None
+    ) -> WebPage:
+        """
+        翻译阶段: 使用独立的翻译信号量控制并发
+
+        爬取信号量在进入此阶段前已释放，LLM 调用期间其他 URL 可继续爬取。
+
+        Args:
+            page: 爬取成功的 WebPage 对象
+            on_translate: 开始流式翻译时的回调(可选)
+
+        Returns:
+            翻译后的 WebPage 对象(翻译失败时保留原文)
+        """
+        if not self.translator:
+            return page
+
+        # 统计排队中的页面数（翻译队列深度）
+        self.translation_waiting += 1
+        if self.translation_semaphore.locked():
+            logger.debug(f"翻译队列排队中: {self.translation_waiting} 个页面等待翻译")
+
+        try:
+            await self.translation_semaphore.acquire()
+        finally:
+            self.translation_waiting -= 1
+
+        # 流式翻译: 创建增量缓冲区,交给调用方边翻译边写入
+        if on_translate and config.TRANSLATION_STREAMING:
+            from .translation_stream import StreamBuffer
+
+            page.stream = StreamBuffer()
+            on_translate(page)
+
+        try:
+            return await self.translator.translate_webpage(page)
+        except Exception as e:
+            logger.error(f"翻译失败(保留原文): {e}")
+            return page
+        finally:
+            if page.stream is not None:
+                page.stream.close()
+                page.stream = None
+            self.translation_semaphore.release()
+
     async def _fetch_with_semaphore(self, url: str, retry_count: int = 0) -> WebPage:
         """
         在信号量保护下执行单次爬取尝试
@@ -145,12 +273,6 @@ class AsyncWebFetcher:
                     # 检查内容质量，过滤错误页面（同时检查标题和内容）
                     if self._is_valid_content(page.content, page.title, url):
                         logger.info(f"✓ 静态爬取成功: {url}")
-                        # 调用翻译
-                        if self.translator:
-                            try:
-                                page = await self.translator.translate_webpage(page)
-                            except Exception as e:
-                                logger.error(f"翻译失败(保留原文): {e}")
                         return page
                     else:
                         logger.warning(f"静态爬取内容质量不佳，跳过保存: {url}")
@@ -170,12 +292,6 @@ class AsyncWebFetcher:
                         # 额外检查内容质量（同时检查标题和内容）
                         if self._is_valid_content(page.content, page.title, url):
                             logger.info(f"✓ 动态渲染成功: {url}")
-                            # 调用翻译
-                            if self.translator:
-                                try:
-                                    page = await self.translator.translate_webpage(page)
-                                except Exception as e:
-                                    logger.error(f"翻译失败(保留原文): {e}")
                             return page
                         else:
                             logger.warning(f"动态渲染内容质量不佳，跳过保存: {url}")
@@ -291,7 +407,8 @@ class AsyncWebFetcher:
             content=content,
             author=author,
             published_date=published_date,
-            method="static"
+            method="static",
+            image_hints=self._image_hints(html, url)
         )
 
     async def _fetch_dynamic(self, url: str) -> WebPage:
@@ -323,6 +440,11 @@ class AsyncWebFetcher:
 
             page = await context.new_page()
 
+            # 记录渲染过程中浏览器加载的图片响应,之后存入图片库,避免再次下载
+            image_responses = []
+            if config.DOWNLOAD_IMAGES and config.IMAGE_CAPTURE_FROM_BROWSER:
+                page.on("response", lambda response: self._on_image_response(response, image_responses))
+
             try:
                 # 访问页面
                 await page.goto(url, timeout=config.PAGE_TIMEOUT, wait_until='networkidle')
@@ -366,6 +488,9 @@ class AsyncWebFetcher:
                 if not content:
                     raise ValueError("Playwright 渲染后 Trafilatura 提取内容为空")
 
+                if image_responses:
+                    await self._store_captured_images(image_responses, content, url)
+
                 # 提取元数据
                 metadata = trafilatura.extract_metadata(html)
                 page_title = await page.title()
@@ -381,13 +506,88 @@ class AsyncWebFetcher:
                     content=content,
                     author=author,
                     published_date=published_date,
-                    method="dynamic"
+                    method="dynamic",
+                    image_hints=self._image_hints(html, url)
                 )
 
             finally:
                 await context.close()
                 await browser.close()
 
+    @staticmethod
+    def _on_image_response(response, captured: list):
+        """
+        记录浏览器加载的图片响应(数量有上限,响应体稍后按需读取)
+
+        Args:
+            response: Playwright 响应对象
+            captured: 记录列表
+        """
+        if (response.request.resource_type == 'image' and response.ok
+                and len(captured) < config.IMAGE_CAPTURE_MAX_COUNT):
+            captured.append(response)
+
+    async def _store_captured_images(self, responses: list, content: str, page_url: str):
+        """
+        将正文中引用的、浏览器已加载的图片存入图片库
+
+        Args:
+            responses: 渲染过程中记录的图片响应
+            content: 提取出的 Markdown 正文
+            page_url: 网页 URL
+        """
+        wanted = {resolved for _, _, resolved in ImageDownloadService.extract_image_urls(content, page_url)}
+        if not wanted:
+            return
+
+        service = get_image_download_service()
+        max_bytes = config.MAX_IMAGE_SIZE_MB * 1024 * 1024
+        loop = asyncio.get_event_loop()
+        stored = 0
+
+        for response in responses:
+            # 经过重定向的图片按最初请求的 URL 记录(Markdown 中是原始地址)
+            request = response.request
+            while request.redirected_from:
+                request = request.redirected_from
+            image_url = request.url
+            if image_url not in wanted:
+                continue
+
+            content_length = response.headers.get('content-length', '')
+            if content_length.isdigit() and int(content_length) > max_bytes:
+                continue
+
+            try:
+                body = await response.body()
+            except Exception as e:
+                logger.debug(f"读取浏览器图片响应失败: {image_url} - {e}")
+                continue
+
+            if len(body) <= max_bytes and await loop.run_in_executor(
+                None, service.ingest, image_url, body, response.headers.get('content-type', '')
+            ):
+                stored += 1
+
+        if stored:
+            logger.info(f"✓ 从浏览器渲染中获取 {stored} 张图片，无需再次下载")
+
+    @staticmethod
+    def _image_hints(html: str, url: str) -> Dict[str, Any]:
+        """
+        提取 HTML 中声明的图片尺寸,供图片下载前过滤图标和跟踪像素
+
+        Args:
+            html: 网页 HTML
+            url: 网页 URL
+
+        Returns:
+            {图片 URL: (宽, 高)},未启用图片下载或过滤时为空
+        """
+        if not (config.DOWNLOAD_IMAGES and config.IMAGE_FILTER_ENABLED):
+            return {}
+        return extract_image_size_hints(html, url)
+
     def _extract_title_bs4(self, html: str) -> str:
         """
         使用 BeautifulSoup 提取标题(备用方案)
@@ -569,3 +769,56 @@ class AsyncWebFetcher:
         """
         tasks = [self.fetch(url) for url in urls]
         return await asyncio.gather(*tasks)
+
+    async def fetch_as_completed(
+        self,
+        urls: Union[Iterable[str], AsyncIterable[str]],
+        max_in_flight: int = None
+    ) -> AsyncIterator[WebPage]:
+        """
+        批量异步爬取,按完成顺序逐个产出结果(fetch_batch 的流式版本)
+
+        URL 可以是列表,也可以是异步迭代器(如逐行读取标准输入),边读取边爬取;
+        设置 max_in_flight 时同时进行的请求不超过该数量,其余 URL 暂不读取。
+        调用方提前结束迭代时取消尚未完成的请求。
+
+        Args:
+            urls: URL 列表或(异步)迭代器
+            max_in_flight: 最大在途请求数,None 表示不限制
+
+        Yields:
+            WebPage 对象(完成顺序,不是输入顺序)
+        """
+        source = urls.__aiter__() if hasattr(urls, '__aiter__') else _as_async_iter(urls)
+        pending = set()
+        reader = None  # 读取下一个 URL 的任务(读取慢时不耽误产出已完成的结果)
+        exhausted = False
+
+        try:
+            while True:
+                if reader is None and not exhausted and (max_in_flight is None or len(pending) < max_in_flight):
+                    reader = asyncio.ensure_future(_next_or_none(source))
+
+                waiting = pending | {reader} if reader is not None else pending
+                if not waiting:
+                    return
+
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+                if reader in done:
+                    done.discard(reader)
+                    url = reader.result()
+                    reader = None
+                    if url is None:
+                        exhausted = True
+                    else:
+                        pending.add(asyncio.ensure_future(self.fetch(url)))
+
+                for task in done:
+                    pending.discard(task)
+                    yield task.result()
+        finally:
+            tasks = list(pending) + ([reader] if reader is not None else [])
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -4,10 +4,15 @@ BaseCrawler - 爬虫基类
 """
 
 from abc import ABC, abstractmethod
+from src.config import config
+from src.image_downloader import get_image_download_service
 from src.utils import setup_logger
 
 logger = setup_logger("creeper")
 
+# 失败记录中错误信息的最大长度
+FAILURE_ERROR_MAX_LENGTH = 200
+
 
 class BaseCrawler(ABC):
     """爬虫基类,包含公共逻辑"""
@@ -24,9 +29,10 @@ class BaseCrawler(ABC):
             'total': 0,
             'success': 0,
             'skipped': 0,
-            'failed': 0
+            'failed': 0,
+            'duplicates': 0    # 输入中重复的 URL(只爬取一次,不计入总计)
         }
-        self.failed_items = []
+        self.failed_items = []  # (url, h1, h2, 错误信息) 元组,不保留 URLItem/WebPage 对象
 
         # 子类负责初始化的模块
         self.parser = None
@@ -45,6 +51,17 @@ class BaseCrawler(ABC):
         """处理单个 URL - 子类实现"""
         pass
 
+    def _record_failure(self, item, error: str):
+        """
+        记录失败的 URL
+
+        Args:
+            item: URLItem 对象
+            error: 错误信息(超长时截断)
+        """
+        self.stats['failed'] += 1
+        self.failed_items.append((item.url, item.h1, item.h2, error[:FAILURE_ERROR_MAX_LENGTH]))
+
     def _display_stats(self):
         """显示统计信息"""
         print("\n" + "=" * 60)
@@ -54,6 +71,8 @@ class BaseCrawler(ABC):
         print(f"成功:   {self.stats['success']} 个 ✓")
         print(f"跳过:   {self.stats['skipped']} 个 ⊘")
         print(f"失败:   {self.stats['failed']} 个 ✗")
+        if self.stats.get('duplicates'):
+            print(f"重复:   {self.stats['duplicates']} 个(输入中重复的 URL,只爬取一次)")
 
         if self.stats['total'] > 0:
             success_rate = (self.stats['success'] / self.stats['total']) * 100
@@ -61,8 +80,105 @@ class BaseCrawler(ABC):
 
         print("=" * 60)
 
+        # 显示翻译统计(如果启用)
+        translator = getattr(self.fetcher, 'translator', None)
+        if translator:
+            self._display_translation_stats(translator.get_stats())
+
+        # 显示图片下载统计(如果启用)
+        if config.DOWNLOAD_IMAGES:
+            image_stats = get_image_download_service().get_stats()
+            image_queue = getattr(self.storage, 'image_queue', None)
+            image_stats['queue'] = image_queue.get_stats() if image_queue else None
+            self._display_image_stats(image_stats)
+
         # 显示输出目录
         if self.storage:
             storage_stats = self.storage.get_stats()
             print(f"\n输出目录: {storage_stats['output_dir']}")
             print(f"生成文件: {storage_stats['total_files']} 个")
+
+    def _display_translation_stats(self, stats: dict):
+        """
+        显示翻译统计信息
+
+        Args:
+            stats: Translator.get_stats() 返回的统计字典
+        """
+        limiter = stats.get('rate_limiter', {})
+        cache = stats.get('cache')
+        memory = stats.get('memory')
+        field_batches = stats.get('field_batches')
+
+        print("\n🌐 翻译统计")
+        print(f"API 调用: {stats['api_calls']} 次 (失败 {stats['failed_calls']} 次)")
+        print(f"Token:    输入 {stats['prompt_tokens']} / 输出 {stats['completion_tokens']}")
+        if stats['prompt_tokens']:
+            print(f"前缀缓存: 命中 {stats['cache_hit_tokens']}/{stats['prompt_tokens']} 输入 tokens "
+                  f"({stats['cache_hit_tokens'] / stats['prompt_tokens'] * 100:.1f}%)")
+        if stats.get('streamed_pages'):
+            pages = stats['streamed_pages']
+            print(f"流式翻译: {pages} 个页面, 平均首 token {stats['ttft_total'] / pages:.2f} 秒, "
+                  f"平均 {stats['tokens_per_second_total'] / pages:.1f} tokens/秒")
+        if stats.get('protected_spans'):
+            print(f"保护片段: {stats['protected_spans']} 个代码/链接未发送翻译, 节省约 {stats['protected_tokens']} tokens")
+        if limiter:
+            print(f"限流:     429 重试 {limiter['rate_limited']} 次, "
+                  f"临时错误重试 {limiter['transient_retries']} 次, "
+                  f"等待 {limiter['throttle_time']:.1f} 秒, "
+                  f"最大排队 {limiter['max_queue_depth']}")
+        if cache:
+            print(f"缓存:     命中 {cache['hits']}/{cache['hits'] + cache['misses']} "
+                  f"({cache['hit_rate'] * 100:.1f}%), 节省约 {cache['tokens_saved']} tokens")
+        if memory and memory['segments']:
+            print(f"翻译记忆: 段落复用 {memory['reused']}/{memory['segments']} "
+                  f"({memory['reuse_rate'] * 100:.1f}%), 节省约 {memory['tokens_saved']} tokens")
+            # 按节省 token 数显示复用最多的域名
+            top_domains = sorted(memory['domains'].items(), key=lambda kv: kv[1]['tokens_saved'], reverse=True)[:5]
+            for domain, domain_stats in top_domains:
+                if domain_stats['reused']:
+                    print(f"  - {domain}: 复用 {domain_stats['reused']}/{domain_stats['segments']} "
+                          f"({domain_stats['reuse_rate'] * 100:.1f}%), 节省约 {domain_stats['tokens_saved']} tokens")
+        if field_batches and field_batches['batches']:
+            print(f"字段合并: {field_batches['items']} 个短字段合并为 {field_batches['batches']} 次请求 "
+                  f"(平均每批 {field_batches['avg_batch_size']:.1f} 个)")
+        print("=" * 60)
+
+    def _display_image_stats(self, stats: dict):
+        """
+        显示图片下载统计信息
+
+        Args:
+            stats: ImageDownloadService.get_stats() 返回的统计字典
+        """
+        image_filter = stats.get('filter')
+        store = stats.get('store')
+        queue = stats.get('queue')
+        transcode = stats.get('transcode')
+
+        print("\n🖼️ 图片统计")
+        print(f"下载请求: {stats['requests']} 次 (最大在途 {stats['max_in_flight']})")
+        hosts = stats.get('hosts')
+        if hosts and (hosts['fallbacks'] or hosts['routed']):
+            print(f"下载客户端: aiohttp 失败回退 {hosts['fallbacks']} 次, 直接使用 requests {hosts['routed']} 次 "
+                  f"({hosts['requests_hosts']} 个域名, 本次新学习 {hosts['learned']} 个)")
+        if stats.get('captured'):
+            print(f"浏览器捕获: {stats['captured']} 张图片来自动态渲染, 无需再次下载")
+        if queue and queue['pages']:
+            print(f"后台下载: {queue['completed']}/{queue['pages']} 个页面完成, "
+                  f"图片 {queue['downloaded']}/{queue['images']} 成功, 回填 {queue['patched']} 个页面")
+        if image_filter:
+            reasons = ", ".join(f"{reason} {count}" for reason, count in image_filter['reasons'].items())
+            print(f"下载前过滤: 跳过 {image_filter['skipped']} 次请求" + (f" ({reasons})" if reasons else ""))
+            print(f"下载后丢弃: {image_filter['dropped']} 张过小图片 "
+                  f"(已下载 {image_filter['dropped_bytes']} 字节, 未写入磁盘)")
+        if store:
+            print(f"图片库:   复用 {store['url_hits']} 次 (节省 {store['bytes_saved']} 字节), "
+                  f"新下载 {store['downloads']} 张, 内容重复 {store['content_dedup']} 张")
+        if transcode and transcode['images']:
+            before, after = transcode['bytes_before'], transcode['bytes_after']
+            saved = (before - after) / before * 100 if before else 0.0
+            print(f"图片转码: {transcode['transcoded']}/{transcode['images']} 张, "
+                  f"{before / 1024 / 1024:.1f}MB → {after / 1024 / 1024:.1f}MB "
+                  f"(减少 {saved:.1f}%)")
+        print("=" * 60)
@@ -25,8 +25,13 @@ def create_argument_parser():
   %(prog)s input.md --debug            # 开启调试模式
   %(prog)s input.md --force            # 强制重新爬取
   %(prog)s input.md --no-playwright    # 禁用 Playwright
+  %(prog)s inputs/                     # 爬取目录下所有 Markdown 文件
+  %(prog)s "inputs/**/*.md"            # glob 模式(需加引号)
   %(prog)s --login-url URL             # 交互式登录
   %(prog)s --urls "URL1,URL2"          # URL列表模式，输出JSON
+  %(prog)s --urls "URL1,URL2" --ndjson # 逐行流式输出 NDJSON
+  %(prog)s --urls-file urls.txt --ndjson  # 从文件逐行读取URL
+  cat urls.txt | %(prog)s --urls - --ndjson  # 从标准输入逐行读取URL
 
 更多信息: https://github.com/your-repo/creeper
         """
@@ -38,7 +43,7 @@ def create_argument_parser():
         type=str,
         nargs='?',
         default=None,
-        help='Markdown 输入文件路径'
+        help='Markdown 输入文件路径、目录(递归收集 .md 文件)或 glob 模式'
     )
 
     # URL列表模式
@@ -46,14 +51,29 @@ def create_argument_parser():
         '--urls',
         type=str,
         default=None,
-        help='直接输入URL列表，用逗号分隔。输出JSON格式数据到控制台'
+        help='直接输入URL列表，用逗号分隔。输出JSON格式数据到控制台；"-" 表示从标准输入逐行读取'
+    )
+
+    # URL列表文件
+    parser.add_argument(
+        '--urls-file',
+        type=str,
+        default=None,
+        help='从文件逐行读取URL(每行一个，"-" 表示标准输入)，按URL列表模式处理'
     )
 
     # 提取图片链接
     parser.add_argument(
         '--with-images',
         action='store_true',
-        help='提取页面中的图片链接(仅在 --urls 模式下生效)'
+        help='提取页面中的图片链接(仅在 --urls 模式下生效,含 --urls-file)'
+    )
+
+    # NDJSON 流式输出
+    parser.add_argument(
+        '--ndjson',
+        action='store_true',
+        help='每完成一个URL立即输出一行紧凑JSON(仅在 --urls/--urls-file 模式下生效)'
     )
 
     # 输出目录
@@ -76,7 +96,7 @@ def create_argument_parser():
     parser.add_argument(
         '--force',
         action='store_true',
-        help='强制重新爬取(跳过去重检查)'
+        help='强制重新爬取(跳过去重检查和增量输入清单,完整检查所有 URL)'
     )
 
     # 调试模式
@@ -28,6 +28,9 @@ class Config:
     MAX_DELAY = float(os.getenv('MAX_DELAY', 3))
     MAX_RETRIES = int(os.getenv('MAX_RETRIES', 1))
     RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', 2))
+    CRAWL_WORKERS = int(os.getenv('CRAWL_WORKERS', 0))  # 0 表示并发数的 2 倍(流式 URL 列表输入的最大在途请求数相同)
+    INCREMENTAL_INPUT = os.getenv('INCREMENTAL_INPUT', 'true').lower() == 'true'  # 只调度输入文件中新增的 URL
+    INPUT_MANIFEST_DIR = os.getenv('INPUT_MANIFEST_DIR', 'data/input_manifests')  # 输入文件清单目录
 
     # 浏览器配置
     BROWSER_TYPE = os.getenv('BROWSER_TYPE', 'chromium')
@@ -58,6 +61,29 @@ class Config:
     MAX_IMAGE_SIZE_MB = int(os.getenv('MAX_IMAGE_SIZE_MB', 10))
     IMAGE_DOWNLOAD_TIMEOUT = int(os.getenv('IMAGE_DOWNLOAD_TIMEOUT', 30))
     SUPPORTED_IMAGE_FORMATS = os.getenv('SUPPORTED_IMAGE_FORMATS', '.jpg,.jpeg,.png,.gif,.webp,.svg')
+    IMAGE_MAX_IN_FLIGHT = int(os.getenv('IMAGE_MAX_IN_FLIGHT', 16))  # 全局在途图片请求上限
+    IMAGE_PER_HOST_LIMIT = int(os.getenv('IMAGE_PER_HOST_LIMIT', 4))  # 单域名在途图片请求上限
+    IMAGE_FALLBACK_WORKERS = int(os.getenv('IMAGE_FALLBACK_WORKERS', 0))  # requests 下载线程数,0 表示与全局在途上限相同
+    IMAGE_STORE_DIR = os.getenv('IMAGE_STORE_DIR', 'data/image_store')  # 全局图片库目录(跨页面、跨运行复用)
+    IMAGE_FILTER_ENABLED = os.getenv('IMAGE_FILTER_ENABLED', 'true').lower() == 'true'  # 过滤跟踪像素、图标等
+    IMAGE_MIN_DIMENSION = int(os.getenv('IMAGE_MIN_DIMENSION', 32))  # 宽或高小于该像素数的图片不下载/丢弃
+    IMAGE_MIN_BYTES = int(os.getenv('IMAGE_MIN_BYTES', 256))  # 小于该字节数的图片下载后丢弃
+    IMAGE_DENYLIST_DOMAINS = os.getenv('IMAGE_DENYLIST_DOMAINS', '')  # 不下载图片的域名(逗号分隔,含子域名)
+    IMAGE_BACKGROUND_DOWNLOAD = os.getenv('IMAGE_BACKGROUND_DOWNLOAD', 'true').lower() == 'true'  # 页面先保存,图片后台下载后回填
+    IMAGE_QUEUE_WORKERS = int(os.getenv('IMAGE_QUEUE_WORKERS', 4))  # 后台图片下载工作协程数(每个协程处理一个页面)
+    IMAGE_DOWNLOAD_RETRIES = int(os.getenv('IMAGE_DOWNLOAD_RETRIES', 2))  # 后台下载失败图片的重试次数
+    IMAGE_RETRY_DELAY = float(os.getenv('IMAGE_RETRY_DELAY', 1.0))  # 首次重试前等待秒数(之后翻倍)
+    IMAGE_QUEUE_DRAIN_TIMEOUT = float(os.getenv('IMAGE_QUEUE_DRAIN_TIMEOUT', 120))  # 爬取结束后等待图片下载的最长秒数
+    IMAGE_TRANSCODE = os.getenv('IMAGE_TRANSCODE', 'false').lower() == 'true'  # 下载后缩放并转为 WebP(需要 Pillow)
+    IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', 1920))  # 转码后的最大边长(像素)
+    IMAGE_WEBP_QUALITY = int(os.getenv('IMAGE_WEBP_QUALITY', 80))  # WebP 质量(1-100)
+    IMAGE_KEEP_ORIGINAL = os.getenv('IMAGE_KEEP_ORIGINAL', 'false').lower() == 'true'  # 转码后在页面目录保留原图
+    IMAGE_TRANSCODE_WORKERS = int(os.getenv('IMAGE_TRANSCODE_WORKERS', 2))  # 转码进程数
+    IMAGE_CAPTURE_FROM_BROWSER = os.getenv('IMAGE_CAPTURE_FROM_BROWSER', 'true').lower() == 'true'  # 动态渲染时直接保存浏览器已加载的图片
+    IMAGE_CAPTURE_MAX_COUNT = int(os.getenv('IMAGE_CAPTURE_MAX_COUNT', 100))  # 每个页面最多记录的图片响应数
+    IMAGE_HOST_POLICY_FILE = os.getenv('IMAGE_HOST_POLICY_FILE', 'data/image_hosts.json')  # 域名下载客户端学习结果
+    IMAGE_FALLBACK_LEARN_THRESHOLD = int(os.getenv('IMAGE_FALLBACK_LEARN_THRESHOLD', 2))  # aiohttp 失败且 requests 成功几次后改用 requests
+    IMAGE_HOST_POLICY_TTL_DAYS = int(os.getenv('IMAGE_HOST_POLICY_TTL_DAYS', 30))  # 学习结果有效天数
 
     # Cookie 配置
     COOKIE_STORAGE = os.getenv('COOKIE_STORAGE', 'redis')  # 'file' 或 'redis'
@@ -83,6 +109,39 @@ class Config:
     TRANSLATE_CONTENT = os.getenv('TRANSLATE_CONTENT', 'true').lower() == 'true'
     TRANSLATE_METADATA = os.getenv('TRANSLATE_METADATA', 'false').lower() == 'true'
 
+    # 翻译阶段并发数（独立于爬取并发，翻译不占用网络爬取槽）
+    TRANSLATION_CONCURRENCY = int(os.getenv('TRANSLATION_CONCURRENCY', 3))
+
+    # 长文档分块翻译: 每块 token 上限（0 表示根据模型输入/输出上限自动计算）
+    TRANSLATION_CHUNK_TOKENS = int(os.getenv('TRANSLATION_CHUNK_TOKENS', 0))
+
+    # 流式翻译（边接收边写入，并统计首 token 时间和生成速度）
+    TRANSLATION_STREAMING = os.getenv('TRANSLATION_STREAMING', 'true').lower() == 'true'
+
+    # 翻译缓存配置（backend: redis / file，Redis 不可用时自动降级为 file）
+    ENABLE_TRANSLATION_CACHE = os.getenv('ENABLE_TRANSLATION_CACHE', 'true').lower() == 'true'
+    TRANSLATION_CACHE_BACKEND = os.getenv('TRANSLATION_CACHE_BACKEND', 'redis')
+    TRANSLATION_CACHE_TTL_DAYS = int(os.getenv('TRANSLATION_CACHE_TTL_DAYS', 30))
+    TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv('TRANSLATION_CACHE_MAX_ENTRIES', 100000))
+    TRANSLATION_CACHE_FILE = os.getenv('TRANSLATION_CACHE_FILE', 'data/translation_cache.db')
+
+    # 段落级翻译记忆（同站点重复段落跨页面复用，存储后端与翻译缓存相同）
+    ENABLE_TRANSLATION_MEMORY = os.getenv('ENABLE_TRANSLATION_MEMORY', 'true').lower() == 'true'
+    TRANSLATION_MEMORY_MIN_CHARS = int(os.getenv('TRANSLATION_MEMORY_MIN_CHARS', 40))
+    TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv('TRANSLATION_MEMORY_MAX_ENTRIES', 200000))
+
+    # 短字段跨页面批量翻译（仅翻译标题/摘要等短字段时，多个页面合并为一次请求）
+    ENABLE_FIELD_BATCHING = os.getenv('ENABLE_FIELD_BATCHING', 'true').lower() == 'true'
+    FIELD_BATCH_WINDOW_MS = int(os.getenv('FIELD_BATCH_WINDOW_MS', 200))
+    FIELD_BATCH_MAX_ITEMS = int(os.getenv('FIELD_BATCH_MAX_ITEMS', 20))
+
+    # LLM 限流配置（所有翻译请求共享，0 表示不限制）
+    LLM_RPM_LIMIT = int(os.getenv('LLM_RPM_LIMIT', 60))
+    LLM_TPM_LIMIT = int(os.getenv('LLM_TPM_LIMIT', 120000))
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 5))
+    LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', 2))
+    LLM_RETRY_MAX_DELAY = float(os.getenv('LLM_RETRY_MAX_DELAY', 60))
+
     # LLM 模型能力自动探测配置
     ENABLE_MODEL_AUTO_DETECTION = os.getenv('ENABLE_MODEL_AUTO_DETECTION', 'true').lower() == 'true'
     MODEL_DETECTION_TIMEOUT = int(os.getenv('MODEL_DETECTION_TIMEOUT', 10))
@@ -9,18 +9,27 @@ import os
 import re
 import hashlib
 import asyncio
+import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict
+from typing import Any, Callable, List, Tuple, Optional, Dict
 from urllib.parse import urlparse, urljoin
 from dataclasses import dataclass
 
+import ssl
+
 import requests
+from requests.adapters import HTTPAdapter
 import aiohttp
-import asyncio
+from aiohttp.http_exceptions import HttpProcessingError
 from concurrent.futures import ThreadPoolExecutor
 
 from src.config import config
 from src.utils import setup_logger
+from src.image_store import ImageStore
+from src.image_filter import DIMENSION_SNIFF_BYTES, ImageFilter, SizeHint
+from src.image_transcoder import ImageTranscoder
+from src.image_host_policy import HostClientPolicy
 
 logger = setup_logger(__name__)
 
@@ -33,24 +42,491 @@ class ImageInfo:
     filename: str          # 文件名
     success: bool          # 是否下载成功
     error: Optional[str] = None  # 错误信息
+    blob: Optional[Path] = None  # 图片库中对应的文件
+    created: bool = False        # 页面目录中的文件是否由本次下载新建(而非复用同目录已有文件)
+
+
+# Markdown 图片语法
+IMAGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+
+IMAGE_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+# aiohttp 自身的传输失败(客户端/连接、SSL、协议、HTTP 状态码),只有这些才计入域名学习
+AIOHTTP_TRANSPORT_ERRORS = (aiohttp.ClientError, ssl.SSLError, HttpProcessingError)
+
+# 流式下载的分块大小和用于识别格式的文件头长度
+IMAGE_CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 64
+
+# 图片文件头魔数
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'\x00\x00\x01\x00', 'image/x-icon'),
+]
+
+
+# Content-Type 对应的文件扩展名
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/svg+xml': '.svg',
+    'image/bmp': '.bmp',
+    'image/avif': '.avif',
+    'image/x-icon': '.ico',
+}
+
+
+def resolve_image_url(url: str, base_url: Optional[str] = None) -> Optional[str]:
+    """
+    将 Markdown 中的图片地址解析为可下载的完整 URL
+
+    Args:
+        url: Markdown 中的图片地址(已去除首尾空白)
+        base_url: 网页的基础 URL，用于解析相对路径图片
+
+    Returns:
+        http/https 完整 URL，空地址、data URI 或无法解析时返回 None
+    """
+    if not url or url.startswith('data:'):
+        return None
+
+    if base_url and not url.startswith(('http://', 'https://')):
+        url = urljoin(base_url, url)
+
+    if url.startswith(('http://', 'https://')):
+        return url
+    return None
+
+
+def rewrite_image_urls(markdown_content: str, local_paths: Dict[str, str],
+                       base_url: Optional[str] = None) -> Tuple[str, int]:
+    """
+    一次正则替换将已下载图片的地址改为本地路径
+
+    Args:
+        markdown_content: Markdown 文本内容
+        local_paths: {解析后的图片 URL: 本地相对路径}
+        base_url: 网页的基础 URL，用于解析相对路径图片
+
+    Returns:
+        (替换后的文本, 被替换的图片引用数)
+    """
+    if not local_paths:
+        return markdown_content, 0
+
+    replaced = 0
+
+    def replace(match: re.Match) -> str:
+        nonlocal replaced
+        local_path = local_paths.get(resolve_image_url(match.group(2).strip(), base_url))
+        if local_path is None:
+            return match.group(0)
+        replaced += 1
+        return f"![{match.group(1)}]({local_path})"
+
+    return IMAGE_PATTERN.sub(replace, markdown_content), replaced
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """
+    根据文件头魔数识别图片类型
+
+    Args:
+        head: 文件开头的字节
+
+    Returns:
+        图片的 MIME 类型,无法识别时返回 None
+    """
+    for signature, mime in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mime
+
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    if head[4:12] in (b'ftypavif', b'ftypavis'):
+        return 'image/avif'
+
+    text = head.lstrip().lower()
+    if text.startswith(b'<svg') or (text.startswith(b'<?xml') and b'<svg' in text):
+        return 'image/svg+xml'
+
+    return None
+
+
+class ImageTooLargeError(Exception):
+    """下载过程中超过图片大小上限"""
+
+
+class _ImageFileWriter:
+    """边下载边写入临时文件并计算内容哈希,超过大小上限立即中止"""
+
+    def __init__(self, tmp_path: Path, max_bytes: int):
+        self.tmp_path = tmp_path
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._file = open(tmp_path, 'wb')
+
+    def write(self, chunk: bytes):
+        """写入一个数据块,累计超过上限时抛出 ImageTooLargeError"""
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise ImageTooLargeError(
+                f"文件过大: 超过 {self.max_bytes / 1024 / 1024:.0f}MB 上限,已中止下载"
+            )
+        self._sha256.update(chunk)
+        self._file.write(chunk)
+
+    def commit(self) -> str:
+        """
+        完成写入
+
+        Returns:
+            内容的 SHA-256
+        """
+        self._file.close()
+        return self._sha256.hexdigest()
+
+    def abort(self):
+        """放弃写入并删除临时文件"""
+        self._file.close()
+        try:
+            self.tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ImageDownloadService:
+    """
+    进程级图片下载服务
+
+    所有页面共享一个带连接池的 aiohttp 会话和一个 requests 备用线程池,
+    并统一限制全局和单个域名的在途图片请求数。
+    """
+
+    def __init__(self, max_in_flight: int = None, per_host_limit: int = None, fallback_workers: int = None):
+        """
+        初始化图片下载服务
+
+        Args:
+            max_in_flight: 全局在途图片请求上限
+            per_host_limit: 单个域名在途图片请求上限
+            fallback_workers: requests 下载线程数,默认与全局在途上限相同
+                (学习到需要 requests 的域名也使用该线程池,线程数过小会成为所有这类域名共同的瓶颈)
+        """
+        self.max_in_flight = max_in_flight or config.IMAGE_MAX_IN_FLIGHT
+        self.per_host_limit = per_host_limit or config.IMAGE_PER_HOST_LIMIT
+        self.fallback_workers = fallback_workers or config.IMAGE_FALLBACK_WORKERS or self.max_in_flight
+
+        # 超时时间（分离连接超时和总超时）
+        self.timeout = aiohttp.ClientTimeout(
+            total=config.IMAGE_DOWNLOAD_TIMEOUT,
+            connect=10,  # 连接超时10秒
+            sock_read=15  # 读取超时15秒
+        )
+
+        # 配置的域名列表（强制使用requests），以及运行中学习到的需要 requests 的域名
+        self.force_requests_domains = self._load_domain_list()
+        self.host_policy = HostClientPolicy(self.force_requests_domains)
+
+        # requests 备用下载: 每个域名一个带连接池的会话(在备用线程池中使用)
+        self._requests_sessions: Dict[str, requests.Session] = {}
+        self._requests_lock = threading.Lock()
+
+        # 与事件循环绑定的对象,在首次使用时创建
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._store: Optional[ImageStore] = None
+        self._transcoder: Optional[ImageTranscoder] = None
+        self._transcode_warned = False
+
+        # 跟踪像素、图标等无用图片的过滤器(所有页面共享统计)
+        self.filter: Optional[ImageFilter] = ImageFilter() if config.IMAGE_FILTER_ENABLED else None
+
+        self._in_flight = 0
+        self.stats = {
+            'requests': 0,
+            'max_in_flight': 0,
+            'captured': 0    # 从浏览器渲染中获取、无需再次下载的图片数
+        }
+
+        logger.info(f"图片下载服务已初始化 (全局并发: {self.max_in_flight}, 单域名并发: {self.per_host_limit})")
+
+    @property
+    def store(self) -> ImageStore:
+        """全局图片库(首次使用时打开)"""
+        if self._store is None:
+            self._store = ImageStore()
+        return self._store
+
+    @property
+    def transcoder(self) -> Optional[ImageTranscoder]:
+        """图片转码器(启用转码且已安装 Pillow 时,首次使用时创建)"""
+        if self._transcoder is None and config.IMAGE_TRANSCODE:
+            if ImageTranscoder.available():
+                self._transcoder = ImageTranscoder()
+            elif not self._transcode_warned:
+                logger.warning("未安装 Pillow，图片转码已禁用 (pip install Pillow)")
+                self._transcode_warned = True
+        return self._transcoder
+
+    def requests_session(self, host: str) -> requests.Session:
+        """
+        获取域名对应的 requests 会话(首次使用时创建,之后复用连接)
+
+        Args:
+            host: 图片域名
+
+        Returns:
+            requests.Session
+        """
+        with self._requests_lock:
+            session = self._requests_sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers['User-Agent'] = IMAGE_USER_AGENT
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host_limit)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._requests_sessions[host] = session
+            return session
+
+    def _bind_loop(self):
+        """事件循环变化时(如多次 asyncio.run)重建与循环绑定的会话和信号量"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._session = None
+            self._global_semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._host_semaphores = {}
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        获取共享的 aiohttp 会话
+
+        Returns:
+            ClientSession 对象(连接池上限与并发上限一致)
+        """
+        self._bind_loop()
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.per_host_limit)
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                headers={'User-Agent': IMAGE_USER_AGENT},
+                connector=connector
+            )
+        return self._session
+
+    @asynccontextmanager
+    async def limit(self, host: str):
+        """
+        占用一个全局并发槽和一个域名并发槽
+
+        Args:
+            host: 图片所在域名
+        """
+        self._bind_loop()
+        host_semaphore = self._host_semaphores.get(host)
+        if host_semaphore is None:
+            host_semaphore = self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+
+        async with self._global_semaphore, host_semaphore:
+            self._in_flight += 1
+            self.stats['requests'] += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self._in_flight)
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
 
+    async def run_in_pool(self, func: Callable, *args) -> Any:
+        """
+        在共享线程池中执行同步下载函数
+
+        Args:
+            func: 同步函数
+            *args: 函数参数
+
+        Returns:
+            函数返回值
+        """
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.fallback_workers, thread_name_prefix="image_download"
+            )
+        return await asyncio.get_running_loop().run_in_executor(self._thread_pool, func, *args)
+
+    @staticmethod
+    def extract_image_urls(markdown_content: str, base_url: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """
+        从 Markdown 中提取图片 URL
+
+        Args:
+            markdown_content: Markdown 文本内容
+            base_url: 网页的基础 URL，用于解析相对路径图片
+
+        Returns:
+            [(alt_text, original_markdown_url, resolved_url), ...] 列表
+        """
+        image_urls = []
+        for alt_text, url in IMAGE_PATTERN.findall(markdown_content):
+            # 保存原始 URL（用于替换）
+            original_markdown_url = url.strip()
+            resolved_url = resolve_image_url(original_markdown_url, base_url)
+            if resolved_url:
+                image_urls.append((alt_text.strip(), original_markdown_url, resolved_url))
+
+        return image_urls
+
+    @staticmethod
+    def _load_domain_list() -> List[str]:
+        """
+        加载需要强制使用requests的域名列表
+
+        Returns:
+            List[str]: 域名列表
+        """
+        domains = []
+
+        # 从环境变量加载
+        env_domains = os.getenv('FORCE_REQUESTS_DOMAINS', '').split(',')
+        domains.extend([d.strip() for d in env_domains if d.strip()])
+
+        # 默认包含的问题域名
+        default_domains = ['bbci.co.uk', 'bbc.com']
+        for domain in default_domains:
+            if domain not in domains:
+                domains.append(domain)
+                logger.debug(f"默认添加问题域名: {domain}")
+
+        logger.info(f"配置使用requests的域名: {domains}")
+        return domains
 
+    def ingest(self, url: str, body: bytes, content_type: str = "") -> bool:
+        """
+        将已获取的图片内容(如浏览器渲染页面时加载的图片)加入图片库,
+        之后下载该 URL 时直接从图片库链接,不再发起请求
+
+        Args:
+            url: 图片 URL
+            body: 图片内容
+            content_type: 响应头中的 Content-Type
+
+        Returns:
+            是否加入了图片库(已存在、不是图片或过小时返回 False)
+        """
+        if self.store.contains(url):
+            return False
+
+        content_type, error = AsyncImageDownloader._check_image_header(
+            content_type.split(';')[0].strip().lower(), body[:SNIFF_BYTES]
+        )
+        if error or (self.filter and self.filter.too_small(body[:DIMENSION_SNIFF_BYTES], len(body))):
+            return False
+
+        tmp_path = self.store.new_temp_path()
+        tmp_path.write_bytes(body)
+        self.store.add(url, tmp_path, hashlib.sha256(body).hexdigest(), content_type,
+                       CONTENT_TYPE_EXTENSIONS.get(content_type, '.jpg'))
+        self.stats['captured'] += 1
+        return True
+
+    def get_stats(self) -> Dict:
+        """
+        获取图片下载统计信息
+
+        Returns:
+            统计信息字典,包含过滤器和图片库的统计(未启用时为 None)
+        """
+        return {
+            **self.stats,
+            'filter': self.filter.get_stats() if self.filter else None,
+            'store': self._store.get_stats() if self._store else None,
+            'transcode': self._transcoder.get_stats() if self._transcoder else None,
+            'hosts': self.host_policy.get_stats()
+        }
+
+    async def close(self):
+        """关闭共享会话并等待备用线程池中的下载结束"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+        if self._thread_pool is not None:
+            pool, self._thread_pool = self._thread_pool, None
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+        with self._requests_lock:
+            sessions, self._requests_sessions = self._requests_sessions, {}
+        for session in sessions.values():
+            session.close()
+        self.host_policy.save()
+
+        if self._transcoder is not None:
+            transcoder, self._transcoder = self._transcoder, None
+            logger.info(f"图片转码统计: {transcoder.get_stats()}")
+            await asyncio.get_running_loop().run_in_executor(None, transcoder.close)
+
+        if self._store is not None:
+            logger.info(f"图片库统计: {self._store.get_stats()}")
+            self._store.close()
+            self._store = None
+
+        logger.debug(f"图片下载服务已关闭 (请求 {self.stats['requests']} 次, 最大在途 {self.stats['max_in_flight']})")
+
+
+_service: Optional[ImageDownloadService] = None
+
+
+def get_image_download_service() -> ImageDownloadService:
+    """
+    获取进程内共享的图片下载服务
+
+    Returns:
+        ImageDownloadService 单例
+    """
+    global _service
+    if _service is None:
+        _service = ImageDownloadService()
+    return _service
+
+
+async def shutdown_image_download_service():
+    """关闭图片下载服务(爬虫结束时调用)"""
+    global _service
+    if _service is not None:
+        await _service.close()
+        _service = None
 
 
 class AsyncImageDownloader:
     """异步图片下载器"""
 
-    IMAGE_PATTERN = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+    IMAGE_PATTERN = IMAGE_PATTERN
 
-    def __init__(self, base_url: Optional[str] = None, concurrency: int = 5):
+    def __init__(self, base_url: Optional[str] = None, concurrency: int = 5,
+                 size_hints: Optional[Dict[str, SizeHint]] = None):
         """
         初始化异步图片下载器
 
         Args:
             base_url: 网页的基础 URL，用于解析相对路径图片
             concurrency: 并发下载数
+            size_hints: 网页 HTML 中声明的图片尺寸 {图片 URL: (宽, 高)}，用于下载前过滤
         """
         self.base_url = base_url
+        self.size_hints = size_hints or {}
         self.concurrency = concurrency
         self.semaphore = asyncio.Semaphore(concurrency)
 
@@ -62,21 +538,15 @@ class AsyncImageDownloader:
         self.max_size_mb = config.MAX_IMAGE_SIZE_MB
         self.max_size_bytes = self.max_size_mb * 1024 * 1024
 
-        # 超时时间（分离连接超时和总超时）
-        self.timeout = aiohttp.ClientTimeout(
-            total=config.IMAGE_DOWNLOAD_TIMEOUT,
-            connect=10,  # 连接超时10秒
-            sock_read=15  # 读取超时15秒
-        )
-
         # 下载缓存
         self._download_cache: Dict[str, ImageInfo] = {}
 
-        # 线程池用于requests备用下载
-        self._thread_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image_download")
-
-        # 配置的域名列表（强制使用requests）
-        self._force_requests_domains = self._load_domain_list()
+        # 会话、备用线程池、全局并发上限和图片库由进程级服务统一管理
+        self.service = get_image_download_service()
+        self.store = self.service.store
+        self.filter = self.service.filter
+        self.transcoder = self.service.transcoder
+        self.host_policy = self.service.host_policy
 
     def extract_image_urls(self, markdown_content: str) -> List[Tuple[str, str, str]]:
         """
@@ -90,30 +560,59 @@ class AsyncImageDownloader:
             - original_markdown_url: Markdown 中的原始 URL（用于替换）
             - resolved_url: 解析后的完整 URL（用于下载）
         """
-        matches = self.IMAGE_PATTERN.findall(markdown_content)
+        return self.service.extract_image_urls(markdown_content, self.base_url)
 
-        image_urls = []
-        for alt_text, url in matches:
-            url = url.strip()
-            alt_text = alt_text.strip()
+    async def download_image(self, url: str, save_dir: Path) -> ImageInfo:
+        """
+        异步下载单张图片(启用转码时返回转码后的文件)
 
-            if not url or url.startswith('data:'):
-                continue
+        Args:
+            url: 图片 URL
+            save_dir: 保存目录（绝对路径）
 
-            # 保存原始 URL（用于替换）
-            original_markdown_url = url
+        Returns:
+            ImageInfo 对象
+        """
+        # 检查缓存
+        if url in self._download_cache:
+            logger.debug(f"图片已存在缓存，跳过下载: {url}")
+            return self._download_cache[url]
 
-            if self.base_url and not url.startswith(('http://', 'https://')):
-                url = urljoin(self.base_url, url)
+        result = await self._fetch_image(url, save_dir)
+        if result.success:
+            if self.transcoder and result.blob:
+                result = await self._transcode(result, save_dir)
+            # 成功结果统一缓存(不可重试的失败由 _reject 缓存,可重试的失败不缓存)
+            self._download_cache[url] = result
+        return result
 
-            if url.startswith(('http://', 'https://')):
-                image_urls.append((alt_text, original_markdown_url, url))
+    async def _transcode(self, result: ImageInfo, save_dir: Path) -> ImageInfo:
+        """
+        转码已下载的图片,页面目录中改为链接转码结果
 
-        return image_urls
+        默认删除原图链接,但只删除本次下载新建的链接: 同一目录中已有的同名文件可能被其他页面引用。
 
-    async def download_image(self, url: str, save_dir: Path) -> ImageInfo:
+        Args:
+            result: 下载成功的 ImageInfo
+            save_dir: 页面的 images 目录
+
+        Returns:
+            指向转码结果的 ImageInfo,未转码时原样返回
+        """
+        derived = await self.transcoder.transcode(result.blob, self.store.new_temp_path())
+        if derived is None:
+            return result
+
+        original = save_dir / result.filename
+        file_path = self.store.link_into(derived, save_dir, f"{original.stem}{derived.suffix}")
+        if not config.IMAGE_KEEP_ORIGINAL and result.created:
+            original.unlink(missing_ok=True)
+
+        return ImageInfo(result.original_url, f"images/{file_path.name}", file_path.name, True, blob=derived)
+
+    async def _fetch_image(self, url: str, save_dir: Path) -> ImageInfo:
         """
-        异步下载单张图片
+        下载单张图片(已在图片库中的直接链接)
 
         Args:
             url: 图片 URL
@@ -122,116 +621,49 @@ class AsyncImageDownloader:
         Returns:
             ImageInfo 对象
         """
-        # 检查缓存
-        if url in self._download_cache:
-            logger.debug(f"图片已存在缓存，跳过下载: {url}")
-            return self._download_cache[url]
+        # 跟踪像素、占位图、图标等在发起请求前跳过
+        if self.filter:
+            reason = self.filter.check_url(url, self.size_hints.get(url))
+            if reason:
+                return self._reject(url, f"已过滤: {reason}")
+
+        # 图片库中已有该 URL(其他页面或之前的运行下载过),直接链接,不再下载
+        stored = self.store.lookup(url)
+        if stored:
+            blob, content_type = stored
+            file_path, created = self.store.link_or_reuse(blob, save_dir, self._generate_filename(url, content_type))
+            logger.debug(f"图片已在图片库中，跳过下载: {url}")
+            result = ImageInfo(url, f"images/{file_path.name}", file_path.name, True, blob=blob, created=created)
+            self._download_cache[url] = result
+            return result
 
-        async with self.semaphore:  # 限制并发
+        # 获取域名
+        domain = (urlparse(url).hostname or "").lower()
+
+        # 验证 URL 安全性(本地策略,直接拒绝,不回退 requests 也不计入域名学习)
+        if domain in ['localhost', '127.0.0.1', '0.0.0.0'] or \
+           domain.startswith('192.168.') or \
+           domain.startswith('10.') or \
+           domain.startswith('172.'):
+            logger.warning(f"⚠ 不允许下载内网资源: {url}")
+            return self._reject(url, f"不允许下载内网资源: {url}")
+
+        # 单页面并发 + 进程级全局/单域名并发上限
+        async with self.semaphore, self.service.limit(domain):
             try:
-                # 验证 URL 安全性
-                parsed = urlparse(url)
-                if parsed.hostname in ['localhost', '127.0.0.1', '0.0.0.0'] or \
-                   parsed.hostname.startswith('192.168.') or \
-                   parsed.hostname.startswith('10.') or \
-                   parsed.hostname.startswith('172.'):
-                    raise ValueError(f"不允许下载内网资源: {url}")
-
-                # 获取域名
-                domain = parsed.hostname.lower() if parsed.hostname else ""
-
-                # 检查是否应该使用requests
+                # 配置或运行中学习到需要 requests 的域名直接使用 requests
                 if self._should_use_requests(domain):
-                    logger.debug(f"域名 {domain} 配置使用requests下载: {url}")
+                    logger.debug(f"域名 {domain} 使用requests下载: {url}")
                     result = await self._download_with_requests_async(url, save_dir)
+                    self.host_policy.record_requests(domain, result.success)
                     return result
 
-                # 否则使用aiohttp
-
-                # 添加 User-Agent 和其他头部避免被阻止
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                }
-
-                # 使用aiohttp下载
-                connector = aiohttp.TCPConnector()
-                async with aiohttp.ClientSession(timeout=self.timeout, headers=headers, connector=connector) as session:
-                    # 尝试 HEAD 请求检查文件信息
-                    try:
-                        async with session.head(url, allow_redirects=True) as head_response:
-                            content_type = head_response.headers.get('Content-Type', '').lower()
-                            content_length = head_response.headers.get('Content-Length')
-
-                            # 如果 HEAD 请求返回非图片类型或403，尝试 GET 请求验证
-                            if (not content_type.startswith('image/') or
-                                head_response.status == 403 or
-                                head_response.status == 404):
-
-                                logger.debug(f"HEAD 请求失败或返回非图片类型，尝试 GET 请求验证: {url}")
-                                raise Exception("HEAD请求验证失败")
-                            else:
-                                # HEAD请求成功，检查文件大小
-                                if content_length and int(content_length) > self.max_size_bytes:
-                                    size_mb = int(content_length) / 1024 / 1024
-                                    logger.warning(f"⚠ 图片超过大小限制 ({size_mb:.1f}MB > {self.max_size_mb}MB): {url}")
-                                    return ImageInfo(url, "", "", False, f"文件过大: {size_mb:.1f}MB")
-
-                    except Exception as head_error:
-                        logger.debug(f"HEAD 请求失败，直接使用 GET 请求: {head_error}")
-
-                    # 使用 GET 请求下载图片
-                    logger.debug(f"使用 GET 请求下载图片: {url}")
-                    async with session.get(url, allow_redirects=True) as response:
-                        response.raise_for_status()
-
-                        # 验证响应的 Content-Type
-                        content_type = response.headers.get('Content-Type', '').lower()
-                        if content_type and not content_type.startswith('image/'):
-                            logger.warning(f"⚠ URL 不是图片类型 ({content_type}): {url}")
-                            return ImageInfo(url, "", "", False, f"非图片类型: {content_type}")
-
-                        # 检查文件大小
-                        content_length = response.headers.get('Content-Length')
-                        if content_length and int(content_length) > self.max_size_bytes:
-                            size_mb = int(content_length) / 1024 / 1024
-                            logger.warning(f"⚠ 图片超过大小限制 ({size_mb:.1f}MB > {self.max_size_mb}MB): {url}")
-                            return ImageInfo(url, "", "", False, f"文件过大: {size_mb:.1f}MB")
-
-                        # 生成文件名
-                        filename = self._generate_filename(url, content_type)
-
-                        # 确保保存目录存在
-                        save_dir.mkdir(parents=True, exist_ok=True)
-
-                        # 保存文件
-                        file_path = save_dir / filename
-
-                        # 处理文件名冲突
-                        counter = 1
-                        original_filename = filename
-                        while file_path.exists():
-                            name, ext = os.path.splitext(original_filename)
-                            filename = f"{name}-{counter}{ext}"
-                            file_path = save_dir / filename
-                            counter += 1
-
-                        # 流式写入
-                        with open(file_path, 'wb') as f:
-                            async for chunk in response.content.iter_chunked(8192):
-                                f.write(chunk)
-
-                        logger.info(f"✓ 图片已下载: {filename}")
-
-                        # 相对路径
-                        local_path = f"images/{filename}"
-
-                        # 创建结果对象
-                        result = ImageInfo(url, local_path, filename, True)
-
-                        # 缓存结果
-                        self._download_cache[url] = result
-
-                        return result
+                # 否则使用aiohttp（共享会话，单次流式 GET）
+                result = await self._download_with_aiohttp(url, save_dir)
+                if result.success:
+                    # 类型不符、过大、过小等拒绝与客户端无关,不清零回退计数
+                    self.host_policy.record_aiohttp_success(domain)
+                return result
 
             except Exception as e:
                 aiohttp_error_msg = f"aiohttp下载失败: {type(e).__name__}: {e}"
@@ -241,6 +673,8 @@ class AsyncImageDownloader:
                 logger.debug(f"尝试requests备用下载: {url}")
                 try:
                     result = await self._download_with_requests_async(url, save_dir)
+                    if isinstance(e, AIOHTTP_TRANSPORT_ERRORS):
+                        self.host_policy.record_fallback(domain, result.success)
                     return result
 
                 except Exception as requests_e:
@@ -249,6 +683,167 @@ class AsyncImageDownloader:
                     combined_error = f"{aiohttp_error_msg}; requests备用也失败: {type(requests_e).__name__}: {requests_e}"
                     return ImageInfo(url, "", "", False, combined_error)
 
+    async def _download_with_aiohttp(self, url: str, save_dir: Path) -> ImageInfo:
+        """
+        单次流式 GET 下载图片
+
+        首个数据块到达时校验 Content-Type 和文件头魔数,写入过程中超过大小上限立即中止,
+        内容先写入临时文件,完成后原子重命名。
+
+        Args:
+            url: 图片 URL
+            save_dir: 保存目录
+
+        Returns:
+            ImageInfo 对象
+        """
+        session = self.service.get_session()
+        async with session.get(url, allow_redirects=True) as response:
+            response.raise_for_status()
+
+            content_type = response.headers.get('Content-Type', '').lower()
+            error = self._check_content_length(response.headers.get('Content-Length'))
+            if error:
+                logger.warning(f"⚠ {error}: {url}")
+                return self._reject(url, error)
+
+            # 读取文件头用于识别格式
+            head = b""
+            while len(head) < SNIFF_BYTES:
+                chunk = await response.content.read(SNIFF_BYTES - len(head))
+                if not chunk:
+                    break
+                head += chunk
+
+            content_type, error = self._check_image_header(content_type, head)
+            if error:
+                logger.warning(f"⚠ URL {error}: {url}")
+                return self._reject(url, error)
+
+            writer = _ImageFileWriter(self.store.new_temp_path(), self.max_size_bytes)
+            try:
+                writer.write(head)
+                async for chunk in response.content.iter_chunked(IMAGE_CHUNK_SIZE):
+                    writer.write(chunk)
+                content_hash = writer.commit()
+            except ImageTooLargeError as e:
+                writer.abort()
+                logger.warning(f"⚠ {e}: {url}")
+                return self._reject(url, str(e))
+            except BaseException:
+                writer.abort()
+                raise
+
+        error = self._reject_small_image(writer)
+        if error:
+            logger.debug(f"{error}，已丢弃: {url}")
+            return self._reject(url, error)
+
+        blob, file_path, created = self._save_to_store(url, writer.tmp_path, content_hash, content_type, save_dir)
+        logger.info(f"✓ 图片已下载: {file_path.name}")
+
+        result = ImageInfo(url, f"images/{file_path.name}", file_path.name, True, blob=blob, created=created)
+        self._download_cache[url] = result
+        return result
+
+    def _reject(self, url: str, error: str) -> ImageInfo:
+        """
+        记录不可重试的失败(被过滤、过大、不是图片等),同一页面内不再重复下载
+
+        Args:
+            url: 图片 URL
+            error: 失败原因
+
+        Returns:
+            失败的 ImageInfo
+        """
+        result = ImageInfo(url, "", "", False, error)
+        self._download_cache[url] = result
+        return result
+
+    def _reject_small_image(self, writer: _ImageFileWriter) -> Optional[str]:
+        """
+        下载完成后丢弃字节数或尺寸低于阈值的图片(删除临时文件)
+
+        Args:
+            writer: 已完成写入的临时文件
+
+        Returns:
+            丢弃原因,保留时返回 None
+        """
+        if not self.filter:
+            return None
+
+        with open(writer.tmp_path, 'rb') as f:
+            head = f.read(DIMENSION_SNIFF_BYTES)
+
+        error = self.filter.check_downloaded(head, writer.size)
+        if error:
+            writer.tmp_path.unlink(missing_ok=True)
+        return error
+
+    def _save_to_store(self, url: str, tmp_path: Path, content_hash: str, content_type: str,
+                       save_dir: Path) -> Tuple[Path, Path, bool]:
+        """
+        将下载完成的临时文件加入图片库,并在页面目录中创建链接
+
+        Args:
+            url: 图片 URL
+            tmp_path: 临时文件路径
+            content_hash: 内容的 SHA-256
+            content_type: 图片类型
+            save_dir: 页面的 images 目录
+
+        Returns:
+            (图片库中的文件路径, 页面目录中的文件路径, 页面目录中的文件是否新建)
+        """
+        filename = self._generate_filename(url, content_type)
+        blob = self.store.add(url, tmp_path, content_hash, content_type, os.path.splitext(filename)[1])
+        return (blob, *self.store.link_or_reuse(blob, save_dir, filename))
+
+    def _check_content_length(self, content_length: Optional[str]) -> Optional[str]:
+        """
+        根据 Content-Length 提前拒绝过大的图片
+
+        Args:
+            content_length: 响应头中的 Content-Length
+
+        Returns:
+            错误信息,未超限返回 None
+        """
+        if content_length and content_length.isdigit() and int(content_length) > self.max_size_bytes:
+            size_mb = int(content_length) / 1024 / 1024
+            return f"文件过大: {size_mb:.1f}MB > {self.max_size_mb}MB"
+        return None
+
+    @staticmethod
+    def _check_image_header(content_type: str, head: bytes) -> Tuple[str, Optional[str]]:
+        """
+        校验响应是否为图片: Content-Type 或文件头魔数任一可确认即可,
+        但文件头是 HTML 时一律拒绝(常见于防盗链或错误页)
+
+        Args:
+            content_type: 响应头中的 Content-Type
+            head: 响应体开头的字节
+
+        Returns:
+            (实际图片类型, 错误信息),校验通过时错误信息为 None
+        """
+        sniffed = sniff_image_type(head)
+        if sniffed:
+            return sniffed, None
+
+        if not head:
+            return content_type, "内容为空"
+
+        if head.lstrip()[:15].lower().startswith((b'<!doctype html', b'<html')):
+            return content_type, "返回的是 HTML 页面"
+
+        if content_type.startswith('image/'):
+            return content_type, None
+
+        return content_type, f"非图片类型: {content_type or '未知'}"
+
     def _generate_filename(self, url: str, content_type: str) -> str:
         """生成安全的文件名（与同步版本相同）"""
         parsed = urlparse(url)
@@ -275,18 +870,7 @@ class AsyncImageDownloader:
 
     def _ext_from_content_type(self, content_type: str) -> str:
         """从 Content-Type 推断文件扩展名（与同步版本相同）"""
-        content_type = content_type.lower()
-
-        mapping = {
-            'image/jpeg': '.jpg',
-            'image/jpg': '.jpg',
-            'image/png': '.png',
-            'image/gif': '.gif',
-            'image/webp': '.webp',
-            'image/svg+xml': '.svg',
-        }
-
-        return mapping.get(content_type, '.jpg')
+        return CONTENT_TYPE_EXTENSIONS.get(content_type.lower(), '.jpg')
 
     async def _download_with_requests_async(self, url: str, save_dir: Path) -> ImageInfo:
         """
@@ -299,14 +883,8 @@ class AsyncImageDownloader:
         Returns:
             ImageInfo 对象
         """
-        loop = asyncio.get_event_loop()
         try:
-            result = await loop.run_in_executor(
-                self._thread_pool,
-                self._download_with_requests,
-                url,
-                save_dir
-            )
+            result = await self.service.run_in_pool(self._download_with_requests, url, save_dir)
 
             # 缓存结果
             if result.success:
@@ -319,32 +897,9 @@ class AsyncImageDownloader:
             logger.warning(f"⚠ {error_msg}: {url}")
             return ImageInfo(url, "", "", False, error_msg)
 
-    def _load_domain_list(self) -> List[str]:
-        """
-        加载需要强制使用requests的域名列表
-
-        Returns:
-            List[str]: 域名列表
-        """
-        domains = []
-
-        # 从环境变量加载
-        env_domains = os.getenv('FORCE_REQUESTS_DOMAINS', '').split(',')
-        domains.extend([d.strip() for d in env_domains if d.strip()])
-
-        # 默认包含的问题域名
-        default_domains = ['bbci.co.uk', 'bbc.com']
-        for domain in default_domains:
-            if domain not in domains:
-                domains.append(domain)
-                logger.debug(f"默认添加问题域名: {domain}")
-
-        logger.info(f"配置使用requests的域名: {domains}")
-        return domains
-
     def _should_use_requests(self, domain: str) -> bool:
         """
-        检查域名是否应该使用requests
+        检查域名是否应该使用requests(配置的域名或运行中学习到的域名)
 
         Args:
             domain: 域名
@@ -352,15 +907,7 @@ class AsyncImageDownloader:
         Returns:
             bool: 是否使用requests
         """
-        domain = domain.lower()
-
-        # 检查是否在强制列表中
-        for configured_domain in self._force_requests_domains:
-            if domain == configured_domain or domain.endswith('.' + configured_domain):
-                logger.debug(f"域名 {domain} 匹配配置，使用requests: {configured_domain}")
-                return True
-
-        return False
+        return self.host_policy.prefer_requests(domain.lower())
 
     def _download_with_requests(self, url: str, save_dir: Path) -> ImageInfo:
         """
@@ -374,69 +921,48 @@ class AsyncImageDownloader:
             ImageInfo 对象
         """
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-
-            # 使用requests下载
-            response = requests.get(url, headers=headers, timeout=15, stream=True)
-            response.raise_for_status()
-
-            # 检查Content-Type
-            content_type = response.headers.get('Content-Type', '').lower()
-            if not content_type.startswith('image/'):
-                error_msg = f"requests下载检测到非图片类型: {content_type}"
-                logger.warning(f"⚠ {error_msg}: {url}")
-                return ImageInfo(url, "", "", False, error_msg)
-
-            # 检查文件大小
-            content_length = response.headers.get('Content-Length')
-            if content_length and int(content_length) > self.max_size_bytes:
-                size_mb = int(content_length) / 1024 / 1024
-                error_msg = f"图片超过大小限制 ({size_mb:.1f}MB > {self.max_size_mb}MB)"
-                logger.warning(f"⚠ {error_msg}: {url}")
-                return ImageInfo(url, "", "", False, error_msg)
-
-            # 下载内容
-            content = response.content
-            if len(content) > self.max_size_bytes:
-                size_mb = len(content) / 1024 / 1024
-                error_msg = f"图片超过大小限制 ({size_mb:.1f}MB > {self.max_size_mb}MB)"
-                logger.warning(f"⚠ {error_msg}: {url}")
-                return ImageInfo(url, "", "", False, error_msg)
-
-            # 生成文件名
-            filename = self._generate_filename(url, content_type)
-
-            # 确保保存目录存在
-            save_dir.mkdir(parents=True, exist_ok=True)
-
-            # 保存文件
-            file_path = save_dir / filename
-
-            # 处理文件名冲突
-            counter = 1
-            original_filename = filename
-            while file_path.exists():
-                name, ext = os.path.splitext(original_filename)
-                filename = f"{name}-{counter}{ext}"
-                file_path = save_dir / filename
-                counter += 1
-
-            # 写入文件
-            with open(file_path, 'wb') as f:
-                f.write(content)
-
-            logger.info(f"✓ 图片已下载 (requests): {filename}")
-
-            # 相对路径
-            local_path = f"images/{filename}"
-
-            # 创建结果对象
-            result = ImageInfo(url, local_path, filename, True)
-
-            return result
-
+            # 使用该域名的 requests 会话下载(复用连接,单次流式 GET)
+            session = self.service.requests_session((urlparse(url).hostname or "").lower())
+            with session.get(url, timeout=15, stream=True) as response:
+                response.raise_for_status()
+
+                content_type = response.headers.get('Content-Type', '').lower()
+                error = self._check_content_length(response.headers.get('Content-Length'))
+                if error:
+                    logger.warning(f"⚠ {error}: {url}")
+                    return ImageInfo(url, "", "", False, error)
+
+                chunks = response.iter_content(chunk_size=IMAGE_CHUNK_SIZE)
+                head = next(chunks, b"")
+
+                content_type, error = self._check_image_header(content_type, head)
+                if error:
+                    logger.warning(f"⚠ requests下载{error}: {url}")
+                    return ImageInfo(url, "", "", False, error)
+
+                writer = _ImageFileWriter(self.store.new_temp_path(), self.max_size_bytes)
+                try:
+                    writer.write(head)
+                    for chunk in chunks:
+                        writer.write(chunk)
+                    content_hash = writer.commit()
+                except Exception:
+                    writer.abort()
+                    raise
+
+            error = self._reject_small_image(writer)
+            if error:
+                logger.debug(f"{error}，已丢弃: {url}")
+                return ImageInfo(url, "", "", False, error)
+
+            blob, file_path, created = self._save_to_store(url, writer.tmp_path, content_hash, content_type, save_dir)
+
+            logger.info(f"✓ 图片已下载 (requests): {file_path.name}")
+            return ImageInfo(url, f"images/{file_path.name}", file_path.name, True, blob=blob, created=created)
+
+        except ImageTooLargeError as e:
+            logger.warning(f"⚠ {e}: {url}")
+            return ImageInfo(url, "", "", False, str(e))
         except Exception as e:
             error_msg = f"requests下载失败: {type(e).__name__}: {e}"
             logger.warning(f"⚠ {error_msg}: {url}")
@@ -453,22 +979,46 @@ class AsyncImageDownloader:
             图片 URL 列表（原始 URL，用于去重和验证）
         """
         image_urls = []
-        matches = self.IMAGE_PATTERN.findall(content)
+        for _, url in self.IMAGE_PATTERN.findall(content):
+            # 处理相对路径（需要 base_url），只保留 http/https URL
+            url = resolve_image_url(url.strip(), self.base_url)
+            if url:
+                image_urls.append(url)
 
-        for _, url in matches:
-            url = url.strip()
-            if not url or url.startswith('data:'):
-                continue
+        return list(dict.fromkeys(image_urls))  # 去重并保持出现顺序
 
-            # 处理相对路径（需要 base_url）
-            if self.base_url and not url.startswith(('http://', 'https://')):
-                url = urljoin(self.base_url, url)
+    async def download_with_retries(self, image_urls: List[str], save_dir: Path,
+                                    retries: int = 0, retry_delay: float = 1.0) -> Dict[str, ImageInfo]:
+        """
+        下载一组图片,失败的图片按指数退避重试
 
-            # 只保留 http/https URL
-            if url.startswith(('http://', 'https://')):
-                image_urls.append(url)
+        已缓存的失败结果(被过滤、下载后因过小丢弃等)不会重试。
+
+        Args:
+            image_urls: 图片 URL 列表(已去重)
+            save_dir: 图片保存目录（绝对路径）
+            retries: 最大重试次数
+            retry_delay: 首次重试前的等待秒数,之后每次翻倍
+
+        Returns:
+            {图片 URL: ImageInfo}
+        """
+        results: Dict[str, ImageInfo] = {}
+        pending = list(image_urls)
+
+        for attempt in range(retries + 1):
+            if attempt:
+                logger.debug(f"第 {attempt} 次重试下载 {len(pending)} 张图片")
+                await asyncio.sleep(retry_delay * 2 ** (attempt - 1))
 
-        return list(set(image_urls))  # 去重
+            infos = await asyncio.gather(*(self.download_image(url, save_dir) for url in pending))
+            results.update(zip(pending, infos))
+            pending = [url for url, info in zip(pending, infos)
+                       if not info.success and url not in self._download_cache]
+            if not pending:
+                break
+
+        return results
 
     async def download_valid_images(self, content: str, image_urls: List[str], save_dir: Path) -> str:
         """
@@ -492,21 +1042,14 @@ class AsyncImageDownloader:
         tasks = [self.download_image(url, save_dir) for url in image_urls]
         download_results = await asyncio.gather(*tasks)
 
-        # 替换 Markdown 中的图片 URL
-        processed_content = content
-        success_count = 0
-
-        for original_url, image_info in zip(image_urls, download_results):
-            if image_info.success:
-                # 在内容中查找并替换所有匹配的 URL
-                for alt_text, markdown_url, resolved_url in self.extract_image_urls(processed_content):
-                    if resolved_url == original_url:
-                        # 使用原始 Markdown 中的 URL 进行替换
-                        old_pattern = f"![{alt_text}]({markdown_url})"
-                        new_pattern = f"![{alt_text}]({image_info.local_path})"
-                        processed_content = processed_content.replace(old_pattern, new_pattern)
-                        success_count += 1
-                        break  # 避免重复替换同一个 URL
+        # 一次遍历替换 Markdown 中所有已下载图片的 URL
+        local_paths = {
+            url: image_info.local_path
+            for url, image_info in zip(image_urls, download_results)
+            if image_info.success
+        }
+        processed_content, _ = rewrite_image_urls(content, local_paths, self.base_url)
+        success_count = len(local_paths)
 
         # 统计
         logger.info(f"✓ 有效图片异步下载完成: {success_count}/{len(image_urls)} 成功")
@@ -538,22 +1081,16 @@ class AsyncImageDownloader:
                 for _, _, resolved_url in image_urls]
         results_list = await asyncio.gather(*tasks)
 
-        # 组合结果（使用原始 Markdown URL）
-        results = [(alt_text, original_markdown_url, result)
-                   for (alt_text, original_markdown_url, _), result in zip(image_urls, results_list)]
-
-        # 替换 Markdown 中的图片 URL
-        processed_content = markdown_content
-
-        for alt_text, original_markdown_url, result in results:
-            if result.success:
-                # 使用原始 Markdown 中的 URL 进行替换
-                old_pattern = f"![{alt_text}]({original_markdown_url})"
-                new_pattern = f"![{alt_text}]({result.local_path})"
-                processed_content = processed_content.replace(old_pattern, new_pattern)
+        # 一次遍历替换 Markdown 中所有已下载图片的 URL
+        local_paths = {
+            resolved_url: result.local_path
+            for (_, _, resolved_url), result in zip(image_urls, results_list)
+            if result.success
+        }
+        processed_content, _ = rewrite_image_urls(markdown_content, local_paths, self.base_url)
 
         # 统计
-        success_count = sum(1 for _, _, r in results if r.success)
-        logger.info(f"✓ 图片下载完成: {success_count}/{len(results)} 成功")
+        success_count = sum(1 for r in results_list if r.success)
+        logger.info(f"✓ 图片下载完成: {success_count}/{len(results_list)} 成功")
 
         return processed_content
@@ -0,0 +1,243 @@
+"""
+图片过滤模块
+下载前按 URL 规则跳过跟踪像素、占位图、头像和分享图标等无用图片(不发起任何请求),
+下载后丢弃字节数或尺寸过小的图片
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from .config import config
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 常见的跟踪/广告域名(匹配域名本身及其子域名)
+TRACKER_HOSTS = (
+    'doubleclick.net', 'google-analytics.com', 'googletagmanager.com', 'googlesyndication.com',
+    'googleadservices.com', 'scorecardresearch.com', 'quantserve.com', 'pixel.wp.com',
+    'stats.wp.com', 'bat.bing.com', 'ads.linkedin.com', 'analytics.twitter.com',
+    'mc.yandex.ru', 'hotjar.com', 'chartbeat.net', 'omtrdc.net', 'demdex.net',
+    'adsrvr.org', 'amazon-adsystem.com', 'outbrain.com', 'taboola.com',
+    'feeds.feedburner.com', 'gravatar.com',
+)
+
+# 按路径判断的无用图片
+SKIP_URL_PATTERNS = [
+    # 跟踪像素和占位图: /pixel.gif、/spacer.png、/1x1.gif
+    re.compile(r'/(?:pixel|spacer|blank|clear|transparent|1x1|tracking|beacon|t)\.(?:gif|png)$'),
+    # 跟踪、精灵图、头像、表情目录
+    re.compile(r'/(?:pixel|tracking|beacon|sprites?|avatars?|emoji)/'),
+    # 精灵图文件
+    re.compile(r'sprite[^/]*\.(?:png|gif|svg)$'),
+    # 分享/社交按钮图标
+    re.compile(r'(?:share|social)[-_]?(?:icon|button|btn)'),
+]
+
+# 文件名中的尺寸,如 logo-150x150.png
+# (不使用 ?w=/?h= 等查询参数: 它们通常是 CDN 的缩放请求,不代表原图尺寸)
+PATH_SIZE_PATTERN = re.compile(r'[-_/](\d{1,4})x(\d{1,4})(?=\.[a-z]+$|/)')
+
+# HTML <img> 标签及其属性
+IMG_TAG_PATTERN = re.compile(r'<img\b[^>]*>', re.I)
+IMG_ATTR_PATTERN = re.compile(r'\b(src|width|height)\s*=\s*["\']?([^"\'\s>]+)', re.I)
+
+# 下载后读取尺寸时最多读取的字节数(JPEG 的尺寸信息可能在 EXIF 之后)
+DIMENSION_SNIFF_BYTES = 64 * 1024
+
+# JPEG 中携带尺寸的 SOF 段
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+SizeHint = Tuple[Optional[int], Optional[int]]
+
+
+def _to_int(value) -> Optional[int]:
+    """解析尺寸数值,非纯数字(如百分比)返回 None"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    从图片文件头读取宽高(支持 PNG、GIF、WebP、JPEG)
+
+    Args:
+        data: 图片开头的字节
+
+    Returns:
+        (宽, 高),无法识别时返回 None
+    """
+    if data.startswith(b'\x89PNG\r\n\x1a\n') and data[12:16] == b'IHDR' and len(data) >= 24:
+        return int.from_bytes(data[16:20], 'big'), int.from_bytes(data[20:24], 'big')
+
+    if data[:6] in (b'GIF87a', b'GIF89a') and len(data) >= 10:
+        return int.from_bytes(data[6:8], 'little'), int.from_bytes(data[8:10], 'little')
+
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP' and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b'VP8X':
+            return 1 + int.from_bytes(data[24:27], 'little'), 1 + int.from_bytes(data[27:30], 'little')
+        if chunk == b'VP8L':
+            bits = int.from_bytes(data[21:25], 'little')
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b'VP8 ':
+            return int.from_bytes(data[26:28], 'little') & 0x3FFF, int.from_bytes(data[28:30], 'little') & 0x3FFF
+        return None
+
+    if data.startswith(b'\xff\xd8'):
+        i = 2
+        while i + 9 <= len(data):
+            if data[i] != 0xFF:
+                return None
+            marker = data[i + 1]
+            if marker in JPEG_SOF_MARKERS:
+                return int.from_bytes(data[i + 7:i + 9], 'big'), int.from_bytes(data[i + 5:i + 7], 'big')
+            i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+
+    return None
+
+
+def extract_image_size_hints(html: str, base_url: str) -> Dict[str, SizeHint]:
+    """
+    从 HTML 的 <img> 标签中提取 width/height 属性
+
+    Args:
+        html: 网页 HTML
+        base_url: 网页 URL,用于解析相对路径
+
+    Returns:
+        {图片完整 URL: (宽, 高)},只包含至少声明了一个数值尺寸的图片
+    """
+    hints: Dict[str, SizeHint] = {}
+    for tag in IMG_TAG_PATTERN.findall(html):
+        attrs = {name.lower(): value for name, value in IMG_ATTR_PATTERN.findall(tag)}
+        src = attrs.get('src')
+        if not src or src.startswith('data:'):
+            continue
+        width, height = _to_int(attrs.get('width')), _to_int(attrs.get('height'))
+        if width is not None or height is not None:
+            hints[urljoin(base_url, src)] = (width, height)
+    return hints
+
+
+class ImageFilter:
+    """图片过滤器(所有页面共享,统计跳过的请求和丢弃的字节)"""
+
+    def __init__(self, min_dimension: int = None, min_bytes: int = None, denylist: List[str] = None):
+        """
+        初始化图片过滤器
+
+        Args:
+            min_dimension: 宽或高小于该像素数的图片视为图标/像素,默认使用配置中的值
+            min_bytes: 小于该字节数的图片下载后丢弃,默认使用配置中的值
+            denylist: 不下载图片的域名列表,默认使用配置中的值
+        """
+        self.min_dimension = config.IMAGE_MIN_DIMENSION if min_dimension is None else min_dimension
+        self.min_bytes = config.IMAGE_MIN_BYTES if min_bytes is None else min_bytes
+        if denylist is None:
+            denylist = [d.strip().lower() for d in config.IMAGE_DENYLIST_DOMAINS.split(',') if d.strip()]
+        self.denylist = denylist
+
+        self.stats = {
+            'skipped': 0,         # 下载前跳过的请求数
+            'reasons': {},        # 按原因统计跳过次数
+            'dropped': 0,         # 下载后因过小丢弃的图片数
+            'dropped_bytes': 0    # 丢弃图片的字节数(已下载,只是未写入磁盘)
+        }
+
+    @staticmethod
+    def _host_matches(host: str, domains) -> bool:
+        """域名本身或其子域名是否在列表中"""
+        return any(host == domain or host.endswith('.' + domain) for domain in domains)
+
+    @staticmethod
+    def _size_hint(parsed, hint: Optional[SizeHint]) -> SizeHint:
+        """合并 HTML 属性和文件名中的尺寸提示"""
+        width, height = hint or (None, None)
+
+        if width is None and height is None:
+            match = PATH_SIZE_PATTERN.search(parsed.path.lower())
+            if match:
+                width, height = int(match.group(1)), int(match.group(2))
+
+        return width, height
+
+    def check_url(self, url: str, hint: Optional[SizeHint] = None) -> Optional[str]:
+        """
+        下载前检查图片是否应跳过
+
+        Args:
+            url: 图片完整 URL
+            hint: HTML 中声明的 (宽, 高)
+
+        Returns:
+            跳过原因,不跳过时返回 None
+        """
+        parsed = urlparse(url)
+        host = (parsed.hostname or '').lower()
+
+        reason = None
+        if self._host_matches(host, self.denylist):
+            reason = 'denylist'
+        elif self._host_matches(host, TRACKER_HOSTS):
+            reason = 'tracker'
+        elif any(pattern.search(parsed.path.lower()) for pattern in SKIP_URL_PATTERNS):
+            reason = 'pattern'
+        else:
+            width, height = self._size_hint(parsed, hint)
+            if any(size is not None and size < self.min_dimension for size in (width, height)):
+                reason = 'size_hint'
+
+        if reason:
+            self.stats['skipped'] += 1
+            self.stats['reasons'][reason] = self.stats['reasons'].get(reason, 0) + 1
+            logger.debug(f"跳过图片({reason}): {url}")
+        return reason
+
+    def too_small(self, head: bytes, size: int) -> Optional[str]:
+        """
+        判断图片字节数或尺寸是否低于阈值(不计入统计)
+
+        Args:
+            head: 图片开头的字节(最多 DIMENSION_SNIFF_BYTES)
+            size: 图片总字节数
+
+        Returns:
+            过小的原因,不过小时返回 None
+        """
+        if size < self.min_bytes:
+            return f"图片过小: {size} 字节"
+
+        dimensions = image_dimensions(head)
+        if dimensions and min(dimensions) < self.min_dimension:
+            return f"图片尺寸过小: {dimensions[0]}x{dimensions[1]}"
+        return None
+
+    def check_downloaded(self, head: bytes, size: int) -> Optional[str]:
+        """
+        下载后检查图片是否过小
+
+        Args:
+            head: 图片开头的字节(最多 DIMENSION_SNIFF_BYTES)
+            size: 图片总字节数
+
+        Returns:
+            丢弃原因,保留时返回 None
+        """
+        reason = self.too_small(head, size)
+        if reason:
+            self.stats['dropped'] += 1
+            self.stats['dropped_bytes'] += size
+        return reason
+
+    def get_stats(self) -> Dict:
+        """
+        获取过滤统计信息
+
+        Returns:
+            统计信息字典
+        """
+        return {**self.stats, 'reasons': dict(self.stats['reasons'])}
@@ -0,0 +1,165 @@
+"""
+图片域名下载策略模块
+记录每个图片域名 aiohttp 与 requests 的下载结果,aiohttp 屡次失败而 requests 成功的域名
+之后直接使用 requests,避免每张图片都先失败一次;学习结果持久化到 JSON 文件,跨运行复用
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from .config import config
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 改用 requests 后连续失败该次数,放弃学习结果,重新尝试 aiohttp
+REQUESTS_FAILURE_RESET = 3
+
+
+class HostClientPolicy:
+    """按域名选择图片下载客户端"""
+
+    def __init__(self, static_domains: List[str] = None, path: str = None,
+                 threshold: int = None, ttl_days: int = None):
+        """
+        初始化域名下载策略
+
+        Args:
+            static_domains: 配置中强制使用 requests 的域名(含子域名)
+            path: 学习结果文件路径,默认使用配置中的值
+            threshold: aiohttp 失败且 requests 成功多少次后改用 requests,默认使用配置中的值
+            ttl_days: 学习结果的有效天数,过期后重新尝试 aiohttp,默认使用配置中的值
+        """
+        self.static_domains = static_domains or []
+        self.path = Path(path or config.IMAGE_HOST_POLICY_FILE)
+        self.threshold = threshold or config.IMAGE_FALLBACK_LEARN_THRESHOLD
+        self.ttl = (ttl_days or config.IMAGE_HOST_POLICY_TTL_DAYS) * 24 * 3600
+
+        # {域名: {'client': 'aiohttp'|'requests', 'fallback_wins': int, 'requests_failures': int, 'updated_at': float}}
+        self.hosts: Dict[str, Dict] = {}
+        self._dirty = False
+        self._load()
+
+        self.stats = {
+            'learned': 0,          # 本次运行新学习到需要 requests 的域名数
+            'routed': 0,           # 直接使用 requests 的下载次数(省去一次失败的 aiohttp 尝试)
+            'fallbacks': 0         # aiohttp 失败后改用 requests 的次数
+        }
+
+    def _load(self):
+        """加载学习结果(丢弃过期条目)"""
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取图片域名策略失败,将重新学习: {e}")
+            return
+
+        now = time.time()
+        self.hosts = {
+            host: entry for host, entry in data.items()
+            if now - entry.get('updated_at', 0) < self.ttl
+        }
+        learned = sum(1 for entry in self.hosts.values() if entry.get('client') == 'requests')
+        if learned:
+            logger.info(f"已加载图片域名策略: {learned} 个域名使用 requests")
+
+    def save(self):
+        """保存学习结果(先写临时文件再原子替换)"""
+        if not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+            tmp_path.write_text(json.dumps(self.hosts, ensure_ascii=False, indent=2), encoding='utf-8')
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"保存图片域名策略失败: {e}")
+
+    def _entry(self, host: str) -> Dict:
+        """获取(必要时创建)域名记录"""
+        entry = self.hosts.setdefault(
+            host, {'client': 'aiohttp', 'fallback_wins': 0, 'requests_failures': 0, 'updated_at': 0}
+        )
+        entry['updated_at'] = time.time()
+        self._dirty = True
+        return entry
+
+    def prefer_requests(self, host: str) -> bool:
+        """
+        该域名是否应直接使用 requests
+
+        Args:
+            host: 图片域名(小写)
+
+        Returns:
+            配置中指定或运行中学习到需要 requests 时返回 True
+        """
+        if any(host == domain or host.endswith('.' + domain) for domain in self.static_domains):
+            return True
+        entry = self.hosts.get(host)
+        return entry is not None and entry['client'] == 'requests'
+
+    def record_aiohttp_success(self, host: str):
+        """aiohttp 下载正常完成: 清零该域名的回退计数"""
+        entry = self.hosts.get(host)
+        if entry and entry['fallback_wins']:
+            entry['fallback_wins'] = 0
+            self._dirty = True
+
+    def record_fallback(self, host: str, requests_ok: bool):
+        """
+        aiohttp 失败后使用 requests 重试的结果
+
+        Args:
+            host: 图片域名
+            requests_ok: requests 是否下载成功
+        """
+        self.stats['fallbacks'] += 1
+        if not requests_ok:
+            # 两种客户端都失败,说明是图片本身的问题,不据此学习
+            return
+
+        entry = self._entry(host)
+        entry['fallback_wins'] += 1
+        if entry['client'] != 'requests' and entry['fallback_wins'] >= self.threshold:
+            entry['client'] = 'requests'
+            entry['requests_failures'] = 0
+            self.stats['learned'] += 1
+            logger.info(f"图片域名 {host} 的 aiohttp 下载屡次失败，之后直接使用 requests")
+
+    def record_requests(self, host: str, ok: bool):
+        """
+        直接使用 requests 下载的结果(学习到的域名连续失败时恢复 aiohttp)
+
+        Args:
+            host: 图片域名
+            ok: 是否下载成功
+        """
+        self.stats['routed'] += 1
+        entry = self.hosts.get(host)
+        if entry is None or entry['client'] != 'requests':
+            return
+
+        entry['requests_failures'] = 0 if ok else entry['requests_failures'] + 1
+        self._dirty = True
+        if entry['requests_failures'] >= REQUESTS_FAILURE_RESET:
+            del self.hosts[host]
+            logger.info(f"图片域名 {host} 使用 requests 连续失败，恢复使用 aiohttp")
+
+    def get_stats(self) -> Dict:
+        """
+        获取策略统计信息
+
+        Returns:
+            统计信息字典
+        """
+        return {
+            **self.stats,
+            'requests_hosts': sum(1 for entry in self.hosts.values() if entry['client'] == 'requests')
+        }
@@ -0,0 +1,175 @@
+"""
+后台图片下载队列模块
+页面先以原始图片链接写入文件,图片交给后台工作协程下载(失败重试),
+下载完成后再把本地路径回填到 Markdown 文件中
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .config import config
+from .image_downloader import AsyncImageDownloader, rewrite_image_urls
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class ImageJob:
+    """一个页面的图片下载任务"""
+    file_path: Path           # 已写入的 Markdown 文件
+    page_url: str             # 网页 URL(解析相对路径图片)
+    image_urls: List[str]     # 需要下载的图片 URL(已去重)
+    images_dir: Path          # 图片保存目录
+    size_hints: Dict = field(default_factory=dict)  # HTML 中声明的图片尺寸
+
+
+class ImageDownloadQueue:
+    """后台图片下载队列(固定数量的工作协程,队列为空前不阻塞页面保存)"""
+
+    def __init__(self, workers: int = None, retries: int = None, retry_delay: float = None):
+        """
+        初始化后台图片下载队列
+
+        Args:
+            workers: 工作协程数,默认使用配置中的值
+            retries: 单张图片最大重试次数,默认使用配置中的值
+            retry_delay: 首次重试前的等待秒数,默认使用配置中的值
+        """
+        self.workers = workers or config.IMAGE_QUEUE_WORKERS
+        self.retries = config.IMAGE_DOWNLOAD_RETRIES if retries is None else retries
+        self.retry_delay = config.IMAGE_RETRY_DELAY if retry_delay is None else retry_delay
+
+        # 与事件循环绑定,首次提交任务时创建
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        self.stats = {
+            'pages': 0,           # 提交的页面数
+            'completed': 0,       # 处理完成的页面数
+            'images': 0,          # 提交的图片数
+            'downloaded': 0,      # 下载成功的图片数
+            'patched': 0          # 回填了本地路径的页面数
+        }
+
+    def submit(self, job: ImageJob):
+        """
+        提交一个页面的图片下载任务(立即返回)
+
+        Args:
+            job: 图片下载任务
+        """
+        if not job.image_urls:
+            return
+
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._tasks = [
+                asyncio.create_task(self._worker(), name=f"image-queue-{i}")
+                for i in range(self.workers)
+            ]
+            logger.debug(f"后台图片下载队列已启动 ({self.workers} 个工作协程)")
+
+        self.stats['pages'] += 1
+        self.stats['images'] += len(job.image_urls)
+        self._queue.put_nowait(job)
+
+    async def _worker(self):
+        """工作协程: 依次处理队列中的页面"""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.warning(f"⚠ 后台图片下载失败: {job.file_path.name} - {e}")
+            finally:
+                self._queue.task_done()
+            self.stats['completed'] += 1
+
+    async def _process(self, job: ImageJob):
+        """
+        下载一个页面的图片并回填 Markdown
+
+        Args:
+            job: 图片下载任务
+        """
+        downloader = AsyncImageDownloader(base_url=job.page_url, size_hints=job.size_hints)
+        results = await downloader.download_with_retries(
+            job.image_urls, job.images_dir, retries=self.retries, retry_delay=self.retry_delay
+        )
+
+        local_paths = {url: info.local_path for url, info in results.items() if info.success}
+        self.stats['downloaded'] += len(local_paths)
+        logger.info(f"✓ 后台图片下载完成: {job.file_path.name} ({len(local_paths)}/{len(job.image_urls)} 成功)")
+
+        if local_paths:
+            self._patch(job, local_paths)
+
+    def _patch(self, job: ImageJob, local_paths: Dict[str, str]):
+        """
+        将本地图片路径回填到 Markdown 文件(先写临时文件再原子替换)
+
+        读取到替换之间没有 await,同一文件的多次回填不会互相覆盖。
+
+        Args:
+            job: 图片下载任务
+            local_paths: {图片 URL: 本地相对路径}
+        """
+        content = job.file_path.read_text(encoding='utf-8')
+        content, replaced = rewrite_image_urls(content, local_paths, job.page_url)
+        if not replaced:
+            return
+
+        tmp_path = job.file_path.with_name(f".{job.file_path.name}.tmp")
+        tmp_path.write_text(content, encoding='utf-8')
+        os.replace(tmp_path, job.file_path)
+        self.stats['patched'] += 1
+
+    async def drain(self, timeout: float = None) -> bool:
+        """
+        等待队列中的任务全部完成,超过期限后放弃剩余任务
+
+        Args:
+            timeout: 最长等待秒数,默认使用配置中的值
+
+        Returns:
+            是否全部完成(未完成的页面保留原始图片链接)
+        """
+        if self._queue is None:
+            return True
+
+        timeout = config.IMAGE_QUEUE_DRAIN_TIMEOUT if timeout is None else timeout
+        pending = self.stats['pages'] - self.stats['completed']
+        if pending:
+            logger.info(f"等待后台图片下载完成 ({pending} 个页面, 最长 {timeout} 秒)...")
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            drained = True
+        except asyncio.TimeoutError:
+            remaining = self.stats['pages'] - self.stats['completed']
+            logger.warning(f"⚠ 后台图片下载未在 {timeout} 秒内完成, {remaining} 个页面保留原始图片链接")
+            drained = False
+
+        await self.close()
+        return drained
+
+    async def close(self):
+        """停止工作协程(未完成的任务直接放弃)"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+
+    def get_stats(self) -> Dict:
+        """
+        获取队列统计信息
+
+        Returns:
+            统计信息字典
+        """
+        return dict(self.stats)
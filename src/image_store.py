@@ -0,0 +1,243 @@
+"""
+全局图片库模块
+按内容哈希保存图片(同一内容只存一份),并维护 URL → 内容的索引,跨页面、跨运行复用已下载的图片
+
+目录结构:
+- blobs/ab/<sha256>.<ext>  图片内容
+- tmp/                     下载中的临时文件(与 blobs 同一文件系统,可原子重命名;崩溃或取消后的残留在下次打开时清理)
+- index.db                 URL 哈希 → 内容哈希索引(SQLite)
+
+页面目录下的 images/ 文件是指向 blobs 的硬链接(跨文件系统时退化为相对符号链接或复制)。
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config import config
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 超过该时长未修改的临时文件视为进程崩溃或下载取消后的残留
+# (远长于单张图片的下载和转码时间,不会误删其他进程正在写入的文件)
+STALE_TEMP_SECONDS = 3600
+
+
+class ImageStore:
+    """内容寻址的全局图片库"""
+
+    def __init__(self, root: str = None):
+        """
+        初始化图片库
+
+        Args:
+            root: 图片库根目录,默认使用配置中的值
+        """
+        self.root = Path(root or config.IMAGE_STORE_DIR)
+        self.blobs_dir = self.root / "blobs"
+        self.tmp_dir = self.root / "tmp"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._remove_stale_temps()
+
+        # 下载线程池中的 requests 备用下载也会写索引
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            "url_hash TEXT PRIMARY KEY, url TEXT NOT NULL, content_hash TEXT NOT NULL, "
+            "content_type TEXT NOT NULL, ext TEXT NOT NULL, size INTEGER NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.db.commit()
+
+        self.stats = {
+            'url_hits': 0,       # URL 已在库中,跳过下载
+            'downloads': 0,      # 新下载入库
+            'content_dedup': 0,  # 不同 URL 下载到相同内容
+            'bytes_saved': 0     # 跳过下载节省的字节数
+        }
+
+        logger.info(f"图片库已初始化: {self.root}")
+
+    def _remove_stale_temps(self):
+        """删除 tmp/ 中超过 STALE_TEMP_SECONDS 未修改的残留临时文件"""
+        cutoff = time.time() - STALE_TEMP_SECONDS
+        removed = 0
+        for path in self.tmp_dir.iterdir():
+            try:
+                if path.is_file() and path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                # 其他进程同时完成或清理了该文件
+                continue
+        if removed:
+            logger.info(f"已清理图片库中 {removed} 个残留临时文件")
+
+    @staticmethod
+    def url_hash(url: str) -> str:
+        """URL 哈希"""
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _blob_path(self, content_hash: str, ext: str) -> Path:
+        """内容哈希对应的文件路径"""
+        return self.blobs_dir / content_hash[:2] / f"{content_hash}{ext}"
+
+    def lookup(self, url: str) -> Optional[Tuple[Path, str]]:
+        """
+        查询 URL 是否已下载过
+
+        Args:
+            url: 图片 URL
+
+        Returns:
+            (图片文件路径, Content-Type),未下载过或文件已丢失时返回 None
+        """
+        with self._lock:
+            row = self.db.execute(
+                "SELECT content_hash, content_type, ext, size FROM urls WHERE url_hash = ?",
+                (self.url_hash(url),)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        content_hash, content_type, ext, size = row
+        blob = self._blob_path(content_hash, ext)
+        if not blob.exists():
+            with self._lock:
+                self.db.execute("DELETE FROM urls WHERE url_hash = ?", (self.url_hash(url),))
+                self.db.commit()
+            return None
+
+        self.stats['url_hits'] += 1
+        self.stats['bytes_saved'] += size
+        return blob, content_type
+
+    def contains(self, url: str) -> bool:
+        """
+        URL 是否已在索引中(不计入统计,不检查文件是否存在)
+
+        Args:
+            url: 图片 URL
+
+        Returns:
+            是否已下载过
+        """
+        with self._lock:
+            row = self.db.execute("SELECT 1 FROM urls WHERE url_hash = ?", (self.url_hash(url),)).fetchone()
+        return row is not None
+
+    def new_temp_path(self) -> Path:
+        """分配一个下载用的临时文件路径(与 blobs 同一文件系统)"""
+        return self.tmp_dir / f"{os.getpid()}-{threading.get_ident()}-{time.monotonic_ns()}.tmp"
+
+    def add(self, url: str, tmp_path: Path, content_hash: str, content_type: str, ext: str) -> Path:
+        """
+        将下载完成的临时文件加入图片库
+
+        Args:
+            url: 图片 URL
+            tmp_path: 临时文件路径
+            content_hash: 内容的 SHA-256
+            content_type: 图片类型
+            ext: 文件扩展名(含点)
+
+        Returns:
+            图片库中的文件路径
+        """
+        blob = self._blob_path(content_hash, ext)
+        size = tmp_path.stat().st_size
+
+        if blob.exists():
+            # 相同内容已在库中(如同一 logo 的不同 URL),丢弃新下载的副本
+            tmp_path.unlink()
+            self.stats['content_dedup'] += 1
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, blob)
+
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO urls (url_hash, url, content_hash, content_type, ext, size, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.url_hash(url), url, content_hash, content_type, ext, size, time.time())
+            )
+            self.db.commit()
+
+        self.stats['downloads'] += 1
+        return blob
+
+    @staticmethod
+    def link_into(blob: Path, save_dir: Path, filename: str) -> Path:
+        """
+        在页面目录中创建指向图片库文件的链接
+
+        优先硬链接;跨文件系统时使用相对符号链接;都不支持时复制。
+
+        Args:
+            blob: 图片库中的文件路径
+            save_dir: 页面的 images 目录
+            filename: 期望的文件名
+
+        Returns:
+            页面目录中的文件路径
+        """
+        return ImageStore.link_or_reuse(blob, save_dir, filename)[0]
+
+    @staticmethod
+    def link_or_reuse(blob: Path, save_dir: Path, filename: str) -> Tuple[Path, bool]:
+        """
+        同 link_into,并返回文件是否由本次调用创建
+
+        Args:
+            blob: 图片库中的文件路径
+            save_dir: 页面的 images 目录
+            filename: 期望的文件名
+
+        Returns:
+            (页面目录中的文件路径, 是否新建);复用同目录已有的同内容文件时为 False
+        """
+        save_dir.mkdir(parents=True, exist_ok=True)
+
+        # 同名文件已指向同一内容时直接复用,不同内容时追加序号
+        target = save_dir / filename
+        counter = 1
+        while target.exists() or target.is_symlink():
+            if target.exists() and os.path.samefile(target, blob):
+                return target, False
+            name, ext = os.path.splitext(filename)
+            target = save_dir / f"{name}-{counter}{ext}"
+            counter += 1
+
+        try:
+            os.link(blob, target)
+        except OSError:
+            try:
+                os.symlink(os.path.relpath(blob, save_dir), target)
+            except OSError:
+                shutil.copy2(blob, target)
+
+        return target, True
+
+    def get_stats(self) -> Dict:
+        """
+        获取图片库统计信息
+
+        Returns:
+            统计信息字典
+        """
+        return dict(self.stats)
+
+    def close(self):
+        """关闭索引数据库"""
+        with self._lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,157 @@
+"""
+图片转码模块
+下载完成的图片在进程池中用 Pillow 缩放到最大边长、去除元数据并转为 WebP,
+转码结果保存在图片库中(与原图同目录),跨页面、跨运行复用
+
+Pillow 为可选依赖,未安装时转码自动禁用。
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from .config import config
+from .utils import setup_logger
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 未安装
+    Image = ImageOps = None
+
+logger = setup_logger(__name__)
+
+# 参与转码的原图格式(SVG 为矢量图,ICO 通常很小,不转码)
+TRANSCODE_SUFFIXES = {'.png', '.jpg', '.jpeg', '.bmp', '.webp', '.gif'}
+
+
+def transcode_image(src: str, dst: str, max_dimension: int, quality: int) -> bool:
+    """
+    缩放并转为 WebP(在子进程中执行)
+
+    Args:
+        src: 原图路径
+        dst: 输出路径
+        max_dimension: 最大边长(像素)
+        quality: WebP 质量(1-100)
+
+    Returns:
+        是否生成了输出文件(动图跳过)
+    """
+    with Image.open(src) as image:
+        if getattr(image, 'is_animated', False):
+            return False
+
+        # 先按 EXIF 方向旋转,再丢弃所有元数据(保存时不传 exif/icc_profile)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+
+        image.save(dst, format='WEBP', quality=quality, method=4)
+    return True
+
+
+class ImageTranscoder:
+    """进程池图片转码器"""
+
+    def __init__(self, max_dimension: int = None, quality: int = None, workers: int = None):
+        """
+        初始化图片转码器
+
+        Args:
+            max_dimension: 最大边长,默认使用配置中的值
+            quality: WebP 质量,默认使用配置中的值
+            workers: 转码进程数,默认使用配置中的值
+        """
+        self.max_dimension = max_dimension or config.IMAGE_MAX_DIMENSION
+        self.quality = quality or config.IMAGE_WEBP_QUALITY
+        self.workers = workers or config.IMAGE_TRANSCODE_WORKERS
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # 已计入统计的转码结果(其他页面复用同一结果时不重复计入)
+        self._counted: Set[Path] = set()
+
+        self.stats = {
+            'images': 0,         # 本次运行新转码的图片数
+            'transcoded': 0,     # 使用转码结果的图片数
+            'failed': 0,         # 转码失败(保留原图)
+            'bytes_before': 0,   # 原图总字节数
+            'bytes_after': 0     # 最终使用的文件总字节数
+        }
+
+    @staticmethod
+    def available() -> bool:
+        """是否已安装 Pillow"""
+        return Image is not None
+
+    def _output_path(self, blob: Path) -> Path:
+        """转码结果路径(与原图同目录,文件名包含转码参数)"""
+        return blob.with_name(f"{blob.stem}.w{self.max_dimension}q{self.quality}.webp")
+
+    async def transcode(self, blob: Path, tmp_path: Path) -> Optional[Path]:
+        """
+        转码一张图片(已转码过的直接复用)
+
+        Args:
+            blob: 图片库中的原图
+            tmp_path: 转码输出使用的临时文件路径
+
+        Returns:
+            转码结果路径,不适合转码、转码失败或结果不比原图小时返回 None
+        """
+        if blob.suffix.lower() not in TRANSCODE_SUFFIXES:
+            return None
+
+        size_before = blob.stat().st_size
+        target = self._output_path(blob)
+
+        reused = target.exists()
+        if not reused:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            try:
+                written = await asyncio.get_running_loop().run_in_executor(
+                    self._pool, transcode_image, str(blob), str(tmp_path), self.max_dimension, self.quality
+                )
+            except Exception as e:
+                tmp_path.unlink(missing_ok=True)
+                logger.warning(f"⚠ 图片转码失败: {blob.name} - {type(e).__name__}: {e}")
+                self.stats['failed'] += 1
+                return None
+
+            if not written:
+                return None
+            os.replace(tmp_path, target)
+
+        size_after = target.stat().st_size
+        # 转码后反而更大(如已压缩过的小图)时保留原图
+        smaller = size_after < size_before
+
+        # 每个转码结果只在首次生成时计入统计(复用已有结果不重复计入)
+        if not reused and target not in self._counted:
+            self._counted.add(target)
+            self.stats['images'] += 1
+            self.stats['bytes_before'] += size_before
+            self.stats['bytes_after'] += size_after if smaller else size_before
+            if smaller:
+                self.stats['transcoded'] += 1
+
+        return target if smaller else None
+
+    def get_stats(self) -> Dict:
+        """
+        获取转码统计信息
+
+        Returns:
+            统计信息字典
+        """
+        return dict(self.stats)
+
+    def close(self):
+        """关闭转码进程池"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
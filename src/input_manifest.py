@@ -0,0 +1,142 @@
+"""
+输入文件清单模块
+记录每个输入文件中各行(按内容哈希)包含的 URL,下次运行时未变化的行直接跳过,
+只把新增的 URL 交给爬虫,省去每个 URL 的解析和去重查询;--force 时忽略上次的清单
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from .config import config
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class InputManifest:
+    """单个输入文件的清单 {行哈希: [URL]}"""
+
+    def __init__(self, input_path: str, manifest_dir: str = None, load: bool = True):
+        """
+        初始化输入文件清单
+
+        Args:
+            input_path: 输入 Markdown 文件路径
+            manifest_dir: 清单保存目录,默认使用配置中的值
+            load: 是否加载上次运行的清单(--force 时为 False,所有 URL 都视为新增)
+        """
+        self.input_path = Path(input_path).resolve()
+        key = hashlib.md5(str(self.input_path).encode('utf-8')).hexdigest()[:16]
+        self.path = Path(manifest_dir or config.INPUT_MANIFEST_DIR) / f"{key}.json"
+
+        # 上次运行的清单
+        self.previous: Dict[str, List[str]] = {}
+        self.previous_urls: Set[str] = set()
+        # 本次运行解析出的清单
+        self.current: Dict[str, List[str]] = {}
+        self.current_urls: Set[str] = set()
+
+        self.stats = {
+            'unchanged_lines': 0,   # 与上次相同、直接跳过的行数
+            'added': 0              # 新增的 URL 数
+        }
+
+        if load:
+            self._load()
+
+    @staticmethod
+    def line_hash(line: str) -> str:
+        """行内容哈希"""
+        return hashlib.md5(line.encode('utf-8')).hexdigest()[:16]
+
+    def _load(self):
+        """加载上次运行的清单"""
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取输入清单失败,将完整解析 {self.input_path.name}: {e}")
+            return
+
+        self.previous = data.get('lines', {})
+        for urls in self.previous.values():
+            self.previous_urls.update(urls)
+
+    def known_urls(self, line: str) -> Optional[List[str]]:
+        """
+        查询上次运行是否见过该行
+
+        Args:
+            line: 去除首尾空白后的行
+
+        Returns:
+            见过时返回该行的 URL(并记入本次清单),否则返回 None
+        """
+        key = self.line_hash(line)
+        urls = self.previous.get(key)
+        if urls is None:
+            return None
+        self.current[key] = urls
+        self.current_urls.update(urls)
+        self.stats['unchanged_lines'] += 1
+        return urls
+
+    def record(self, line: str, urls: List[str]) -> List[str]:
+        """
+        记录新行中的 URL
+
+        Args:
+            line: 去除首尾空白后的行
+            urls: 该行中的有效 URL
+
+        Returns:
+            上次运行没有的 URL(需要爬取)
+        """
+        self.current[self.line_hash(line)] = urls
+        added = [url for url in urls if url not in self.previous_urls and url not in self.current_urls]
+        self.current_urls.update(urls)
+        self.stats['added'] += len(added)
+        return added
+
+    def removed_urls(self) -> Set[str]:
+        """上次运行有、本次已从文件中删除的 URL"""
+        return self.previous_urls - self.current_urls
+
+    def forget(self, urls: Iterable[str]):
+        """
+        从本次清单中移除包含指定 URL 的行(爬取失败的 URL 下次运行重新调度)
+
+        Args:
+            urls: 需要重新调度的 URL
+        """
+        urls = set(urls)
+        if not urls:
+            return
+        self.current = {
+            key: line_urls for key, line_urls in self.current.items()
+            if not urls.intersection(line_urls)
+        }
+
+    def save(self):
+        """保存本次运行的清单(先写临时文件再原子替换)"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+            data = {'input': str(self.input_path), 'lines': self.current}
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"保存输入清单失败: {e}")
+
+    def get_stats(self) -> Dict:
+        """
+        获取清单统计信息
+
+        Returns:
+            统计信息字典
+        """
+        return {**self.stats, 'removed': len(self.removed_urls())}
@@ -0,0 +1,199 @@
+"""
+语言检测模块
+先用 Unicode 文字分布直方图快速判断,只有结果不明确时才调用 langdetect 统计检测;
+检测结果按文本哈希缓存,同一段文本只检测一次
+"""
+
+import hashlib
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from langdetect import DetectorFactory, detect, LangDetectException
+
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 固定随机种子,使 langdetect 对同一文本的结果稳定
+DetectorFactory.seed = 0
+
+# 只检测前 1000 字符以提高速度
+SAMPLE_CHARS = 1000
+
+# 英文高频功能词(拉丁字母文本区分英文与其他西欧语言)
+ENGLISH_STOPWORDS = frozenset(
+    "the of and to in is that for it with as was on be by are this at from or an have "
+    "not but which you we they has can will their your more if about when there been "
+    "would what all so its also were one how these than into other some".split()
+)
+
+WORD_PATTERN = re.compile(r"[a-zA-Z']+")
+
+
+def _script(char: str) -> Optional[str]:
+    """
+    返回字符所属的文字类别
+
+    Args:
+        char: 单个字符
+
+    Returns:
+        'han' / 'kana' / 'hangul' / 'latin' / 'other',非字母字符返回 None
+    """
+    code = ord(char)
+    if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0xF900 <= code <= 0xFAFF:
+        return 'han'
+    if 0x3040 <= code <= 0x30FF:
+        return 'kana'
+    if 0xAC00 <= code <= 0xD7AF or 0x1100 <= code <= 0x11FF:
+        return 'hangul'
+    if not char.isalpha():
+        return None
+    if code < 0x250 or 0x1E00 <= code <= 0x1EFF:
+        return 'latin'
+    return 'other'
+
+
+class LanguageDetector:
+    """文字直方图优先、langdetect 兜底的语言检测器"""
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        初始化语言检测器
+
+        Args:
+            max_entries: 结果缓存的最大条目数
+        """
+        self.max_entries = max_entries
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+
+        self.stats = {
+            'detections': 0,
+            'memo_hits': 0,
+            'fallbacks': 0
+        }
+
+    def detect(self, text: str) -> str:
+        """
+        检测文本语言
+
+        Args:
+            text: 待检测文本
+
+        Returns:
+            语言代码: 'en', 'zh', 'other', 'unknown'
+        """
+        if not text or len(text.strip()) < 10:
+            return "unknown"
+
+        sample = text[:SAMPLE_CHARS]
+        key = hashlib.sha1(sample.encode('utf-8')).hexdigest()
+
+        cached = self._memo.get(key)
+        if cached is not None:
+            self._memo.move_to_end(key)
+            self.stats['memo_hits'] += 1
+            return cached
+
+        self.stats['detections'] += 1
+        lang = self._classify_by_script(sample)
+        if lang is None:
+            self.stats['fallbacks'] += 1
+            lang = self._detect_statistical(sample)
+
+        self._memo[key] = lang
+        if len(self._memo) > self.max_entries:
+            self._memo.popitem(last=False)
+        return lang
+
+    @staticmethod
+    def _classify_by_script(sample: str) -> Optional[str]:
+        """
+        根据文字分布判断语言
+
+        Args:
+            sample: 文本样本
+
+        Returns:
+            语言代码,分布不明确时返回 None
+        """
+        counts: Dict[str, int] = {}
+        for char in unicodedata.normalize('NFC', sample):
+            script = _script(char)
+            if script:
+                counts[script] = counts.get(script, 0) + 1
+
+        total = sum(counts.values())
+        if total == 0:
+            return "unknown"
+
+        share = {script: n / total for script, n in counts.items()}
+
+        # 出现假名即可判定为日文(日文中汉字占比也可能很高)
+        if share.get('kana', 0) > 0.05 or share.get('hangul', 0) > 0.3:
+            return "other"
+        if share.get('han', 0) >= 0.5:
+            return "zh"
+        if share.get('other', 0) > 0.5:
+            return "other"
+
+        # 纯拉丁字母文本: 英文功能词占比足够高即判定为英文
+        if share.get('latin', 0) >= 0.9:
+            words = WORD_PATTERN.findall(sample.lower())
+            if len(words) >= 5:
+                hits = sum(1 for word in words if word in ENGLISH_STOPWORDS)
+                if hits / len(words) >= 0.2:
+                    return "en"
+
+        return None
+
+    @staticmethod
+    def _detect_statistical(sample: str) -> str:
+        """
+        使用 langdetect 统计检测
+
+        Args:
+            sample: 文本样本
+
+        Returns:
+            语言代码
+        """
+        try:
+            lang = detect(sample)
+        except LangDetectException as e:
+            logger.warning(f"语言检测失败: {e}")
+            return "unknown"
+
+        # 简化语言分类
+        if lang == 'en':
+            return 'en'
+        if lang in ['zh-cn', 'zh-tw']:
+            return 'zh'
+        return 'other'
+
+    def get_stats(self) -> Dict:
+        """
+        获取检测统计信息
+
+        Returns:
+            统计信息字典
+        """
+        return dict(self.stats)
+
+
+_detector: Optional[LanguageDetector] = None
+
+
+def get_language_detector() -> LanguageDetector:
+    """
+    获取进程内共享的语言检测器
+
+    Returns:
+        LanguageDetector 单例
+    """
+    global _detector
+    if _detector is None:
+        _detector = LanguageDetector()
+    return _detector
@@ -0,0 +1,94 @@
+"""
+Markdown 保护模块
+翻译前将无需翻译的片段(代码块、行内代码、图片、链接地址、长 URL)替换为紧凑占位符,
+翻译后再原样还原,既减少输入/输出 token,也避免模型改写代码和链接
+"""
+
+import re
+from typing import List, Tuple
+
+# 占位符,如 ⟦P3⟧(与翻译记忆的 ⟦TM3⟧ 区分)
+PLACEHOLDER_PATTERN = re.compile(r'⟦P(\d+)⟧')
+
+# 短于该长度的片段不替换(占位符本身也要消耗 token)
+MIN_SPAN_CHARS = 8
+
+# 按顺序依次替换: 先整体替换代码块,避免其中的反引号和链接被后续规则拆开
+PROTECT_PATTERNS = [
+    # 围栏代码块 ``` / ~~~
+    re.compile(r'^[ \t]*(```|~~~)[^\n]*\n.*?^[ \t]*\1[ \t]*$', re.M | re.S),
+    # 行内代码
+    re.compile(r'``[^\n]+?``|`[^`\n]+`'),
+    # 图片 ![alt](url "title")
+    re.compile(r'!\[[^\]\n]*\]\([^)\n]*\)'),
+    # 链接地址 [text](url) 中的 (url) 部分,链接文字仍参与翻译
+    re.compile(r'(?<=\])\([^)\s]+(?:\s+"[^"\n]*")?\)'),
+    # 引用式链接定义 [id]: url
+    re.compile(r'^[ \t]*\[[^\]\n]+\]:[ \t]+\S+.*$', re.M),
+    # 裸 URL
+    re.compile(r'https?://[^\s)>\]]+'),
+]
+
+
+def protect(text: str) -> Tuple[str, List[str]]:
+    """
+    将无需翻译的片段替换为占位符
+
+    Args:
+        text: Markdown 文本
+
+    Returns:
+        (替换后的文本, 被替换的原始片段列表),片段下标即占位符编号
+    """
+    spans: List[str] = []
+
+    def replace(match: re.Match) -> str:
+        span = match.group(0)
+        if len(span) < MIN_SPAN_CHARS or PLACEHOLDER_PATTERN.search(span):
+            return span
+        spans.append(span)
+        return f"⟦P{len(spans) - 1}⟧"
+
+    for pattern in PROTECT_PATTERNS:
+        text = pattern.sub(replace, text)
+
+    return text, spans
+
+
+def restore(text: str, spans: List[str]) -> Tuple[str, List[int]]:
+    """
+    将占位符还原为原始片段
+
+    Args:
+        text: 含占位符的译文
+        spans: protect() 返回的片段列表
+
+    Returns:
+        (还原后的文本, 译文中缺失的占位符编号列表)
+    """
+    found = set()
+
+    def replace(match: re.Match) -> str:
+        index = int(match.group(1))
+        if index >= len(spans):
+            return match.group(0)
+        found.add(index)
+        return spans[index]
+
+    text = PLACEHOLDER_PATTERN.sub(replace, text)
+    missing = [i for i in range(len(spans)) if i not in found]
+    return text, missing
+
+
+def has_translatable_text(protected: str) -> bool:
+    """
+    判断替换后的文本是否还有需要翻译的内容
+
+    Args:
+        protected: protect() 返回的文本
+
+    Returns:
+        去掉占位符和 Markdown 符号后是否仍有文字
+    """
+    remainder = PLACEHOLDER_PATTERN.sub('', protected)
+    return any(c.isalpha() for c in remainder)
@@ -0,0 +1,231 @@
+"""
+Markdown 分块模块
+按 Markdown 结构边界(标题、段落、代码块)将长文档切分为受 token 上限约束的块
+"""
+
+import re
+from typing import Callable, List, Tuple
+
+from .rate_limiter import estimate_tokens
+
+# 代码块起止标记(``` 或 ~~~)
+FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')
+HEADING_PATTERN = re.compile(r'^#{1,6}\s')
+# 表格行(以 | 开头)
+TABLE_ROW_PATTERN = re.compile(r'^\s*\|')
+
+
+def split_blocks(text: str) -> List[str]:
+    """
+    将 Markdown 拆分为结构块
+
+    - 代码块整体作为一个块(内部空行不拆分)
+    - 标题单独开始一个新块
+    - 普通段落以空行分隔
+
+    Args:
+        text: Markdown 文本
+
+    Returns:
+        结构块列表(不含空块)
+    """
+    blocks = []
+    current: List[str] = []
+    fence = None
+
+    def flush():
+        if current:
+            block = '\n'.join(current).strip('\n')
+            if block.strip():
+                blocks.append(block)
+            current.clear()
+
+    for line in text.split('\n'):
+        fence_match = FENCE_PATTERN.match(line)
+
+        if fence:
+            current.append(line)
+            if fence_match and fence_match.group(1) == fence:
+                fence = None
+                flush()
+            continue
+
+        if fence_match:
+            flush()
+            fence = fence_match.group(1)
+            current.append(line)
+            continue
+
+        if not line.strip():
+            flush()
+            continue
+
+        if HEADING_PATTERN.match(line):
+            flush()
+
+        current.append(line)
+
+    flush()
+    return blocks
+
+
+def _line_units(block: str) -> List[str]:
+    """将块拆分为行,连续的表格行合并为一个单元(表格不从中间拆开)"""
+    units: List[str] = []
+    in_table = False
+    for line in block.split('\n'):
+        is_row = bool(TABLE_ROW_PATTERN.match(line))
+        if is_row and in_table:
+            units[-1] += '\n' + line
+        else:
+            units.append(line)
+        in_table = is_row
+    return units
+
+
+def _split_oversized_block(block: str, max_tokens: int, count: Callable[[str], int]) -> List[List[str]]:
+    """
+    拆分单个超出上限的块: 先按行,单行仍超限时按字符硬切
+
+    代码块和表格保持完整(即使超出上限;代码块翻译前会整体替换为占位符)。
+
+    Args:
+        block: 结构块
+        max_tokens: 每块 token 上限
+        count: token 计数函数
+
+    Returns:
+        [片段, 与下一片段之间的分隔符] 列表: 按行拆分的片段之间为 "\n",
+        同一行硬切的片段之间为 "";最后一个片段的分隔符由调用方填写
+    """
+    # 拆开后代码无法整体保护(占位符),围栏不配对会被当作普通文本翻译
+    if FENCE_PATTERN.match(block):
+        return [[block, '']]
+
+    pieces: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            pieces.append(['\n'.join(current), '\n'])
+            current, current_tokens = [], 0
+
+    for line in _line_units(block):
+        line_tokens = count(line)
+
+        if line_tokens > max_tokens and '\n' in line:
+            # 超长表格单独成块
+            flush()
+            pieces.append([line, '\n'])
+            continue
+
+        if line_tokens > max_tokens:
+            flush()
+            # 按 token 比例估算每段字符数后硬切
+            step = max(1, int(len(line) * max_tokens / line_tokens))
+            pieces.extend([line[i:i + step], ''] for i in range(0, len(line), step))
+            pieces[-1][1] = '\n'
+            continue
+
+        if current and current_tokens + line_tokens > max_tokens:
+            flush()
+
+        current.append(line)
+        current_tokens += line_tokens
+
+    flush()
+    return pieces
+
+
+def split_markdown_with_separators(
+    text: str,
+    max_tokens: int,
+    count: Callable[[str], int] = estimate_tokens
+) -> List[Tuple[str, str]]:
+    """
+    将 Markdown 文档切分为不超过 max_tokens 的块,并记录每块与下一块之间的分隔符
+
+    相邻结构块贪心合并,结构块之间的分隔符为 "\n\n";同一个超长块拆出的片段之间为 "\n"
+    (同一行硬切时为 "")。用 join_chunks 按记录的分隔符拼接即可还原原文
+    (连续空行合并为一个,首尾空行去除)。围栏代码块和表格不拆分,可能超出上限。
+
+    Args:
+        text: Markdown 文本
+        max_tokens: 每块 token 上限
+        count: token 计数函数
+
+    Returns:
+        (文本块, 与下一块之间的分隔符) 列表,最后一块的分隔符为 ""
+    """
+    if not text or not text.strip():
+        return []
+
+    if count(text) <= max_tokens:
+        return [(text, '')]
+
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append(['\n\n'.join(current), '\n\n'])
+            current, current_tokens = [], 0
+
+    for block in split_blocks(text):
+        block_tokens = count(block)
+
+        if block_tokens > max_tokens:
+            flush()
+            pieces = _split_oversized_block(block, max_tokens, count)
+            pieces[-1][1] = '\n\n'
+            chunks.extend(pieces)
+            continue
+
+        if current and current_tokens + block_tokens > max_tokens:
+            flush()
+
+        current.append(block)
+        current_tokens += block_tokens
+
+    flush()
+    chunks[-1][1] = ''
+    return [(chunk, separator) for chunk, separator in chunks]
+
+
+def split_markdown(
+    text: str,
+    max_tokens: int,
+    count: Callable[[str], int] = estimate_tokens
+) -> List[str]:
+    """
+    将 Markdown 文档切分为不超过 max_tokens 的块(不含分隔符)
+
+    还原时需要使用 split_markdown_with_separators 记录的分隔符,不能统一用 "\n\n" 拼接。
+
+    Args:
+        text: Markdown 文本
+        max_tokens: 每块 token 上限
+        count: token 计数函数
+
+    Returns:
+        文本块列表
+    """
+    return [chunk for chunk, _ in split_markdown_with_separators(text, max_tokens, count)]
+
+
+def join_chunks(chunks: List[str], separators: List[str]) -> str:
+    """
+    按分隔符拼接文本块(split_markdown_with_separators 的逆操作)
+
+    Args:
+        chunks: 文本块(可以是翻译后的文本)
+        separators: 每块与下一块之间的分隔符
+
+    Returns:
+        拼接后的文本
+    """
+    return ''.join(chunk + separator for chunk, separator in zip(chunks, separators))
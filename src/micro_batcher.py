@@ -0,0 +1,109 @@
+"""
+微批处理模块
+在短时间窗口内收集来自多个协程的请求,合并为一次批量调用后再把结果分发回各调用方
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class MicroBatcher:
+    """按时间窗口或条目数触发的微批处理器"""
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_items: int,
+        window_ms: int
+    ):
+        """
+        初始化微批处理器
+
+        Args:
+            handler: 批量处理函数,接收条目列表,返回等长的结果列表
+            max_items: 单批最多条目数(攒够即发送)
+            window_ms: 第一个条目到达后最长等待时间(毫秒)
+        """
+        self.handler = handler
+        self.max_items = max(1, max_items)
+        self.window = max(0, window_ms) / 1000
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.stats = {
+            'batches': 0,
+            'items': 0
+        }
+
+    async def submit(self, item: Any) -> Any:
+        """
+        提交一个条目并等待其结果
+
+        Args:
+            item: 待处理条目
+
+        Returns:
+            该条目对应的处理结果
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """发送当前积攒的条目"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """执行一批并把结果分发给等待的调用方"""
+        items = [item for item, _ in batch]
+        self.stats['batches'] += 1
+        self.stats['items'] += len(items)
+        logger.debug(f"微批处理: {len(items)} 个条目合并为一次调用")
+
+        try:
+            results = await self.handler(items)
+            if len(results) != len(items):
+                raise ValueError(f"批量结果数量不一致 ({len(results)} != {len(items)})")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        """
+        获取批处理统计信息
+
+        Returns:
+            统计信息字典(含平均批大小)
+        """
+        stats = dict(self.stats)
+        stats['avg_batch_size'] = stats['items'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
@@ -3,19 +3,33 @@ Markdown 文件解析模块
 从 Markdown 文件中提取标题层级和 URL
 """
 
+import glob
 import re
+import sys
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Dict, Iterator, List, Tuple
 from dataclasses import dataclass
 
+from .input_manifest import InputManifest
 from .utils import setup_logger, is_valid_url
 
 logger = setup_logger(__name__)
 
+# Markdown 链接 [Title](URL)
+MARKDOWN_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\((https?://[^\)]+)\)')
+
+# 普通 URL(排除右括号,避免匹配到 Markdown 链接内的 URL)
+PLAIN_URL_PATTERN = re.compile(r'https?://[^\s<>"{}|\\^`\[\]\)\)]+')
+
+# 目录输入时收集的文件后缀
+INPUT_SUFFIXES = ('.md', '.markdown')
+
 
 @dataclass
 class URLItem:
-    """URL 项目数据类"""
+    """URL 项目数据类(使用 __slots__;H1/H2 为驻留字符串,不同位置、不同文件中的相同标题共享同一对象)"""
+    __slots__ = ('url', 'h1', 'h2', 'line_number')
+
     url: str
     h1: str  # 一级标题
     h2: str  # 二级标题
@@ -50,52 +64,73 @@ class MarkdownParser:
         Returns:
             URL 项目列表
         """
+        self.items = list(self.iter_items())
+        logger.info(f"解析完成,共找到 {len(self.items)} 个 URL")
+        return self.items
+
+    def iter_items(self, manifest: InputManifest = None) -> Iterator[URLItem]:
+        """
+        逐行读取并解析 Markdown 文件,边读边产出 URL 项目
+
+        不会一次性读入整个文件,也不保存已产出的项目,内存占用与文件大小无关。
+
+        Args:
+            manifest: 输入文件清单,提供时跳过上次运行见过的行,只产出新增的 URL
+
+        Yields:
+            URL 项目
+        """
         logger.info(f"开始解析文件: {self.file_path}")
+        self.current_h1 = ""
+        self.current_h2 = ""
 
         with open(self.file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-
-            # 跳过空行
-            if not line:
-                continue
-
-            # 解析 H1 标题
-            if line.startswith('# ') and not line.startswith('## '):
-                self.current_h1 = line[2:].strip()
-                self.current_h2 = ""  # 重置 H2
-                logger.debug(f"发现 H1: {self.current_h1}")
-                continue
-
-            # 解析 H2 标题
-            if line.startswith('## ') and not line.startswith('### '):
-                self.current_h2 = line[3:].strip()
-                logger.debug(f"发现 H2: {self.current_h2}")
-                continue
-
-            # 解析 URL
-            # 支持以下格式:
-            # - http://example.com
-            # - https://example.com
-            # - [Title](http://example.com)  # Markdown 链接格式
-            urls = self._extract_urls(line)
-            for url in urls:
-                if is_valid_url(url):
-                    item = URLItem(
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+
+                # 跳过空行
+                if not line:
+                    continue
+
+                # 解析 H1 标题
+                if line.startswith('# ') and not line.startswith('## '):
+                    self.current_h1 = sys.intern(line[2:].strip())
+                    self.current_h2 = ""  # 重置 H2
+                    logger.debug(f"发现 H1: {self.current_h1}")
+                    continue
+
+                # 解析 H2 标题
+                if line.startswith('## ') and not line.startswith('### '):
+                    self.current_h2 = sys.intern(line[3:].strip())
+                    logger.debug(f"发现 H2: {self.current_h2}")
+                    continue
+
+                # 解析 URL
+                # 支持以下格式:
+                # - http://example.com
+                # - https://example.com
+                # - [Title](http://example.com)  # Markdown 链接格式
+                if manifest is not None and manifest.known_urls(line) is not None:
+                    continue  # 上次运行已调度过该行
+
+                urls = []
+                for url in self._extract_urls(line):
+                    if is_valid_url(url):
+                        urls.append(url)
+                    else:
+                        logger.warning(f"无效 URL: {url} (行 {line_num})")
+
+                if manifest is not None and urls:
+                    urls = manifest.record(line, urls)
+
+                for url in urls:
+                    logger.debug(f"发现 URL: {url} (行 {line_num})")
+                    yield URLItem(
                         url=url,
                         h1=self.current_h1 or "未分类",
                         h2=self.current_h2 or "默认",
                         line_number=line_num
                     )
-                    self.items.append(item)
-                    logger.debug(f"发现 URL: {url} (行 {line_num})")
-                else:
-                    logger.warning(f"无效 URL: {url} (行 {line_num})")
-
-        logger.info(f"解析完成,共找到 {len(self.items)} 个 URL")
-        return self.items
 
     def _extract_urls(self, line: str) -> List[str]:
         """
@@ -110,19 +145,16 @@ class MarkdownParser:
         urls = []
 
         # 首先匹配 Markdown 链接格式 [Title](URL)
-        markdown_pattern = r'\[([^\]]+)\]\((https?://[^\)]+)\)'
-        markdown_matches = re.findall(markdown_pattern, line)
+        markdown_matches = MARKDOWN_LINK_PATTERN.findall(line)
         for title, url in markdown_matches:
             urls.append(url.strip())
 
         # 移除已经匹配的 Markdown 链接，避免重复提取
         # 将 [Title](URL) 替换为空字符串
-        line_without_markdown = re.sub(markdown_pattern, '', line)
+        line_without_markdown = MARKDOWN_LINK_PATTERN.sub('', line)
 
         # 在剩余的文本中匹配普通 URL（更严格的模式）
-        # 这个模式会排除右括号，避免匹配到 Markdown 链接内的 URL
-        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]\)\)]+'
-        plain_matches = re.findall(url_pattern, line_without_markdown)
+        plain_matches = PLAIN_URL_PATTERN.findall(line_without_markdown)
         for url in plain_matches:
             url = url.strip()
             # 移除末尾可能残留的标点符号
@@ -173,3 +205,27 @@ def parse_markdown_file(file_path: str) -> List[URLItem]:
     """
     parser = MarkdownParser(file_path)
     return parser.parse()
+
+
+def resolve_input_files(path: str) -> List[Path]:
+    """
+    解析输入路径: 单个文件、目录(递归收集 Markdown 文件)或 glob 模式
+
+    Args:
+        path: 文件路径、目录路径或 glob 模式(如 "inputs/**/*.md",需加引号避免被 shell 展开)
+
+    Returns:
+        排序后的文件路径列表,没有匹配时返回空列表
+    """
+    if any(char in path for char in '*?['):
+        return sorted(Path(p) for p in glob.glob(path, recursive=True) if Path(p).is_file())
+
+    target = Path(path)
+    if target.is_dir():
+        return sorted(
+            p for p in target.rglob('*')
+            if p.is_file() and p.suffix.lower() in INPUT_SUFFIXES
+        )
+    if target.is_file():
+        return [target]
+    return []
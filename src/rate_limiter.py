@@ -0,0 +1,329 @@
+"""
+LLM 调用限流模块
+基于令牌桶的 RPM/TPM 限流,并对 429 响应和临时错误(连接失败、超时、5xx)进行带抖动的退避重试
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from openai import APIConnectionError
+
+from .config import config
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 与 SDK 内置重试一致的临时错误状态码(另含所有 5xx)
+TRANSIENT_STATUS_CODES = {408, 409}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的 token 数
+
+    中日韩字符按 1 字 1 token 计算,其余字符按 4 字符 1 token 计算。
+
+    Args:
+        text: 文本
+
+    Returns:
+        估算的 token 数
+    """
+    if not text:
+        return 0
+
+    cjk_chars = sum(1 for c in text if '\u3040' <= c <= '\u9fff' or '\uac00' <= c <= '\ud7af')
+    other_chars = len(text) - cjk_chars
+    return cjk_chars + other_chars // 4 + 1
+
+
+class TokenBucket:
+    """按分钟配额匀速补充的令牌桶"""
+
+    def __init__(self, capacity_per_minute: int):
+        """
+        初始化令牌桶
+
+        Args:
+            capacity_per_minute: 每分钟配额(同时也是桶容量)
+        """
+        self.capacity = float(capacity_per_minute)
+        self.rate = self.capacity / 60.0  # 每秒补充量
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        """按流逝时间补充令牌"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        计算获得指定数量令牌需要等待的秒数
+
+        Args:
+            amount: 需要的令牌数(超过容量时按容量计算)
+
+        Returns:
+            需要等待的秒数,0 表示可立即获取
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        """
+        扣除令牌(允许为负,用于按实际用量校正)
+
+        Args:
+            amount: 扣除的令牌数
+        """
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class LLMRateLimiter:
+    """
+    LLM 请求限流器
+
+    所有 LLM 请求共享同一组 RPM/TPM 令牌桶,遇到 429 或带 Retry-After 的响应时
+    全局暂停并以带抖动的指数退避重试。
+    """
+
+    def __init__(
+        self,
+        rpm: int = None,
+        tpm: int = None,
+        max_retries: int = None,
+        base_delay: float = None,
+        max_delay: float = None
+    ):
+        """
+        初始化限流器
+
+        Args:
+            rpm: 每分钟请求数上限(0 表示不限制)
+            tpm: 每分钟 token 数上限(0 表示不限制)
+            max_retries: 429 最大重试次数
+            base_delay: 退避基础延迟(秒)
+            max_delay: 退避最大延迟(秒)
+        """
+        rpm = config.LLM_RPM_LIMIT if rpm is None else rpm
+        tpm = config.LLM_TPM_LIMIT if tpm is None else tpm
+
+        self.request_bucket = TokenBucket(rpm) if rpm > 0 else None
+        self.token_bucket = TokenBucket(tpm) if tpm > 0 else None
+        self.max_retries = config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = config.LLM_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = config.LLM_RETRY_MAX_DELAY if max_delay is None else max_delay
+
+        # 保证按到达顺序放行(与事件循环绑定,在首次使用时创建)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # 收到 429 后的全局冷却截止时间(基于单调时钟,与事件循环无关)
+        self._cooldown_until = 0.0
+
+        self.stats = {
+            'requests': 0,
+            'rate_limited': 0,
+            'transient_retries': 0,   # 连接失败、超时、5xx 的重试次数
+            'queue_depth': 0,
+            'max_queue_depth': 0,
+            'throttle_time': 0.0
+        }
+
+        logger.info(f"LLM 限流器已初始化 (RPM: {rpm or '不限'}, TPM: {tpm or '不限'})")
+
+    def _bind_loop(self):
+        """事件循环变化时(如先登录再爬取的多次 asyncio.run)重建锁,避免绑定已关闭的循环"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            # 上一个循环中排队的请求已随循环结束
+            self.stats['queue_depth'] = 0
+
+    async def acquire(self, estimated_tokens: int = 0):
+        """
+        获取一次请求配额(不足时排队等待)
+
+        Args:
+            estimated_tokens: 本次请求估算的 token 数
+        """
+        self._bind_loop()
+        self.stats['queue_depth'] += 1
+        self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], self.stats['queue_depth'])
+
+        try:
+            async with self._lock:
+                while True:
+                    wait = max(0.0, self._cooldown_until - time.monotonic())
+                    if self.request_bucket:
+                        wait = max(wait, self.request_bucket.wait_time(1))
+                    if self.token_bucket and estimated_tokens:
+                        wait = max(wait, self.token_bucket.wait_time(estimated_tokens))
+
+                    if wait <= 0:
+                        break
+
+                    logger.debug(f"LLM 限流等待 {wait:.2f} 秒 (排队: {self.stats['queue_depth']})")
+                    self.stats['throttle_time'] += wait
+                    await asyncio.sleep(wait)
+
+                if self.request_bucket:
+                    self.request_bucket.consume(1)
+                if self.token_bucket and estimated_tokens:
+                    self.token_bucket.consume(estimated_tokens)
+        finally:
+            self.stats['queue_depth'] -= 1
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """
+        按响应中的实际用量校正 TPM 令牌桶
+
+        Args:
+            estimated_tokens: 请求前估算的 token 数
+            actual_tokens: 响应中返回的实际 token 数
+        """
+        if self.token_bucket and actual_tokens:
+            self.token_bucket.consume(actual_tokens - estimated_tokens)
+
+    async def call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        estimated_tokens: int = 0,
+        **kwargs
+    ) -> Any:
+        """
+        在限流保护下执行 LLM 请求,429 和临时错误时自动退避重试
+
+        429 的等待作为全局冷却(其他排队请求同样等待);连接失败、超时、5xx 只有本请求等待。
+
+        Args:
+            func: 异步请求函数
+            estimated_tokens: 本次请求估算的 token 数
+            *args, **kwargs: 传给 func 的参数
+
+        Returns:
+            func 的返回值
+
+        Raises:
+            最后一次请求的异常(不可重试的错误或重试耗尽)
+        """
+        attempt = 0
+        while True:
+            await self.acquire(estimated_tokens)
+            self.stats['requests'] += 1
+
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                retry_after = self._get_retry_after(e)
+                rate_limited = self._is_rate_limit_error(e) or retry_after is not None
+                if not (rate_limited or self._is_transient_error(e)):
+                    raise
+                if attempt >= self.max_retries:
+                    logger.error(f"LLM 请求重试次数已用尽 ({self.max_retries} 次): {e}")
+                    raise
+
+                delay = retry_after if retry_after is not None else self._backoff_delay(attempt)
+                attempt += 1
+                if rate_limited:
+                    self.stats['rate_limited'] += 1
+                    # 全局冷却: 其他排队请求同样等待
+                    self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+                    logger.warning(f"LLM 请求被限流,{delay:.1f} 秒后重试 (第{attempt}/{self.max_retries}次)")
+                else:
+                    self.stats['transient_retries'] += 1
+                    logger.warning(f"LLM 请求临时失败({type(e).__name__}),{delay:.1f} 秒后重试 "
+                                   f"(第{attempt}/{self.max_retries}次)")
+                    await asyncio.sleep(delay)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """带随机抖动的指数退避延迟(取 [delay/2, delay] 区间)"""
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    @staticmethod
+    def _is_rate_limit_error(error: Exception) -> bool:
+        """判断是否为 429 限流错误"""
+        return getattr(error, 'status_code', None) == 429
+
+    @staticmethod
+    def _is_transient_error(error: Exception) -> bool:
+        """判断是否为可重试的临时错误(连接失败、超时、408/409/5xx)"""
+        if isinstance(error, (APIConnectionError, asyncio.TimeoutError, ConnectionError)):
+            return True
+        status_code = getattr(error, 'status_code', None)
+        return isinstance(status_code, int) and (status_code in TRANSIENT_STATUS_CODES or status_code >= 500)
+
+    @staticmethod
+    def _get_retry_after(error: Exception) -> Optional[float]:
+        """
+        从错误响应中解析 Retry-After(秒)
+
+        Args:
+            error: API 异常
+
+        Returns:
+            等待秒数,响应中没有该头部时返回 None
+        """
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None)
+        if not headers:
+            return None
+
+        retry_after_ms = headers.get('retry-after-ms')
+        if retry_after_ms:
+            try:
+                return max(0.0, float(retry_after_ms) / 1000)
+            except ValueError:
+                pass
+
+        retry_after = headers.get('retry-after')
+        if not retry_after:
+            return None
+
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def get_stats(self) -> Dict:
+        """
+        获取限流统计信息
+
+        Returns:
+            统计信息字典
+        """
+        return dict(self.stats)
+
+
+# 进程内共享的限流器(所有 Translator 共用同一份配额)
+_shared_limiter: Optional[LLMRateLimiter] = None
+
+
+def get_llm_rate_limiter() -> LLMRateLimiter:
+    """
+    获取进程内共享的 LLM 限流器
+
+    Returns:
+        LLMRateLimiter 实例
+    """
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = LLMRateLimiter()
+    return _shared_limiter
@@ -12,7 +12,9 @@ from .parser import URLItem
 from .cleaner import ContentCleaner
 from .config import config
 from .utils import setup_logger, sanitize_filename, ensure_dir, get_timestamp
-from .image_downloader import AsyncImageDownloader
+from .image_downloader import AsyncImageDownloader, ImageDownloadService
+from .image_queue import ImageDownloadQueue, ImageJob
+from .translation_stream import StreamBuffer
 
 logger = setup_logger(__name__)
 
@@ -36,6 +38,11 @@ class StorageManager:
             'total_size': 0
         }
 
+        # 后台图片下载队列: 页面先以原始图片链接保存,图片下载完成后再回填本地路径
+        self.image_queue: Optional[ImageDownloadQueue] = None
+        if config.DOWNLOAD_IMAGES and config.IMAGE_BACKGROUND_DOWNLOAD:
+            self.image_queue = ImageDownloadQueue()
+
         logger.info(f"文件存储管理器已初始化: {self.output_dir}")
 
     def save(self, item: URLItem, page: WebPage) -> Optional[Path]:
@@ -90,11 +97,11 @@ class StorageManager:
         content = ContentCleaner.clean(page.content)
         description = ContentCleaner.truncate_description(page.description, 300)
 
-        # 智能异步图片下载处理（如果启用）
-        if config.DOWNLOAD_IMAGES:
+        # 智能异步图片下载处理（如果启用且未使用后台下载队列）
+        if config.DOWNLOAD_IMAGES and self.image_queue is None:
             try:
                 logger.debug("图片下载功能已启用，开始异步智能处理图片...")
-                downloader = AsyncImageDownloader(base_url=page.url)
+                downloader = AsyncImageDownloader(base_url=page.url, size_hints=page.image_hints)
                 images_dir = h2_dir / "images"
 
                 # 从清洗后的内容中提取图片 URL
@@ -180,18 +187,123 @@ class StorageManager:
             self.stats['total_size'] += file_path.stat().st_size
 
             logger.info(f"✓ 文件已保存: {file_path.relative_to(self.output_dir)}")
+
+            # 图片交给后台队列下载,不阻塞页面保存
+            if self.image_queue is not None:
+                self._queue_images(file_path, page, markdown_content, h2_dir)
+
             return file_path
 
         except Exception as e:
             logger.error(f"保存文件失败: {e}")
             return None
 
+    def _queue_images(self, file_path: Path, page: WebPage, markdown_content: str, h2_dir: Path):
+        """
+        将页面中的图片提交到后台下载队列
+
+        Args:
+            file_path: 已写入的 Markdown 文件
+            page: 网页数据
+            markdown_content: 已写入的文件内容
+            h2_dir: H2 级目录路径（用于保存图片）
+        """
+        image_urls = list(dict.fromkeys(
+            resolved_url
+            for _, _, resolved_url in ImageDownloadService.extract_image_urls(markdown_content, page.url)
+        ))
+        if image_urls:
+            logger.debug(f"{len(image_urls)} 张图片已加入后台下载队列: {file_path.name}")
+            self.image_queue.submit(ImageJob(file_path, page.url, image_urls, h2_dir / "images", page.image_hints))
+
+    async def drain_images(self, timeout: float = None) -> bool:
+        """
+        等待后台图片下载完成(超过期限后放弃剩余任务)
+
+        Args:
+            timeout: 最长等待秒数,默认使用配置中的值
+
+        Returns:
+            是否全部完成
+        """
+        if self.image_queue is None:
+            return True
+        return await self.image_queue.drain(timeout)
+
+    async def close(self):
+        """停止后台图片下载(未完成的任务直接放弃)"""
+        if self.image_queue is not None:
+            await self.image_queue.close()
+
+    async def write_progressive(self, item: URLItem, page: WebPage, stream: StreamBuffer) -> Optional[Path]:
+        """
+        流式翻译期间将正文译文增量写入临时文件(.part)
+
+        最终文件仍由 save_async 生成(清洗、图片处理后整体写入),临时文件仅用于提前查看进度。
+        收到第一段译文时才创建临时文件,未产生译文(无需翻译、缓存命中)时不创建;
+        写入失败时删除已创建的临时文件。
+
+        Args:
+            item: URL 项目
+            page: 网页数据(标题和来源链接)
+            stream: 正文译文的增量缓冲区(调用方在翻译开始时传入,不从 page 读取)
+
+        Returns:
+            临时文件路径,未创建或失败时返回 None
+        """
+        part_path = None
+        f = None
+        try:
+            async for restart, text in stream.follow():
+                if f is None:
+                    if not text:
+                        continue
+                    h2_dir = self.output_dir / sanitize_filename(item.h1) / sanitize_filename(item.h2)
+                    ensure_dir(h2_dir)
+                    part_path = h2_dir / f".{sanitize_filename(page.title)}.md.part"
+                    f = open(part_path, 'w', encoding='utf-8')
+                    f.write(f"# {page.title}\n\n> 🔗 **来源链接**: {page.url}\n\n---\n\n")
+                    body_start = f.tell()
+                elif restart:
+                    f.seek(body_start)
+                    f.truncate()
+                f.write(text)
+                f.flush()
+
+            return part_path
+
+        except Exception as e:
+            logger.warning(f"增量写入译文失败: {e}")
+            if f is not None:
+                f.close()
+                f = None
+            self.remove_partial(part_path)
+            return None
+        finally:
+            if f is not None:
+                f.close()
+
+    @staticmethod
+    def remove_partial(part_path: Optional[Path]):
+        """
+        删除流式翻译的临时文件
+
+        Args:
+            part_path: write_progressive 返回的路径
+        """
+        if part_path is None:
+            return
+        try:
+            part_path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.debug(f"删除临时文件失败: {e}")
+
     def save_failed_urls(self, failed_items: list) -> Optional[Path]:
         """
         保存失败的 URL 列表
 
         Args:
-            failed_items: 失败的 (URLItem, error_message) 列表
+            failed_items: 失败的 (url, h1, h2, error_message) 列表
 
         Returns:
             保存的文件路径
@@ -208,9 +320,9 @@ class StorageManager:
                 f.write(f"# 生成时间: {get_timestamp()}\n")
                 f.write(f"# 总计: {len(failed_items)} 个\n\n")
 
-                for item, error in failed_items:
-                    f.write(f"URL: {item.url}\n")
-                    f.write(f"层级: {item.h1} / {item.h2}\n")
+                for url, h1, h2, error in failed_items:
+                    f.write(f"URL: {url}\n")
+                    f.write(f"层级: {h1} / {h2}\n")
                     f.write(f"错误: {error}\n")
                     f.write("-" * 80 + "\n\n")
 
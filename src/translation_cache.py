@@ -0,0 +1,285 @@
+"""
+翻译缓存模块
+以 hash(模型, 源语言, 目标语言, 提示词版本, 原文) 为键缓存译文,避免重复翻译相同文本
+
+支持两种后端:
+- redis: 使用 Redis 存储,TTL 过期 + 有序集合记录访问时间实现 LRU 淘汰
+- file: 使用本地 SQLite 文件存储(Redis 不可用时自动降级)
+"""
+
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import redis
+
+from .config import config
+from .rate_limiter import estimate_tokens
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class TranslationCache:
+    """翻译缓存"""
+
+    def __init__(
+        self,
+        backend: str = None,
+        namespace: str = "trans",
+        ttl_days: int = None,
+        max_entries: int = None,
+        cache_file: str = None
+    ):
+        """
+        初始化翻译缓存
+
+        Args:
+            backend: 存储后端 'redis' / 'file' / 'none',默认使用配置中的值
+            namespace: 键名空间(不同用途的缓存互不干扰)
+            ttl_days: 过期天数
+            max_entries: 最大条目数(超出时淘汰最久未访问的条目)
+            cache_file: file 后端的 SQLite 文件路径
+        """
+        self.backend = (backend or config.TRANSLATION_CACHE_BACKEND).lower()
+        self.namespace = namespace
+        self.ttl_seconds = (ttl_days or config.TRANSLATION_CACHE_TTL_DAYS) * 24 * 3600
+        self.max_entries = max_entries or config.TRANSLATION_CACHE_MAX_ENTRIES
+        self.key_prefix = f"{config.REDIS_KEY_PREFIX}{namespace}:"
+        self.lru_key = f"{self.key_prefix}lru"
+
+        self.redis = None
+        self.db = None
+        self._writes_since_evict = 0
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'tokens_saved': 0
+        }
+
+        if self.backend == 'redis':
+            self._init_redis()
+        if self.backend == 'file':
+            self._init_file(cache_file or config.TRANSLATION_CACHE_FILE)
+
+        logger.info(f"翻译缓存已初始化 (后端: {self.backend}, 空间: {namespace})")
+
+    def _init_redis(self):
+        """初始化 Redis 后端,连接失败时降级为文件后端"""
+        try:
+            self.redis = redis.Redis(
+                host=config.REDIS_HOST,
+                port=config.REDIS_PORT,
+                db=config.REDIS_DB,
+                password=config.REDIS_PASSWORD if config.REDIS_PASSWORD else None,
+                decode_responses=True,
+                socket_connect_timeout=5,
+                socket_timeout=5
+            )
+            self.redis.ping()
+        except (redis.RedisError, ConnectionError) as e:
+            logger.warning(f"翻译缓存 Redis 不可用，降级为本地文件缓存: {e}")
+            self.redis = None
+            self.backend = 'file'
+
+    def _init_file(self, cache_file: str):
+        """初始化 SQLite 文件后端"""
+        try:
+            path = Path(cache_file)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.db = sqlite3.connect(str(path))
+            self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self.db.execute(
+                f"CREATE INDEX IF NOT EXISTS {self._table}_accessed ON {self._table} (accessed_at)"
+            )
+            self.db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"翻译缓存文件初始化失败，缓存已禁用: {e}")
+            self.db = None
+            self.backend = 'none'
+
+    @property
+    def _table(self) -> str:
+        """file 后端的表名(按命名空间区分)"""
+        return f"cache_{self.namespace}"
+
+    @property
+    def enabled(self) -> bool:
+        """缓存是否可用"""
+        return self.redis is not None or self.db is not None
+
+    @staticmethod
+    def make_key(model: str, source_lang: str, target_lang: str, prompt_version: str, text: str) -> str:
+        """
+        生成缓存键
+
+        Args:
+            model: 模型名称
+            source_lang: 源语言
+            target_lang: 目标语言
+            prompt_version: 提示词版本(提示词变化后旧缓存自动失效)
+            text: 原文
+
+        Returns:
+            SHA-256 哈希值
+        """
+        raw = '\x1f'.join([model, source_lang, target_lang, prompt_version, text])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, source_text: str = "") -> Optional[str]:
+        """
+        查询缓存
+
+        Args:
+            key: 缓存键
+            source_text: 原文(命中时用于估算节省的 token 数)
+
+        Returns:
+            译文,未命中返回 None
+        """
+        if not self.enabled:
+            return None
+
+        value = self._redis_get(key) if self.redis is not None else self._file_get(key)
+
+        if value is None:
+            self.stats['misses'] += 1
+            return None
+
+        self.stats['hits'] += 1
+        self.stats['tokens_saved'] += estimate_tokens(source_text) + estimate_tokens(value)
+        return value
+
+    def set(self, key: str, value: str):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            value: 译文
+        """
+        if not self.enabled or value is None:
+            return
+
+        if self.redis is not None:
+            self._redis_set(key, value)
+        else:
+            self._file_set(key, value)
+
+    def _redis_get(self, key: str) -> Optional[str]:
+        """Redis 后端查询(命中时刷新 LRU 访问时间)"""
+        try:
+            value = self.redis.get(f"{self.key_prefix}{key}")
+            if value is not None:
+                self.redis.zadd(self.lru_key, {key: time.time()})
+            return value
+        except Exception as e:
+            logger.error(f"查询翻译缓存失败: {e}")
+            return None
+
+    def _redis_set(self, key: str, value: str):
+        """Redis 后端写入,超出容量时淘汰最久未访问的条目"""
+        try:
+            now = time.time()
+            pipe = self.redis.pipeline()
+            pipe.setex(f"{self.key_prefix}{key}", self.ttl_seconds, value)
+            pipe.zadd(self.lru_key, {key: now})
+            # 键按 TTL 过期时 Redis 不会同步删除有序集合成员: 最近访问早于 TTL 的键必然已过期,一并移除
+            pipe.zremrangebyscore(self.lru_key, '-inf', now - self.ttl_seconds)
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+
+            overflow = size - self.max_entries
+            if overflow > 0:
+                evicted = self.redis.zpopmin(self.lru_key, overflow)
+                if evicted:
+                    self.redis.delete(*[f"{self.key_prefix}{k}" for k, _ in evicted])
+                    logger.debug(f"翻译缓存已淘汰 {len(evicted)} 条")
+        except Exception as e:
+            logger.error(f"写入翻译缓存失败: {e}")
+
+    def _file_get(self, key: str) -> Optional[str]:
+        """文件后端查询(过期条目视为未命中)"""
+        try:
+            now = time.time()
+            row = self.db.execute(
+                f"SELECT value, created_at FROM {self._table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self.db.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+
+            self.db.execute(f"UPDATE {self._table} SET accessed_at = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            return value
+        except sqlite3.Error as e:
+            logger.error(f"查询翻译缓存失败: {e}")
+            return None
+
+    def _file_set(self, key: str, value: str):
+        """文件后端写入(每 100 次写入检查一次容量和过期)"""
+        try:
+            now = time.time()
+            self.db.execute(
+                f"INSERT OR REPLACE INTO {self._table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self.db.commit()
+
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 100:
+                self._writes_since_evict = 0
+                self._file_evict()
+        except sqlite3.Error as e:
+            logger.error(f"写入翻译缓存失败: {e}")
+
+    def _file_evict(self):
+        """文件后端: 删除过期条目,并按 LRU 淘汰超出容量的条目"""
+        self.db.execute(f"DELETE FROM {self._table} WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        size = self.db.execute(f"SELECT COUNT(*) FROM {self._table}").fetchone()[0]
+        overflow = size - self.max_entries
+        if overflow > 0:
+            self.db.execute(
+                f"DELETE FROM {self._table} WHERE key IN "
+                f"(SELECT key FROM {self._table} ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+            logger.debug(f"翻译缓存已淘汰 {overflow} 条")
+        self.db.commit()
+
+    def get_stats(self) -> Dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            统计信息字典(含命中率)
+        """
+        stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        stats['backend'] = self.backend
+        return stats
+
+    def close(self):
+        """关闭连接"""
+        try:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+            if self.redis is not None:
+                self.redis.close()
+                self.redis = None
+        except Exception as e:
+            logger.error(f"关闭翻译缓存失败: {e}")
@@ -0,0 +1,222 @@
+"""
+翻译记忆模块
+段落级别复用已翻译内容(免责声明、作者简介、版权页脚等同站点重复段落)
+
+已见过的段落直接从存储中取译文,发送给 LLM 的文本中以占位符保留其位置,
+只有新段落会消耗 token。
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .config import config
+from .markdown_protector import protect
+from .markdown_splitter import FENCE_PATTERN, HEADING_PATTERN, TABLE_ROW_PATTERN, split_blocks
+from .rate_limiter import estimate_tokens
+from .translation_cache import TranslationCache
+from .utils import setup_logger
+
+logger = setup_logger(__name__)
+
+# 已知段落的占位符,如 ⟦TM3⟧
+PLACEHOLDER_PATTERN = re.compile(r'⟦TM(\d+)⟧')
+
+# 段落结构类型(按首行判断,用于校验原文与译文逐段对齐)
+BLOCK_KIND_PATTERNS = [
+    ('fence', FENCE_PATTERN),
+    ('heading', HEADING_PATTERN),
+    ('list', re.compile(r'^\s*(?:[-*+]|\d+[.)])\s')),
+    ('table', TABLE_ROW_PATTERN),
+    ('quote', re.compile(r'^\s*>')),
+]
+
+
+@dataclass
+class PreparedDocument:
+    """经过翻译记忆预处理的文档"""
+    segments: List[str]                  # 原文段落
+    keys: List[Optional[str]]            # 各段落的记忆键(过短的段落为 None)
+    known: Dict[int, str] = field(default_factory=dict)  # 段落索引 -> 已知译文
+    outgoing: str = ""                   # 需要发送给 LLM 的文本(已知段落替换为占位符)
+
+    @property
+    def fully_known(self) -> bool:
+        """是否所有段落都已有译文"""
+        return len(self.known) == len(self.segments)
+
+
+class TranslationMemory:
+    """段落级翻译记忆"""
+
+    def __init__(self, store: Optional[TranslationCache] = None, min_segment_chars: int = None):
+        """
+        初始化翻译记忆
+
+        Args:
+            store: 段落译文存储,默认使用独立命名空间的 TranslationCache
+            min_segment_chars: 参与记忆的最短段落字符数
+        """
+        self.store = store or TranslationCache(
+            namespace="tm",
+            max_entries=config.TRANSLATION_MEMORY_MAX_ENTRIES
+        )
+        self.min_segment_chars = min_segment_chars or config.TRANSLATION_MEMORY_MIN_CHARS
+
+        # 按域名统计: {domain: {'segments': n, 'reused': n, 'tokens_saved': n}}
+        self.domain_stats: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _normalize(segment: str) -> str:
+        """归一化段落(忽略空白差异)"""
+        return ' '.join(segment.split())
+
+    @staticmethod
+    def _block_kind(block: str) -> str:
+        """段落结构类型: 代码块、标题、列表、表格、引用或普通段落"""
+        first_line = block.split('\n', 1)[0]
+        for kind, pattern in BLOCK_KIND_PATTERNS:
+            if pattern.match(first_line):
+                return kind
+        return 'paragraph'
+
+    def _aligned(self, prepared: PreparedDocument, index: int, translated: str) -> bool:
+        """
+        判断译文段落是否与原文段落对应
+
+        已知段落须与记忆中的译文一致(即 ⟦TM⟧ 占位符单独成段、位置不变);
+        新段落须结构类型相同,且受保护片段(⟦P⟧ 占位符还原出的代码、链接、URL)相同。
+
+        Args:
+            prepared: prepare() 的返回值
+            index: 段落索引
+            translated: 同一索引的译文段落
+
+        Returns:
+            是否对应
+        """
+        if index in prepared.known:
+            return self._normalize(translated) == self._normalize(prepared.known[index])
+
+        source = prepared.segments[index]
+        if self._block_kind(source) != self._block_kind(translated):
+            return False
+        # 译文语序可能不同,受保护片段按集合比较
+        return sorted(protect(source)[1]) == sorted(protect(translated)[1])
+
+    def prepare(self, text: str, model: str, source_lang: str, target_lang: str,
+                prompt_version: str, domain: str = "unknown") -> PreparedDocument:
+        """
+        拆分段落并填充已知译文
+
+        Args:
+            text: Markdown 正文
+            model: 模型名称
+            source_lang: 源语言
+            target_lang: 目标语言
+            prompt_version: 提示词版本
+            domain: 来源域名(用于统计复用率)
+
+        Returns:
+            PreparedDocument 对象
+        """
+        segments = split_blocks(text)
+        keys: List[Optional[str]] = []
+        known: Dict[int, str] = {}
+        outgoing_parts = []
+
+        stats = self.domain_stats.setdefault(domain, {'segments': 0, 'reused': 0, 'tokens_saved': 0})
+
+        for i, segment in enumerate(segments):
+            key = None
+            if len(segment) >= self.min_segment_chars:
+                key = TranslationCache.make_key(
+                    model, source_lang, target_lang, prompt_version, self._normalize(segment)
+                )
+                translation = self.store.get(key, segment)
+                if translation is not None:
+                    known[i] = translation
+                    stats['reused'] += 1
+                    stats['tokens_saved'] += estimate_tokens(segment) + estimate_tokens(translation)
+
+            keys.append(key)
+            outgoing_parts.append(f"⟦TM{i}⟧" if i in known else segment)
+            stats['segments'] += 1
+
+        if known:
+            logger.info(f"翻译记忆命中 {len(known)}/{len(segments)} 个段落 ({domain})")
+
+        return PreparedDocument(
+            segments=segments,
+            keys=keys,
+            known=known,
+            outgoing='\n\n'.join(outgoing_parts)
+        )
+
+    def restore(self, prepared: PreparedDocument, translated: str) -> Optional[str]:
+        """
+        将译文中的占位符替换为已知段落译文
+
+        Args:
+            prepared: prepare() 的返回值
+            translated: LLM 返回的译文(全部已知时可为空)
+
+        Returns:
+            完整译文;占位符缺失或被改写时返回 None(调用方应回退为整篇翻译)
+        """
+        if prepared.fully_known:
+            return '\n\n'.join(prepared.known[i] for i in range(len(prepared.segments)))
+
+        found = {int(i) for i in PLACEHOLDER_PATTERN.findall(translated)}
+        if found != set(prepared.known):
+            logger.warning(f"译文中的翻译记忆占位符不完整 (期望 {len(prepared.known)}, 实际 {len(found)})")
+            return None
+
+        return PLACEHOLDER_PATTERN.sub(lambda m: prepared.known[int(m.group(1))], translated)
+
+    def learn(self, prepared: PreparedDocument, restored: str):
+        """
+        记录新段落的译文(仅当译文段落数与原文一致、且逐段对齐时)
+
+        模型合并一段又拆开另一段时段落数仍可能相同,因此逐段校验结构类型、受保护片段
+        和已知段落位置,任一段不对应就整篇跳过(之后的段落可能都已错位)。
+
+        Args:
+            prepared: prepare() 的返回值
+            restored: restore() 后的完整译文
+        """
+        translated_segments = split_blocks(restored)
+        if len(translated_segments) != len(prepared.segments):
+            logger.debug(f"译文段落数不一致 ({len(translated_segments)} != {len(prepared.segments)})，跳过记忆")
+            return
+
+        for i, translated in enumerate(translated_segments):
+            if not self._aligned(prepared, i, translated):
+                logger.debug(f"译文第 {i + 1} 段与原文不对应，跳过记忆")
+                return
+
+        for i, key in enumerate(prepared.keys):
+            if key and i not in prepared.known:
+                self.store.set(key, translated_segments[i])
+
+    def get_stats(self) -> Dict:
+        """
+        获取翻译记忆统计信息
+
+        Returns:
+            统计信息字典(含按域名的复用率)
+        """
+        total_segments = sum(s['segments'] for s in self.domain_stats.values())
+        total_reused = sum(s['reused'] for s in self.domain_stats.values())
+
+        domains = {}
+        for domain, s in self.domain_stats.items():
+            domains[domain] = dict(s, reuse_rate=s['reused'] / s['segments'] if s['segments'] else 0.0)
+
+        return {
+            'segments': total_segments,
+            'reused': total_reused,
+            'reuse_rate': total_reused / total_segments if total_segments else 0.0,
+            'tokens_saved': sum(s['tokens_saved'] for s in self.domain_stats.values()),
+            'domains': domains
+        }
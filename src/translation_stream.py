@@ -0,0 +1,115 @@
+"""
+流式翻译缓冲模块
+翻译过程中模型返回的增量文本追加到缓冲区,存储模块可边翻译边写入文件
+"""
+
+import asyncio
+import re
+from typing import AsyncIterator, Callable, List, Tuple
+
+
+class StreamBuffer:
+    """译文增量缓冲区(单个生产者追加,单个消费者跟随读取)"""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._generation = 0
+        self._changed = asyncio.Event()
+        self.closed = False
+
+    def append(self, text: str):
+        """追加一段译文"""
+        if text:
+            self._parts.append(text)
+            self._changed.set()
+
+    def reset(self):
+        """丢弃已写入的内容(如占位符还原失败后重新翻译)"""
+        self._parts = []
+        self._generation += 1
+        self._changed.set()
+
+    def settle(self, final_text: str):
+        """
+        以最终译文为准: 增量内容与最终结果不一致时整体替换
+
+        Args:
+            final_text: 最终译文
+        """
+        if self.getvalue() != final_text:
+            self.reset()
+            self.append(final_text)
+
+    def close(self):
+        """标记写入完成"""
+        self.closed = True
+        self._changed.set()
+
+    def getvalue(self) -> str:
+        """获取当前缓冲的全部内容"""
+        return ''.join(self._parts)
+
+    async def follow(self) -> AsyncIterator[Tuple[bool, str]]:
+        """
+        跟随读取新追加的内容,直到缓冲区关闭
+
+        Yields:
+            (是否需要从头重写, 新内容)
+        """
+        generation, sent = self._generation, 0
+        while True:
+            self._changed.clear()
+
+            restart = self._generation != generation
+            if restart:
+                generation, sent = self._generation, 0
+
+            if restart or sent < len(self._parts):
+                text = ''.join(self._parts[sent:])
+                sent = len(self._parts)
+                yield restart, text
+
+            if self.closed:
+                return
+            await self._changed.wait()
+
+
+class PlaceholderRestorer:
+    """
+    流式还原占位符: 增量文本经过时把完整的占位符替换为原始片段,
+    不完整的占位符(如只收到 "⟦P1")先暂存,等后续内容到达再处理
+    """
+
+    def __init__(self, sink, pattern: re.Pattern, lookup: Callable[[re.Match], str]):
+        """
+        Args:
+            sink: 下游缓冲区(StreamBuffer 或另一个 PlaceholderRestorer)
+            pattern: 占位符正则
+            lookup: 根据匹配结果返回原始片段
+        """
+        self.sink = sink
+        self.pattern = pattern
+        self.lookup = lookup
+        self._pending = ""
+
+    def append(self, text: str):
+        """处理一段增量文本"""
+        self._pending += text
+        cut = self._pending.rfind('⟦')
+        if cut != -1 and '⟧' not in self._pending[cut:]:
+            ready, self._pending = self._pending[:cut], self._pending[cut:]
+        else:
+            ready, self._pending = self._pending, ""
+        if ready:
+            self.sink.append(self.pattern.sub(self.lookup, ready))
+
+    def flush(self):
+        """输出暂存的剩余内容"""
+        if self._pending:
+            self.sink.append(self.pattern.sub(self.lookup, self._pending))
+            self._pending = ""
+
+    def reset(self):
+        """丢弃暂存内容并通知下游重置"""
+        self._pending = ""
+        self.sink.reset()
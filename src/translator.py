@@ -4,26 +4,78 @@
 """
 
 import asyncio
-from typing import Optional
+import json
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
 
 from openai import AsyncOpenAI
-from langdetect import detect, LangDetectException
 
-from src.utils import setup_logger
+from src.utils import setup_logger, extract_domain
 from src.config import config
 from src.model_capabilities import ModelCapabilityManager
+from src.rate_limiter import get_llm_rate_limiter, estimate_tokens
+from src.markdown_splitter import join_chunks, split_markdown_with_separators
+from src.translation_cache import TranslationCache
+from src.translation_memory import TranslationMemory, PreparedDocument
+from src.micro_batcher import MicroBatcher
+from src.language_detector import get_language_detector
+from src.translation_stream import PlaceholderRestorer
+from src import markdown_protector
+from src.translation_memory import PLACEHOLDER_PATTERN as MEMORY_PLACEHOLDER_PATTERN
 
 logger = setup_logger("translator")
 
+# 当前页面的流式翻译指标(首 token 时间、生成 token 数),由 translate_webpage 设置
+_page_metrics: ContextVar[Optional[dict]] = ContextVar('page_metrics', default=None)
+
+# 提示词版本: 修改提示词后需递增,使旧的翻译缓存失效
+PROMPT_VERSION = "v4"
+
+# 固定的系统提示词放在请求最前面、待翻译文本放在最后,
+# 使每次请求的前缀逐字节一致,可以命中服务端的提示词前缀缓存(DeepSeek / OpenAI 兼容接口)。
+# 注意: 不要在这里拼接任何随请求变化的内容
+TRANSLATION_SYSTEM_PROMPT = """你是一个专业的翻译助手,擅长将英文等外文技术文档、新闻和博客文章翻译成中文。
+
+用户消息的格式固定为:
+第一行给出源语言和目标语言,空一行之后是待翻译文本,直到消息结束。
+
+翻译要求:
+1. 保持原文的 Markdown 格式(标题、列表、引用、表格、代码块、强调等),不要增删格式符号
+2. 专业术语保持准确,常见的产品名、库名、命令名保留原文
+3. 语句通顺自然,符合目标语言的表达习惯,不要逐词硬译
+4. 如果文本中包含 ---FIELD_SEPARATOR--- 分隔符,必须在翻译结果中保留该分隔符的完整位置
+5. 形如 ⟦TM0⟧、⟦P0⟧ 的占位符代表无需翻译的内容,必须原样保留在原位置,不要翻译、改写或删除
+6. 仅返回翻译结果,不要添加额外说明、前言或总结,不要用代码块包裹整个译文"""
+
+# 跨页面短字段批量翻译的系统提示词(同样保持固定不变)
+FIELD_BATCH_SYSTEM_PROMPT = """你是一个专业的翻译助手,负责把网页的标题、摘要等短字段翻译成中文。
+
+用户消息是一个 JSON 字符串数组,每个元素是一个独立的待翻译字段,可能来自不同网页、不同语言。
+
+翻译要求:
+1. 返回 JSON 字符串数组,元素个数和顺序与输入完全一致
+2. 不要合并、拆分或省略任何元素,已经是中文的元素原样返回
+3. 专业术语保持准确,常见的产品名、库名保留原文,语句通顺自然
+4. 仅返回 JSON 数组,不要添加额外说明"""
+
 
 class Translator:
     """DeepSeek 翻译器"""
 
+    # 提示词(系统消息 + 要求说明)预留的 token 数
+    PROMPT_OVERHEAD_TOKENS = 500
+
+    # 可参与跨页面批量翻译的短字段 token 上限
+    SHORT_FIELD_TOKENS = 256
+
     def __init__(
         self,
         api_key: str,
         base_url: str = "https://api.deepseek.com",
-        model: str = "deepseek-chat"
+        model: str = "deepseek-chat",
+        cache: Optional[TranslationCache] = None,
+        memory: Optional[TranslationMemory] = None
     ):
         """
         初始化翻译器
@@ -32,14 +84,54 @@ class Translator:
             api_key: DeepSeek API Key
             base_url: API 基础 URL
             model: 模型名称
+            cache: 翻译缓存(可选),默认按配置创建
+            memory: 段落级翻译记忆(可选),默认按配置创建
         """
-        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+        # 关闭 SDK 内置重试,由共享限流器统一处理 429 和临时错误(连接失败、超时、5xx)的退避重试
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
         self.model = model
         self.base_url = base_url
+        self.rate_limiter = get_llm_rate_limiter()
+        self.language_detector = get_language_detector()
+
+        # 翻译缓存: 相同文本不重复调用 API
+        if cache is None and config.ENABLE_TRANSLATION_CACHE:
+            cache = TranslationCache()
+        self.cache = cache
+
+        # 段落级翻译记忆: 同站点重复段落跨页面复用
+        if memory is None and config.ENABLE_TRANSLATION_MEMORY:
+            memory = TranslationMemory()
+        self.memory = memory
+
+        # 短字段微批处理: 多个页面的标题/摘要合并为一次 JSON 数组请求
+        self.field_batcher = None
+        if config.ENABLE_FIELD_BATCHING:
+            self.field_batcher = MicroBatcher(
+                self._translate_field_batch,
+                max_items=config.FIELD_BATCH_MAX_ITEMS,
+                window_ms=config.FIELD_BATCH_WINDOW_MS
+            )
+
+        # 翻译统计
+        self.stats = {
+            'api_calls': 0,
+            'failed_calls': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'cache_hit_tokens': 0,
+            'protected_spans': 0,
+            'protected_tokens': 0,
+            'streamed_pages': 0,
+            'ttft_total': 0.0,
+            'tokens_per_second_total': 0.0
+        }
 
         # 延迟探测：首次调用翻译方法时进行
         self._max_tokens = None
+        self._max_input_tokens = None
         self._capability_detected = False
+        self._capability_lock = asyncio.Lock()
         logger.info(f"翻译器已初始化: 模型={model}")
 
     @property
@@ -49,31 +141,56 @@ class Translator:
             return 8000  # 翻译模块的默认值
         return self._max_tokens
 
+    @property
+    def max_input_tokens(self) -> int:
+        """获取模型最大输入 token 数"""
+        if self._max_input_tokens is None:
+            return 32000  # 未探测时的保守默认值
+        return self._max_input_tokens
+
+    @property
+    def chunk_tokens(self) -> int:
+        """
+        单次翻译请求的正文 token 上限
+
+        译文长度与原文相当,因此同时受输入和输出上限约束,并预留提示词和译文膨胀的余量。
+        """
+        if config.TRANSLATION_CHUNK_TOKENS > 0:
+            return config.TRANSLATION_CHUNK_TOKENS
+
+        budget = min(self.max_input_tokens - self.PROMPT_OVERHEAD_TOKENS, self.max_tokens)
+        return max(256, int(budget * 0.7))
+
     async def _ensure_capability_detected(self):
-        """确保模型能力已探测（懒加载）"""
+        """确保模型能力已探测（懒加载，并发调用只探测一次）"""
         if self._capability_detected:
             return
 
-        self._capability_detected = True
-
-        if config.ENABLE_MODEL_AUTO_DETECTION:
-            try:
-                capability_mgr = ModelCapabilityManager()
-                # 使用异步方法进行探测（避免事件循环冲突）
-                capability = await capability_mgr.async_get_or_detect(
-                    model=self.model,
-                    base_url=self.base_url,
-                    api_key=self.client.api_key,
-                    timeout=config.MODEL_DETECTION_TIMEOUT
-                )
-                self._max_tokens = capability['max_output_tokens']
-                logger.info(f"使用探测到的 max_tokens: {self._max_tokens}")
-            except Exception as e:
-                logger.warning(f"模型能力探测失败，使用默认值 8000: {e}")
+        async with self._capability_lock:
+            if self._capability_detected:
+                return
+
+            if config.ENABLE_MODEL_AUTO_DETECTION:
+                try:
+                    capability_mgr = ModelCapabilityManager()
+                    # 使用异步方法进行探测（避免事件循环冲突）
+                    capability = await capability_mgr.async_get_or_detect(
+                        model=self.model,
+                        base_url=self.base_url,
+                        api_key=self.client.api_key,
+                        timeout=config.MODEL_DETECTION_TIMEOUT
+                    )
+                    self._max_tokens = capability['max_output_tokens']
+                    self._max_input_tokens = capability['max_input_tokens']
+                    logger.info(f"使用探测到的 max_tokens: {self._max_tokens} (输入上限: {self._max_input_tokens})")
+                except Exception as e:
+                    logger.warning(f"模型能力探测失败，使用默认值 8000: {e}")
+                    self._max_tokens = 8000
+            else:
                 self._max_tokens = 8000
-        else:
-            self._max_tokens = 8000
-            logger.info(f"使用配置的 max_tokens: 8000")
+                logger.info(f"使用配置的 max_tokens: 8000")
+
+            self._capability_detected = True
 
     def detect_language(self, text: str) -> str:
         """
@@ -85,30 +202,16 @@ class Translator:
         Returns:
             语言代码: 'en', 'zh', 'other', 'unknown'
         """
-        if not text or len(text.strip()) < 10:
-            return "unknown"
-
-        try:
-            lang = detect(text[:1000])  # 只检测前 1000 字符以提高速度
-
-            # 简化语言分类
-            if lang == 'en':
-                return 'en'
-            elif lang in ['zh-cn', 'zh-tw']:
-                return 'zh'
-            else:
-                return 'other'
-
-        except LangDetectException as e:
-            logger.warning(f"语言检测失败: {e}")
-            return "unknown"
+        # 文字分布优先、langdetect 兜底,结果按文本哈希缓存
+        return self.language_detector.detect(text)
 
     async def translate(
         self,
         text: str,
         source_lang: str = "en",
         target_lang: str = "zh",
-        skip_detection: bool = False  # 新增参数:跳过语言检测
+        skip_detection: bool = False,  # 新增参数:跳过语言检测
+        sink=None
     ) -> str:
         """
         翻译文本
@@ -118,6 +221,7 @@ class Translator:
             source_lang: 源语言 (默认英文)
             target_lang: 目标语言 (默认中文)
             skip_detection: 是否跳过语言检测(默认False)
+            sink: 流式输出的增量缓冲区(可选),模型返回的译文片段会实时追加到其中
 
         Returns:
             翻译后的文本
@@ -139,7 +243,80 @@ class Translator:
                 logger.warning("无法检测语言,跳过翻译")
                 return text
 
-        # 构建提示词
+        # 查询翻译缓存
+        cache_key = None
+        if self.cache:
+            cache_key = TranslationCache.make_key(self.model, source_lang, target_lang, PROMPT_VERSION, text)
+            cached = self.cache.get(cache_key, text)
+            if cached is not None:
+                logger.info(f"翻译缓存命中: {len(text)} 字符")
+                return cached
+
+        # 代码块、行内代码、图片和链接地址替换为占位符,不发送给模型翻译
+        protected, spans = markdown_protector.protect(text)
+        if spans and not markdown_protector.has_translatable_text(protected):
+            logger.info("文本只包含代码和链接,无需翻译")
+            return text
+
+        # 调用 API
+        try:
+            logger.info(f"正在翻译: {len(text)} 字符...")
+
+            # 流式输出时先还原保护占位符,再交给下游缓冲区
+            stream_sink = sink
+            if sink is not None and spans:
+                stream_sink = PlaceholderRestorer(
+                    sink, markdown_protector.PLACEHOLDER_PATTERN,
+                    lambda m: spans[int(m.group(1))] if int(m.group(1)) < len(spans) else m.group(0)
+                )
+
+            translated = await self._chat(
+                self._build_prompt(protected, source_lang, target_lang),
+                on_delta=stream_sink.append if stream_sink is not None else None
+            )
+            if isinstance(stream_sink, PlaceholderRestorer):
+                stream_sink.flush()
+
+            if spans:
+                translated, missing = markdown_protector.restore(translated, spans)
+                if missing:
+                    logger.warning(f"译文中缺失 {len(missing)} 个保护占位符,改为不替换直接翻译")
+                    if sink is not None:
+                        sink.reset()
+                    translated = await self._chat(
+                        self._build_prompt(text, source_lang, target_lang),
+                        on_delta=sink.append if sink is not None else None
+                    )
+                else:
+                    # 被替换的片段既不占输入也不占输出
+                    saved = estimate_tokens(text) - estimate_tokens(protected)
+                    self.stats['protected_spans'] += len(spans)
+                    self.stats['protected_tokens'] += max(0, saved) * 2
+
+            if cache_key:
+                self.cache.set(cache_key, translated)
+
+            logger.info(f"翻译成功: {len(text)} 字符 → {len(translated)} 字符")
+            return translated
+
+        except Exception as e:
+            self.stats['failed_calls'] += 1
+            logger.error(f"翻译失败: {e}")
+            return text  # 失败时返回原文
+
+    @staticmethod
+    def _build_prompt(text: str, source_lang: str, target_lang: str) -> str:
+        """
+        构建翻译请求的用户消息(固定要求见 TRANSLATION_SYSTEM_PROMPT)
+
+        Args:
+            text: 待翻译文本
+            source_lang: 源语言
+            target_lang: 目标语言
+
+        Returns:
+            用户消息
+        """
         lang_names = {
             "en": "英文", "zh": "中文", "zh-cn": "简体中文", "zh-tw": "繁体中文",
             "ja": "日文", "ko": "韩文", "fr": "法文", "de": "德文",
@@ -149,42 +326,379 @@ class Translator:
         source_name = lang_names.get(source_lang, source_lang)
         target_name = lang_names.get(target_lang, target_lang)
 
-        prompt = f"""请将以下{source_name}文本翻译成{target_name}:
+        # 可变部分只放在用户消息中,且位于系统提示词之后
+        return f"源语言: {source_name} → 目标语言: {target_name}\n\n{text}"
 
-{text}
+    async def _chat(
+        self,
+        prompt: str,
+        system_prompt: str = TRANSLATION_SYSTEM_PROMPT,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        经共享限流器调用一次对话接口并记录 token 用量
 
-要求:
-1. 保持原文的 Markdown 格式(标题、列表、代码块等)
-2. 专业术语保持准确
-3. 语句通顺自然
-4. 如果文本中包含 ---FIELD_SEPARATOR--- 分隔符,必须在翻译结果中保留该分隔符的完整位置
-5. 仅返回翻译结果,不要添加额外说明"""
+        Args:
+            prompt: 用户消息
+            system_prompt: 系统提示词(固定前缀)
+            on_delta: 流式模式下每收到一段译文时的回调(可选)
 
-        # 调用 API
-        try:
-            logger.info(f"正在翻译: {len(text)} 字符...")
+        Returns:
+            模型返回的文本(已去除首尾空白)
+        """
+        # 估算本次请求 token 数(输入 + 约等长的输出),用于 TPM 限流
+        estimated = estimate_tokens(prompt) * 2 + estimate_tokens(system_prompt)
+        self.stats['api_calls'] += 1
+
+        request = dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,  # 降低随机性,提高翻译稳定性
+            max_tokens=self.max_tokens   # 使用探测到的 max_tokens
+        )
+
+        if config.TRANSLATION_STREAMING:
+            content, usage = await self._chat_stream(request, estimated, on_delta)
+        else:
+            response = await self.rate_limiter.call(
+                self.client.chat.completions.create,
+                estimated_tokens=estimated,
+                **request
+            )
+            usage = getattr(response, 'usage', None)
+            content = response.choices[0].message.content
+            if on_delta:
+                on_delta(content)
+
+        if usage:
+            self.stats['prompt_tokens'] += usage.prompt_tokens or 0
+            self.stats['completion_tokens'] += usage.completion_tokens or 0
+            self.stats['cache_hit_tokens'] += self._cached_prompt_tokens(usage)
+            self.rate_limiter.record_usage(estimated, usage.total_tokens or 0)
+
+            metrics = _page_metrics.get()
+            if metrics is not None:
+                metrics['completion_tokens'] += usage.completion_tokens or 0
+
+        return content.strip()
+
+    async def _chat_stream(self, request: dict, estimated: int,
+                           on_delta: Optional[Callable[[str], None]]) -> Tuple[str, object]:
+        """
+        流式调用对话接口,边接收边回调
+
+        Args:
+            request: 请求参数
+            estimated: 估算 token 数(用于限流)
+            on_delta: 每收到一段译文时的回调
+
+        Returns:
+            (完整文本, usage 对象)
+        """
+        stream = await self.rate_limiter.call(
+            self.client.chat.completions.create,
+            estimated_tokens=estimated,
+            stream=True,
+            stream_options={"include_usage": True},
+            **request
+        )
+
+        metrics = _page_metrics.get()
+        parts = []
+        usage = None
+
+        async for chunk in stream:
+            if getattr(chunk, 'usage', None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+
+            if metrics is not None:
+                now = time.monotonic()
+                if metrics['first_token'] is None:
+                    metrics['first_token'] = now
+                metrics['last_token'] = now
+
+            parts.append(delta)
+            if on_delta:
+                on_delta(delta)
+
+        return ''.join(parts), usage
+
+    @staticmethod
+    def _cached_prompt_tokens(usage) -> int:
+        """
+        读取服务端提示词前缀缓存命中的 token 数
+
+        DeepSeek 返回 usage.prompt_cache_hit_tokens,
+        OpenAI 兼容接口返回 usage.prompt_tokens_details.cached_tokens。
+
+        Args:
+            usage: 响应中的 usage 对象
+
+        Returns:
+            命中缓存的输入 token 数(接口未返回时为 0)
+        """
+        hit = getattr(usage, 'prompt_cache_hit_tokens', None)
+        if hit is None:
+            # SDK 未声明的字段保存在 model_extra 中
+            hit = (getattr(usage, 'model_extra', None) or {}).get('prompt_cache_hit_tokens')
+        if hit is None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            hit = getattr(details, 'cached_tokens', None) if details else None
+        return hit or 0
+
+    def get_stats(self) -> dict:
+        """
+        获取翻译统计信息(含限流指标)
+
+        Returns:
+            统计信息字典
+        """
+        stats = dict(self.stats)
+        stats['rate_limiter'] = self.rate_limiter.get_stats()
+        stats['language_detection'] = self.language_detector.get_stats()
+        if self.cache:
+            stats['cache'] = self.cache.get_stats()
+        if self.memory:
+            stats['memory'] = self.memory.get_stats()
+        if self.field_batcher:
+            stats['field_batches'] = self.field_batcher.get_stats()
+        return stats
+
+    async def translate_document(self, text: str, source_lang: str = "en", target_lang: str = "zh",
+                                 sink=None) -> str:
+        """
+        翻译长文档: 按 Markdown 结构分块后并发翻译,再按原顺序拼接
 
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "你是一个专业的翻译助手,擅长将英文技术文档翻译成中文。"
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,  # 降低随机性,提高翻译稳定性
-                max_tokens=self.max_tokens   # 使用探测到的 max_tokens
+        每个分块独立经过限流器,整体耗时取决于最慢的分块而非全文长度。
+
+        Args:
+            text: Markdown 文本
+            source_lang: 源语言
+            target_lang: 目标语言
+            sink: 增量缓冲区(可选);单块时逐 token 写入,多块时按顺序逐块写入
+
+        Returns:
+            翻译后的文本
+        """
+        await self._ensure_capability_detected()
+
+        chunks = split_markdown_with_separators(text, self.chunk_tokens)
+        if len(chunks) <= 1:
+            if sink is not None:
+                return await self.translate(text, source_lang=source_lang, target_lang=target_lang,
+                                            skip_detection=True, sink=sink)
+            return await self.translate(text, source_lang=source_lang, target_lang=target_lang, skip_detection=True)
+
+        logger.info(f"正文较长({len(text)} 字符),分为 {len(chunks)} 块并发翻译 (每块上限 {self.chunk_tokens} tokens)")
+
+        tasks = [
+            asyncio.ensure_future(
+                self.translate(chunk, source_lang=source_lang, target_lang=target_lang, skip_detection=True)
             )
+            for chunk, _ in chunks
+        ]
+        separators = [separator for _, separator in chunks]
 
-            translated = response.choices[0].message.content.strip()
+        # 按原顺序等待: 前面的分块完成后立即写入缓冲区,不必等全部分块完成
+        if sink is not None:
+            for i, task in enumerate(tasks):
+                translated_chunk = await task
+                sink.append(translated_chunk if i == 0 else separators[i - 1] + translated_chunk)
 
-            logger.info(f"翻译成功: {len(text)} 字符 → {len(translated)} 字符")
-            return translated
+        translated_chunks = await asyncio.gather(*tasks)
+
+        return join_chunks(translated_chunks, separators)
+
+    async def _translate_fields(self, fields: List[Tuple[str, str]], source_lang: str) -> Dict[str, str]:
+        """
+        一次 API 调用批量翻译多个字段(以分隔符拼接)
+
+        Args:
+            fields: [(字段名, 文本), ...] 列表
+            source_lang: 源语言
+
+        Returns:
+            {字段名: 译文} 字典(失败的字段保留原文)
+        """
+        results = {}
+        if not fields:
+            return results
+
+        try:
+            # 构建批量翻译文本
+            field_names = [name for name, _ in fields]
+            texts = [text for _, text in fields]
+
+            # 使用特殊分隔符组合多个字段
+            combined_text = "\n\n---FIELD_SEPARATOR---\n\n".join(texts)
+            total_chars = sum(len(t) for t in texts)
+
+            logger.info(f"批量翻译 {len(fields)} 个字段: {total_chars} 字符...")
+
+            # 调用翻译API(一次调用)，传递检测到的源语言
+            translated_combined = await self.translate(combined_text, source_lang=source_lang, skip_detection=True)
+
+            # 分割翻译结果
+            translated_parts = translated_combined.split("---FIELD_SEPARATOR---")
+
+            # 映射回对应字段
+            for i, field_name in enumerate(field_names):
+                if i < len(translated_parts):
+                    results[field_name] = translated_parts[i].strip()
+                else:
+                    logger.warning(f"[{field_name}] 翻译结果缺失,保留原文")
+                    results[field_name] = texts[i]
+
+            translated_chars = sum(len(results[name]) for name in field_names)
+            logger.info(f"批量翻译成功: {total_chars} 字符 → {translated_chars} 字符")
 
         except Exception as e:
-            logger.error(f"翻译失败: {e}")
-            return text  # 失败时返回原文
+            logger.error(f"批量翻译失败,降级为逐个翻译: {e}")
+            # 降级:逐个翻译
+            for field_name, text in fields:
+                try:
+                    # 检测每个字段的语言
+                    field_lang = self.detect_language(text)
+                    results[field_name] = await self.translate(text, source_lang=field_lang, skip_detection=True)
+                except Exception as inner_e:
+                    logger.error(f"翻译 {field_name} 失败: {inner_e}")
+                    results[field_name] = text
+
+        return results
+
+    @staticmethod
+    def _parse_json_array(content: str) -> Optional[List[str]]:
+        """
+        解析模型返回的 JSON 字符串数组(兼容 ```json 代码块包裹)
+
+        Args:
+            content: 模型返回的文本
+
+        Returns:
+            字符串列表,格式不正确时返回 None
+        """
+        content = content.strip()
+        if content.startswith("```"):
+            content = content.split("\n", 1)[-1]
+            content = content.rsplit("```", 1)[0]
+
+        try:
+            items = json.loads(content)
+        except ValueError:
+            return None
+
+        if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
+            return None
+        return items
+
+    async def _translate_field_batch(self, items: List[Tuple[str, str]]) -> List[str]:
+        """
+        微批处理回调: 一次请求翻译多个页面的短字段
+
+        Args:
+            items: [(文本, 源语言), ...] 列表
+
+        Returns:
+            与输入等长的译文列表(返回格式不正确时降级为逐个翻译)
+        """
+        await self._ensure_capability_detected()
+
+        # 批处理任务由多个页面共享,不计入触发批处理的页面的流式指标
+        _page_metrics.set(None)
+
+        texts = [text for text, _ in items]
+        prompt = json.dumps(texts, ensure_ascii=False)
+
+        logger.info(f"批量翻译 {len(texts)} 个短字段(跨页面合并)...")
+
+        try:
+            translated = self._parse_json_array(await self._chat(prompt, FIELD_BATCH_SYSTEM_PROMPT))
+        except Exception as e:
+            self.stats['failed_calls'] += 1
+            logger.error(f"短字段批量翻译失败: {e}")
+            return texts
+
+        if translated is None or len(translated) != len(texts):
+            logger.warning("短字段批量翻译结果格式不正确或数量不一致,降级为逐个翻译")
+            return await asyncio.gather(*[
+                self.translate(text, source_lang=lang, skip_detection=True) for text, lang in items
+            ])
+
+        return [t.strip() for t in translated]
+
+    async def _translate_fields_batched(self, fields: List[Tuple[str, str, str]]) -> Dict[str, str]:
+        """
+        通过微批处理器翻译短字段(与其他页面的短字段合并为一次请求)
+
+        Args:
+            fields: [(字段名, 文本, 该字段的源语言), ...] 列表
+
+        Returns:
+            {字段名: 译文} 字典
+        """
+        results = {}
+        pending = []
+
+        for field_name, text, source_lang in fields:
+            cache_key = None
+            if self.cache:
+                cache_key = TranslationCache.make_key(self.model, source_lang, "zh", PROMPT_VERSION, text)
+                cached = self.cache.get(cache_key, text)
+                if cached is not None:
+                    results[field_name] = cached
+                    continue
+            pending.append((field_name, text, source_lang, cache_key))
+
+        translations = await asyncio.gather(*[
+            self.field_batcher.submit((text, source_lang)) for _, text, source_lang, _ in pending
+        ])
+
+        for (field_name, text, _, cache_key), translated in zip(pending, translations):
+            results[field_name] = translated
+            if cache_key and translated != text:
+                self.cache.set(cache_key, translated)
+
+        return results
+
+    async def _restore_memory(self, prepared: PreparedDocument, translated: str,
+                              original: str, source_lang: str, sink=None) -> str:
+        """
+        还原翻译记忆占位符并学习新段落
+
+        Args:
+            prepared: 翻译记忆预处理结果
+            translated: LLM 返回的译文(含占位符)
+            original: 原始正文
+            source_lang: 源语言
+            sink: 流式输出的增量缓冲区(回退为整篇翻译时重新写入)
+
+        Returns:
+            完整译文
+        """
+        # 译文与发送文本相同说明翻译失败(translate 失败时返回原文),不写入记忆
+        if translated.strip() == prepared.outgoing.strip():
+            return self.memory.restore(prepared, translated) or original
+
+        restored = self.memory.restore(prepared, translated)
+        if restored is None:
+            logger.warning("翻译记忆占位符还原失败,回退为整篇翻译")
+            if sink is not None:
+                sink.reset()
+            restored = await self.translate_document(original, source_lang=source_lang, sink=sink)
+            if restored.strip() == original.strip():
+                return restored
+
+        self.memory.learn(prepared, restored)
+        return restored
 
     async def translate_webpage(self, page) -> 'WebPage':
         """
@@ -209,6 +723,57 @@ class Translator:
 
         logger.info(f"检测到非中文内容({content_lang}),开始翻译...")
 
+        # 流式翻译: 正文译文实时写入 page.stream,并统计首 token 时间和生成速度
+        stream = getattr(page, 'stream', None)
+        metrics = {'start': time.monotonic(), 'first_token': None, 'last_token': None, 'completion_tokens': 0}
+        metrics_token = _page_metrics.set(metrics)
+        try:
+            await self._translate_page_fields(page, content_lang, stream)
+        finally:
+            _page_metrics.reset(metrics_token)
+            if stream is not None:
+                stream.close()
+
+        self._record_page_metrics(page, metrics)
+
+        # 5. 标记已翻译
+        page.translated = True
+        page.original_language = content_lang
+
+        logger.info("网页翻译完成")
+        return page
+
+    def _record_page_metrics(self, page, metrics: dict):
+        """
+        记录单个页面的流式翻译指标(首 token 时间、每秒生成 token 数)
+
+        Args:
+            page: WebPage 对象
+            metrics: translate_webpage 收集的指标
+        """
+        if metrics['first_token'] is None:
+            return
+
+        ttft = metrics['first_token'] - metrics['start']
+        duration = metrics['last_token'] - metrics['first_token']
+        tps = metrics['completion_tokens'] / duration if duration > 0 else 0.0
+
+        page.translation_ttft = ttft
+        page.translation_tps = tps
+        self.stats['streamed_pages'] += 1
+        self.stats['ttft_total'] += ttft
+        self.stats['tokens_per_second_total'] += tps
+        logger.info(f"翻译指标: 首 token {ttft:.2f} 秒, {tps:.1f} tokens/秒 ({page.url})")
+
+    async def _translate_page_fields(self, page, content_lang: str, stream=None):
+        """
+        翻译网页的各个字段并写回 WebPage 对象
+
+        Args:
+            page: WebPage 对象
+            content_lang: 正文语言
+            stream: 正文译文的增量缓冲区(可选)
+        """
         # 2. 收集需要翻译的字段
         translation_tasks = []
 
@@ -229,8 +794,11 @@ class Translator:
 
         # 3.1 过滤需要翻译的字段
         fields_to_translate = []
+        field_langs = {}
         for field_name, text in translation_tasks:
-            field_lang = self.detect_language(text)
+            # 正文语言已在第 1 步检测过,不重复检测
+            field_lang = content_lang if field_name == "content" else self.detect_language(text)
+            field_langs[field_name] = field_lang
             if field_lang == "unknown":
                 logger.debug(f"[{field_name}] 无法检测语言,保留原文")
                 results[field_name] = text
@@ -240,47 +808,78 @@ class Translator:
             else:
                 fields_to_translate.append((field_name, text))
 
-        # 3.2 批量翻译所有字段(一次API调用)
-        if fields_to_translate:
-            try:
-                # 构建批量翻译文本
-                field_names = [name for name, _ in fields_to_translate]
-                texts = [text for _, text in fields_to_translate]
-
-                # 使用特殊分隔符组合多个字段
-                combined_text = "\n\n---FIELD_SEPARATOR---\n\n".join(texts)
-                total_chars = sum(len(t) for t in texts)
-
-                logger.info(f"批量翻译 {len(fields_to_translate)} 个字段: {total_chars} 字符...")
-
-                # 调用翻译API(一次调用)，传递检测到的源语言
-                translated_combined = await self.translate(combined_text, source_lang=content_lang, skip_detection=True)
-
-                # 分割翻译结果
-                translated_parts = translated_combined.split("---FIELD_SEPARATOR---")
-
-                # 映射回对应字段
-                for i, field_name in enumerate(field_names):
-                    if i < len(translated_parts):
-                        results[field_name] = translated_parts[i].strip()
-                    else:
-                        logger.warning(f"[{field_name}] 翻译结果缺失,保留原文")
-                        results[field_name] = texts[i]
-
-                translated_chars = sum(len(results[name]) for name in field_names)
-                logger.info(f"批量翻译成功: {total_chars} 字符 → {translated_chars} 字符")
-
-            except Exception as e:
-                logger.error(f"批量翻译失败,降级为逐个翻译: {e}")
-                # 降级:逐个翻译
-                for field_name, text in fields_to_translate:
-                    try:
-                        # 检测每个字段的语言
-                        field_lang = self.detect_language(text)
-                        results[field_name] = await self.translate(text, source_lang=field_lang, skip_detection=True)
-                    except Exception as inner_e:
-                        logger.error(f"翻译 {field_name} 失败: {inner_e}")
-                        results[field_name] = text
+        # 3.2 翻译记忆: 正文中已见过的段落直接复用,只发送新段落(已知段落以占位符保留位置)
+        prepared = None
+        original_content = None
+        for i, (field_name, text) in enumerate(fields_to_translate):
+            if field_name == "content" and self.memory:
+                original_content = text
+                prepared = self.memory.prepare(
+                    text, self.model, content_lang, "zh", PROMPT_VERSION, extract_domain(page.url)
+                )
+                if prepared.fully_known:
+                    fields_to_translate.pop(i)
+                    results["content"] = self.memory.restore(prepared, "")
+                    prepared = None
+                else:
+                    fields_to_translate[i] = ("content", prepared.outgoing)
+                break
+
+        # 3.3 正文超过单次请求上限(或需要流式写入)时单独翻译,其余字段仍合并为一次调用
+        await self._ensure_capability_detected()
+        long_content = None
+        combined_tokens = sum(estimate_tokens(text) for _, text in fields_to_translate)
+        if combined_tokens > self.chunk_tokens or stream is not None:
+            for i, (field_name, text) in enumerate(fields_to_translate):
+                if field_name == "content":
+                    long_content = fields_to_translate.pop(i)[1]
+                    break
+
+        # 3.4 字段批量翻译与正文分块翻译并发执行
+        only_short_fields = (
+            self.field_batcher is not None
+            and fields_to_translate
+            and all(name != "content" and estimate_tokens(text) <= self.SHORT_FIELD_TOKENS
+                    for name, text in fields_to_translate)
+        )
+        if only_short_fields:
+            # 只剩标题/摘要等短字段时与其他页面合并翻译,避免每页一次完整往返
+            # 缓存键使用各字段自己的语言(标题可能与正文语言不同)
+            fields_coro = self._translate_fields_batched(
+                [(name, text, field_langs[name]) for name, text in fields_to_translate]
+            )
+        else:
+            fields_coro = self._translate_fields(fields_to_translate, content_lang)
+
+        if long_content is not None:
+            # 流式写入前先还原翻译记忆占位符
+            content_sink = stream
+            if stream is not None and prepared is not None:
+                content_sink = PlaceholderRestorer(
+                    stream, MEMORY_PLACEHOLDER_PATTERN,
+                    lambda m: prepared.known.get(int(m.group(1)), m.group(0))
+                )
+
+            field_results, translated_content = await asyncio.gather(
+                fields_coro,
+                self.translate_document(long_content, source_lang=content_lang, sink=content_sink)
+            )
+            if isinstance(content_sink, PlaceholderRestorer):
+                content_sink.flush()
+            results.update(field_results)
+            results["content"] = translated_content
+        else:
+            results.update(await fields_coro)
+
+        # 3.5 还原翻译记忆占位符,并记录新段落译文
+        if prepared is not None and "content" in results:
+            results["content"] = await self._restore_memory(
+                prepared, results["content"], original_content, content_lang, sink=stream
+            )
+
+        # 增量内容以最终译文为准(缓存命中、失败回退等情况不经过流式输出)
+        if stream is not None and "content" in results:
+            stream.settle(results["content"])
 
         # 4. 更新 WebPage 对象
         if "title" in results:
@@ -300,10 +899,3 @@ class Translator:
 
         if "author" in results:
             page.author = results["author"]
-
-        # 5. 标记已翻译
-        page.translated = True
-        page.original_language = content_lang
-
-        logger.info("网页翻译完成")
-        return page
@@ -5,21 +5,111 @@ URL列表模式模块 (V1.0)
 
 import json
 import asyncio
+import codecs
+import concurrent.futures
 import sys
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, AsyncIterator, Iterable, Iterator, TextIO, Union
 from urllib.parse import urlparse
 
 from .async_fetcher import AsyncWebFetcher, WebPage
+from .image_downloader import get_image_download_service, shutdown_image_download_service
 from .utils import setup_logger
 from .config import config
 
+try:
+    import orjson
+except ImportError:  # orjson 未安装时使用标准库 json
+    orjson = None
+
 logger = setup_logger(__name__)
 
+# 输入读取线程每次最多读取的字节数,以及队列中最多缓存的块数
+READ_CHUNK_SIZE = 64 * 1024
+READ_QUEUE_SIZE = 4
+
+
+def dumps_line(obj: Any) -> str:
+    """
+    将对象编码为单行紧凑 JSON(优先使用 orjson)
+
+    Args:
+        obj: 可 JSON 序列化的对象
+
+    Returns:
+        不含换行的 JSON 字符串(非 ASCII 字符不转义)
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def _read_chunks(stream: TextIO) -> Iterator[str]:
+    """
+    按块读取文本流,有多少读多少,不等待凑满整块
+
+    Args:
+        stream: 文本输入流(文件、标准输入或 StringIO)
+
+    Yields:
+        解码后的文本块
+    """
+    raw = getattr(stream, 'buffer', None)
+    if raw is None or not hasattr(raw, 'read1'):
+        # StringIO 等没有底层字节缓冲的流
+        while True:
+            chunk = stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    decoder = codecs.getincrementaldecoder(stream.encoding or 'utf-8')(errors=stream.errors or 'strict')
+    while True:
+        data = raw.read1(READ_CHUNK_SIZE)
+        if not data:
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(data)
+
+
+def _feed_queue(stream: TextIO, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue,
+                stop: threading.Event) -> None:
+    """
+    读取线程: 把输入块放入有界队列,读到末尾放入 None,读取出错放入异常
+
+    Args:
+        stream: 文本输入流
+        loop: 消费方所在的事件循环
+        queue: 有界队列(满时阻塞读取,避免提前读入大量输入)
+        stop: 消费方提前结束时设置,线程随即退出
+    """
+    def put(item) -> bool:
+        if stop.is_set():
+            return False
+        try:
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+            return True
+        except (RuntimeError, concurrent.futures.CancelledError):
+            # 事件循环已关闭或正在退出
+            return False
+
+    try:
+        for chunk in _read_chunks(stream):
+            if not put(chunk):
+                return
+    except (OSError, ValueError) as e:
+        put(e)
+        return
+    put(None)
+
 
 class URLListMode:
     """URL列表模式处理器"""
 
-    def __init__(self, concurrency: int = None, use_playwright: bool = True, with_images: bool = False):
+    def __init__(self, concurrency: int = None, use_playwright: bool = True, with_images: bool = False,
+                 ndjson: bool = False):
         """
         初始化URL列表模式
 
@@ -27,10 +117,12 @@ class URLListMode:
             concurrency: 并发数，默认使用配置中的值
             use_playwright: 是否启用Playwright动态渲染
             with_images: 是否提取页面中的图片链接
+            ndjson: 是否逐行流式输出 NDJSON(每完成一个URL输出一行)
         """
         self.concurrency = concurrency or config.CONCURRENCY
         self.use_playwright = use_playwright
         self.with_images = with_images
+        self.ndjson = ndjson
         self.fetcher = AsyncWebFetcher(
             use_playwright=use_playwright,
             concurrency=self.concurrency
@@ -92,6 +184,53 @@ class URLListMode:
         logger.info(f"解析得到 {len(valid_urls)} 个有效URL")
         return valid_urls
 
+    async def read_url_lines(self, stream: TextIO) -> AsyncIterator[str]:
+        """
+        逐行读取URL(每行一个或逗号分隔多个,跳过空行和 # 注释行)
+
+        读取在独立的守护线程中按块进行,经有界队列交给事件循环: 等待上游输入时不阻塞
+        正在进行的爬取;提前结束时阻塞在标准输入上的线程也不会拖住事件循环退出。
+
+        Args:
+            stream: 文本输入流(文件或标准输入)
+
+        Yields:
+            有效的URL
+        """
+        queue = asyncio.Queue(maxsize=READ_QUEUE_SIZE)
+        stop = threading.Event()
+        threading.Thread(
+            target=_feed_queue, args=(stream, asyncio.get_running_loop(), queue, stop),
+            name='url-reader', daemon=True
+        ).start()
+
+        pending = ''
+        try:
+            while True:
+                chunk = await queue.get()
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if chunk is None:
+                    # 末尾没有换行的最后一行
+                    lines = [pending]
+                else:
+                    *lines, pending = (pending + chunk).split('\n')
+
+                for line in lines:
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    for url in self.validate_urls(line.split(',')):
+                        yield url
+
+                if chunk is None:
+                    return
+        finally:
+            stop.set()
+            # 放行阻塞在 queue.put 上的读取线程
+            while not queue.empty():
+                queue.get_nowait()
+
     def webpage_to_dict(self, webpage: WebPage) -> Dict[str, Any]:
         """
         将WebPage对象转换为指定的JSON格式
@@ -111,10 +250,8 @@ class URLListMode:
 
         # 如果启用图片提取，添加 images 字段
         if self.with_images and webpage.success:
-            # 使用 AsyncImageDownloader 的图片提取逻辑
-            from .image_downloader import AsyncImageDownloader
-            downloader = AsyncImageDownloader(base_url=webpage.url)
-            image_urls = downloader.extract_image_urls(webpage.content)
+            # 使用进程级图片服务的提取逻辑
+            image_urls = get_image_download_service().extract_image_urls(webpage.content, webpage.url)
             # 提取完整URL列表（去掉alt_text和原始URL）
             result["images"] = [img_url for _, _, img_url in image_urls]
 
@@ -136,41 +273,96 @@ class URLListMode:
         webpages = await self.fetcher.fetch_batch(urls)
 
         # 转换为输出格式
-        results = []
-        successful_count = 0
-        failed_count = 0
+        results = [self.to_result(webpage) for webpage in webpages]
+
+        successful_count = sum(1 for webpage in webpages if webpage.success)
+        failed_count = len(webpages) - successful_count
+        logger.info(f"处理完成: 成功 {successful_count} 个，失败 {failed_count} 个")
+        return results
+
+    def to_result(self, webpage: WebPage) -> Dict[str, Any]:
+        """
+        将爬取结果转换为输出格式(失败时也输出基本信息)
 
-        for webpage in webpages:
+        Args:
+            webpage: WebPage对象
+
+        Returns:
+            符合输出格式的字典
+        """
+        if webpage.success:
+            logger.info(f"✓ 成功处理: {webpage.url}")
+            return self.webpage_to_dict(webpage)
+
+        logger.error(f"✗ 处理失败: {webpage.url} - {webpage.error}")
+        return {
+            "title": "获取失败",
+            "summary": "",
+            "content": f"获取失败: {webpage.error or '未知错误'}",
+            "url": webpage.url
+        }
+
+    async def stream_ndjson(self, urls: Union[Iterable[str], AsyncIterator[str]], out: TextIO = None) -> None:
+        """
+        按完成顺序逐行输出 NDJSON,每个结果写出后立即刷新
+
+        输出后的页面不再保留;URL 为异步迭代器时边读取边爬取,
+        在途请求不超过 CRAWL_WORKERS(0 表示并发数的 2 倍),内存占用与URL数量无关。
+        每行是一个完整页面: 启用翻译时等整页译文完成后才输出,不输出翻译中的部分译文。
+
+        Args:
+            urls: URL列表或异步迭代器(如 read_url_lines 的结果)
+            out: 输出流，默认为标准输出
+        """
+        out = out or sys.stdout
+        max_in_flight = config.CRAWL_WORKERS or self.concurrency * 2
+        if isinstance(urls, list):
+            logger.info(f"开始处理 {len(urls)} 个URL (NDJSON 流式输出)")
+        else:
+            logger.info(f"开始流式读取URL (NDJSON 流式输出, 最多 {max_in_flight} 个在途)")
+
+        successful = failed = 0
+        async for webpage in self.fetcher.fetch_as_completed(urls, max_in_flight=max_in_flight):
+            out.write(dumps_line(self.to_result(webpage)) + "\n")
+            out.flush()
             if webpage.success:
-                result = self.webpage_to_dict(webpage)
-                results.append(result)
-                successful_count += 1
-                logger.info(f"✓ 成功处理: {webpage.url}")
+                successful += 1
             else:
-                # 即使失败也输出基本信息
-                result = {
-                    "title": "获取失败",
-                    "summary": "",
-                    "content": f"获取失败: {webpage.error or '未知错误'}",
-                    "url": webpage.url
-                }
-                results.append(result)
-                failed_count += 1
-                logger.error(f"✗ 处理失败: {webpage.url} - {webpage.error}")
+                failed += 1
 
-        logger.info(f"处理完成: 成功 {successful_count} 个，失败 {failed_count} 个")
-        return results
+        # 统计信息输出到stderr（不影响NDJSON输出）
+        print(f"\n处理统计: 成功 {successful} 个，失败 {failed} 个", file=sys.stderr)
 
-    async def run(self, url_string: str) -> None:
+    async def run(self, url_string: str = None, urls_file: str = None) -> None:
         """
         运行URL列表模式
 
         Args:
-            url_string: 逗号分隔的URL字符串
+            url_string: 逗号分隔的URL字符串,"-" 表示从标准输入逐行读取
+            urls_file: URL 文件路径(每行一个),"-" 表示标准输入
         """
+        stream = None
         try:
-            # 解析URL
-            urls = self.parse_url_string(url_string)
+            if urls_file or url_string == '-':
+                # 从文件或标准输入逐行读取
+                path = urls_file or '-'
+                stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+                urls = self.read_url_lines(stream)
+            else:
+                # 解析URL
+                urls = self.parse_url_string(url_string)
+
+            if self.ndjson:
+                # 逐个完成逐行输出
+                await self.stream_ndjson(urls)
+                return
+
+            if not isinstance(urls, list):
+                # 输出 JSON 数组需要全部结果,先读完所有 URL
+                urls = [url async for url in urls]
+                if not urls:
+                    logger.error("没有找到有效的URL")
+                    sys.exit(1)
 
             # 处理URL
             results = await self.process_urls(urls)
@@ -184,6 +376,10 @@ class URLListMode:
         except Exception as e:
             logger.error(f"处理过程中发生错误: {e}")
             sys.exit(1)
+        finally:
+            if stream is not None and stream is not sys.stdin:
+                stream.close()
+            await shutdown_image_download_service()
 
     def output_json(self, results: List[Dict[str, Any]]) -> None:
         """
@@ -207,15 +403,19 @@ class URLListMode:
             sys.exit(1)
 
 
-async def run_url_list_mode(url_string: str, concurrency: int = None, use_playwright: bool = True, with_images: bool = False):
+async def run_url_list_mode(url_string: str = None, concurrency: int = None, use_playwright: bool = True,
+                            with_images: bool = False, ndjson: bool = False, urls_file: str = None):
     """
     运行URL列表模式的便捷函数
 
     Args:
-        url_string: 逗号分隔的URL字符串
+        url_string: 逗号分隔的URL字符串,"-" 表示从标准输入读取
         concurrency: 并发数
         use_playwright: 是否启用Playwright
         with_images: 是否提取页面中的图片链接
+        ndjson: 是否逐行流式输出 NDJSON
+        urls_file: URL 文件路径(每行一个),"-" 表示标准输入
     """
-    mode = URLListMode(concurrency=concurrency, use_playwright=use_playwright, with_images=with_images)
-    await mode.run(url_string)
\ No newline at end of file
+    mode = URLListMode(concurrency=concurrency, use_playwright=use_playwright, with_images=with_images,
+                       ndjson=ndjson)
+    await mode.run(url_string, urls_file=urls_file)
\ No newline at end of file
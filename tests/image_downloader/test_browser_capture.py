@@ -0,0 +1,82 @@
+"""
+动态渲染图片捕获测试
+"""
+
+import pytest
+
+from src.async_fetcher import AsyncWebFetcher
+from src.image_downloader import AsyncImageDownloader, get_image_download_service, shutdown_image_download_service
+
+PNG = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + (64).to_bytes(4, 'big') * 2 + b'\x00' * 400
+
+
+class FakeRequest:
+    def __init__(self, url, resource_type='image', redirected_from=None):
+        self.url = url
+        self.resource_type = resource_type
+        self.redirected_from = redirected_from
+
+
+class FakeResponse:
+    """模拟 Playwright 响应对象"""
+
+    def __init__(self, url, body, content_type='image/png', request=None):
+        self.request = request or FakeRequest(url)
+        self.ok = True
+        self.headers = {'content-type': content_type, 'content-length': str(len(body))}
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.image_store.config.IMAGE_STORE_DIR", str(tmp_path / "store"))
+    return tmp_path / "store"
+
+
+@pytest.mark.asyncio
+async def test_captured_images_need_no_request(tmp_path, store_dir):
+    """正文引用的图片从浏览器响应存入图片库,之后下载不再发请求"""
+    content = "![a](/img/a.png)\n![b](https://cdn.example.com/b.png)"
+    redirect = FakeRequest("https://cdn.example.com/b.png")
+    responses = [
+        FakeResponse("https://example.com/img/a.png", PNG),
+        FakeResponse("https://cdn2.example.com/b.png", PNG + b'\x01',
+                     request=FakeRequest("https://cdn2.example.com/b.png", redirected_from=redirect)),
+        FakeResponse("https://example.com/ads/banner.png", PNG + b'\x02'),
+        FakeResponse("https://example.com/img/blocked.png", b'<html>403</html>', 'text/html'),
+    ]
+
+    await shutdown_image_download_service()
+    try:
+        fetcher = AsyncWebFetcher.__new__(AsyncWebFetcher)
+        await fetcher._store_captured_images(responses, content, "https://example.com/post")
+
+        service = get_image_download_service()
+        assert service.stats['captured'] == 2
+        assert not service.store.contains("https://example.com/ads/banner.png")
+
+        downloader = AsyncImageDownloader(base_url="https://example.com/post")
+        result = await downloader.download_valid_images(
+            content, downloader.extract_markdown_images(content), tmp_path / "images"
+        )
+
+        assert "](images/" in result and "example.com" not in result
+        assert service.stats['requests'] == 0
+    finally:
+        await shutdown_image_download_service()
+
+
+def test_response_recording_bounded(monkeypatch):
+    """只记录图片响应,且数量有上限"""
+    monkeypatch.setattr("src.async_fetcher.config.IMAGE_CAPTURE_MAX_COUNT", 2)
+    captured = []
+    for i in range(3):
+        AsyncWebFetcher._on_image_response(FakeResponse(f"https://e.com/{i}.png", PNG), captured)
+    AsyncWebFetcher._on_image_response(
+        FakeResponse("https://e.com/app.js", b'', request=FakeRequest("https://e.com/app.js", 'script')), captured
+    )
+
+    assert [r.request.url for r in captured] == ["https://e.com/0.png", "https://e.com/1.png"]
@@ -0,0 +1,72 @@
+"""
+进程级图片下载服务测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.image_downloader import (
+    AsyncImageDownloader,
+    ImageDownloadService,
+    get_image_download_service,
+    shutdown_image_download_service,
+)
+
+
+class TestImageDownloadService:
+    """测试共享会话与并发上限"""
+
+    @pytest.mark.asyncio
+    async def test_global_and_per_host_limits(self):
+        """在途请求数不超过全局和单域名上限"""
+        service = ImageDownloadService(max_in_flight=4, per_host_limit=2)
+        active = {}
+        peak = {'total': 0}
+
+        async def request(host):
+            async with service.limit(host):
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+                peak['total'] = max(peak['total'], sum(active.values()))
+                await asyncio.sleep(0.01)
+                active[host] -= 1
+
+        await asyncio.gather(*[request(f"host{i % 3}") for i in range(30)])
+        await service.close()
+
+        assert peak['total'] <= 4
+        assert all(peak[f"host{i}"] <= 2 for i in range(3))
+        assert service.stats['requests'] == 30
+
+    @pytest.mark.asyncio
+    async def test_downloaders_share_session(self):
+        """不同页面的下载器共享同一个会话"""
+        first = AsyncImageDownloader(base_url="https://a.com/1")
+        second = AsyncImageDownloader(base_url="https://b.com/2")
+
+        assert first.service is second.service
+        assert first.service.get_session() is second.service.get_session()
+
+        await shutdown_image_download_service()
+        assert get_image_download_service() is not first.service
+        await shutdown_image_download_service()
+
+    def test_pool_sized_from_global_limit(self, monkeypatch):
+        """requests 线程池默认与全局在途上限相同,不单独限制学习到的域名"""
+        monkeypatch.setattr("src.image_downloader.config.IMAGE_FALLBACK_WORKERS", 0)
+
+        assert ImageDownloadService(max_in_flight=12).fallback_workers == 12
+        assert ImageDownloadService(max_in_flight=12, fallback_workers=3).fallback_workers == 3
+
+    @pytest.mark.asyncio
+    async def test_close_shuts_down_pool(self):
+        """关闭时释放会话和备用线程池"""
+        service = ImageDownloadService()
+        session = service.get_session()
+        assert await service.run_in_pool(lambda x: x * 2, 21) == 42
+
+        await service.close()
+
+        assert session.closed
+        assert service._thread_pool is None
@@ -0,0 +1,129 @@
+"""
+图片域名下载客户端学习测试
+"""
+
+import time
+
+import aiohttp
+import pytest
+
+from src.image_downloader import AsyncImageDownloader, ImageInfo, shutdown_image_download_service
+from src.image_host_policy import HostClientPolicy
+
+
+class TestHostClientPolicy:
+    """测试按域名学习下载客户端"""
+
+    def test_learn_and_persist(self, tmp_path):
+        path = tmp_path / "hosts.json"
+        policy = HostClientPolicy(['bbc.com'], str(path), threshold=2, ttl_days=30)
+
+        assert policy.prefer_requests('ichef.bbc.com')
+        policy.record_fallback('cdn.example.com', requests_ok=True)
+        assert not policy.prefer_requests('cdn.example.com')
+        policy.record_fallback('cdn.example.com', requests_ok=True)
+        assert policy.prefer_requests('cdn.example.com')
+        policy.save()
+
+        reloaded = HostClientPolicy([], str(path), threshold=2, ttl_days=30)
+        assert reloaded.prefer_requests('cdn.example.com')
+
+    def test_both_failed_not_learned(self, tmp_path):
+        policy = HostClientPolicy([], str(tmp_path / "hosts.json"), threshold=1)
+        policy.record_fallback('down.example.com', requests_ok=False)
+        assert not policy.prefer_requests('down.example.com')
+
+    def test_reset_after_requests_failures(self, tmp_path):
+        policy = HostClientPolicy([], str(tmp_path / "hosts.json"), threshold=1)
+        policy.record_fallback('cdn.example.com', requests_ok=True)
+        for _ in range(3):
+            policy.record_requests('cdn.example.com', ok=False)
+        assert not policy.prefer_requests('cdn.example.com')
+
+    def test_expired_entries_dropped(self, tmp_path):
+        path = tmp_path / "hosts.json"
+        policy = HostClientPolicy([], str(path), threshold=1, ttl_days=1)
+        policy.record_fallback('cdn.example.com', requests_ok=True)
+        policy.hosts['cdn.example.com']['updated_at'] = time.time() - 2 * 24 * 3600
+        policy.save()
+
+        assert not HostClientPolicy([], str(path), threshold=1, ttl_days=1).prefer_requests('cdn.example.com')
+
+
+@pytest.mark.asyncio
+async def test_learned_host_skips_aiohttp(tmp_path, monkeypatch):
+    """学习到的域名直接使用 requests,不再先失败一次 aiohttp"""
+    monkeypatch.setattr("src.image_store.config.IMAGE_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr("src.image_host_policy.config.IMAGE_HOST_POLICY_FILE", str(tmp_path / "hosts.json"))
+    monkeypatch.setattr("src.image_host_policy.config.IMAGE_FALLBACK_LEARN_THRESHOLD", 2)
+    calls = {'aiohttp': 0, 'requests': 0}
+
+    async def failing_aiohttp(self, url, save_dir):
+        calls['aiohttp'] += 1
+        raise aiohttp.ClientOSError(104, "reset by peer")
+
+    def working_requests(self, url, save_dir):
+        calls['requests'] += 1
+        return ImageInfo(url, "images/x.png", "x.png", True)
+
+    monkeypatch.setattr(AsyncImageDownloader, "_download_with_aiohttp", failing_aiohttp)
+    monkeypatch.setattr(AsyncImageDownloader, "_download_with_requests", working_requests)
+
+    await shutdown_image_download_service()
+    try:
+        downloader = AsyncImageDownloader()
+        for i in range(4):
+            assert (await downloader.download_image(f"https://cdn.example.com/{i}.png", tmp_path)).success
+
+        assert calls == {'aiohttp': 2, 'requests': 4}
+        hosts = downloader.service.get_stats()['hosts']
+        assert hosts['learned'] == 1 and hosts['routed'] == 2
+
+        service = downloader.service
+        assert service.requests_session('cdn.example.com') is service.requests_session('cdn.example.com')
+    finally:
+        await shutdown_image_download_service()
+
+    assert (tmp_path / "hosts.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_only_transport_errors_learned(tmp_path, monkeypatch):
+    """内网地址直接拒绝;非传输错误照常回退但不学习;aiohttp 的拒绝结果不清零回退计数"""
+    monkeypatch.setattr("src.image_store.config.IMAGE_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr("src.image_host_policy.config.IMAGE_HOST_POLICY_FILE", str(tmp_path / "hosts.json"))
+    monkeypatch.setattr("src.image_host_policy.config.IMAGE_FALLBACK_LEARN_THRESHOLD", 5)
+    calls = {'requests': 0}
+
+    async def aiohttp_download(self, url, save_dir):
+        if "/bug" in url:
+            raise RuntimeError("本地处理出错")
+        if "/html" in url:
+            return self._reject(url, "不是图片")
+        raise aiohttp.ServerDisconnectedError()
+
+    def working_requests(self, url, save_dir):
+        calls['requests'] += 1
+        return ImageInfo(url, "images/x.png", "x.png", True)
+
+    monkeypatch.setattr(AsyncImageDownloader, "_download_with_aiohttp", aiohttp_download)
+    monkeypatch.setattr(AsyncImageDownloader, "_download_with_requests", working_requests)
+
+    await shutdown_image_download_service()
+    try:
+        downloader = AsyncImageDownloader()
+        policy = downloader.service.host_policy
+
+        internal = await downloader.download_image("http://192.168.1.10/a.png", tmp_path)
+        assert not internal.success and "内网" in internal.error
+        assert calls['requests'] == 0
+
+        assert (await downloader.download_image("https://cdn.example.com/bug.png", tmp_path)).success
+        assert "cdn.example.com" not in policy.hosts
+
+        assert (await downloader.download_image("https://cdn.example.com/reset.png", tmp_path)).success
+        assert not (await downloader.download_image("https://cdn.example.com/html.png", tmp_path)).success
+        assert policy.hosts["cdn.example.com"]['fallback_wins'] == 1
+        assert "192.168.1.10" not in policy.hosts
+    finally:
+        await shutdown_image_download_service()
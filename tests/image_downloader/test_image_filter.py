@@ -0,0 +1,104 @@
+"""
+图片过滤测试
+"""
+
+import pytest
+
+from src.image_downloader import AsyncImageDownloader, shutdown_image_download_service
+from src.image_filter import ImageFilter, extract_image_size_hints, image_dimensions
+
+
+def png(width: int, height: int) -> bytes:
+    """构造带 IHDR 的 PNG 文件头"""
+    return b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + width.to_bytes(4, 'big') + height.to_bytes(4, 'big')
+
+
+def jpeg(width: int, height: int) -> bytes:
+    """构造带 APP0 和 SOF0 段的 JPEG 文件头"""
+    app0 = b'\xff\xe0\x00\x10' + b'JFIF\x00' + b'\x00' * 9
+    sof0 = b'\xff\xc0\x00\x11\x08' + height.to_bytes(2, 'big') + width.to_bytes(2, 'big') + b'\x03'
+    return b'\xff\xd8' + app0 + sof0
+
+
+@pytest.fixture
+def image_filter():
+    return ImageFilter(min_dimension=32, min_bytes=256, denylist=['ads.example.com'])
+
+
+class TestCheckUrl:
+    """测试下载前过滤"""
+
+    @pytest.mark.parametrize("url,reason", [
+        ("https://www.google-analytics.com/collect.gif", "tracker"),
+        ("https://pixel.wp.com/g.gif?blog=1", "tracker"),
+        ("https://cdn.ads.example.com/banner.png", "denylist"),
+        ("https://example.com/images/spacer.gif", "pattern"),
+        ("https://example.com/static/sprites/icons.png", "pattern"),
+        ("https://example.com/img/share-icon-twitter.svg", "pattern"),
+        ("https://example.com/avatars/42.jpg", "pattern"),
+        ("https://example.com/wp-content/uploads/logo-24x24.png", "size_hint"),
+    ])
+    def test_skipped(self, image_filter, url, reason):
+        assert image_filter.check_url(url) == reason
+
+    @pytest.mark.parametrize("url", [
+        "https://example.com/images/clear-water.jpg",
+        "https://example.com/wp-content/uploads/photo-1024x768.jpg",
+        "https://cdn.example.com/photo.jpg?w=800",
+        # CDN 缩放参数不代表原图尺寸
+        "https://cdn.example.com/photo.jpg?w=16&h=16",
+    ])
+    def test_kept(self, image_filter, url):
+        assert image_filter.check_url(url) is None
+
+    def test_html_hint(self, image_filter):
+        """HTML 中声明 1x1 的图片在下载前跳过"""
+        html = '<p><img src="/t/open.gif" width="1" height="1"><img src="/hero.jpg" width="100%"></p>'
+        hints = extract_image_size_hints(html, "https://example.com/post/")
+
+        assert hints == {"https://example.com/t/open.gif": (1, 1)}
+        assert image_filter.check_url("https://example.com/t/open.gif", hints["https://example.com/t/open.gif"]) == "size_hint"
+        assert image_filter.stats['reasons'] == {'size_hint': 1}
+
+
+class TestCheckDownloaded:
+    """测试下载后过滤"""
+
+    def test_dimensions(self):
+        assert image_dimensions(png(640, 480)) == (640, 480)
+        assert image_dimensions(b'GIF89a\x01\x00\x01\x00') == (1, 1)
+        assert image_dimensions(jpeg(800, 600)) == (800, 600)
+        assert image_dimensions(b'<svg></svg>') is None
+
+    def test_small_files_dropped(self, image_filter):
+        assert image_filter.check_downloaded(b'GIF89a\x01\x00\x01\x00', 43)
+        assert image_filter.check_downloaded(jpeg(16, 16), 2048)
+        assert image_filter.check_downloaded(png(640, 480), 2048) is None
+        assert image_filter.stats['dropped'] == 2
+        assert image_filter.stats['dropped_bytes'] == 43 + 2048
+
+
+class TestDownloaderFilter:
+    """测试下载器在发起请求前过滤"""
+
+    @pytest.mark.asyncio
+    async def test_no_request_for_filtered(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("src.image_store.config.IMAGE_STORE_DIR", str(tmp_path / "store"))
+        await shutdown_image_download_service()
+        try:
+            downloader = AsyncImageDownloader(
+                base_url="https://example.com/post",
+                size_hints={"https://example.com/t/open.gif": (1, 1)}
+            )
+            content = "![](https://example.com/t/open.gif)\n![](https://stats.wp.com/b.gif)"
+
+            result = await downloader.download_valid_images(
+                content, downloader.extract_markdown_images(content), tmp_path / "images"
+            )
+
+            stats = downloader.service.get_stats()
+            assert result == content
+            assert stats['requests'] == 0
+            assert stats['filter']['skipped'] == 2
+        finally:
+            await shutdown_image_download_service()
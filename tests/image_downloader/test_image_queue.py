@@ -0,0 +1,85 @@
+"""
+后台图片下载队列测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.async_fetcher import WebPage
+from src.image_downloader import AsyncImageDownloader, ImageInfo, shutdown_image_download_service
+from src.parser import URLItem
+from src.storage import StorageManager
+
+CONTENT = "Intro\n\n![a](https://cdn.example.com/a.png)\n\n![b](/img/b.png)"
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """启用后台图片下载的存储管理器"""
+    monkeypatch.setattr("src.storage.config.DOWNLOAD_IMAGES", True)
+    monkeypatch.setattr("src.storage.config.IMAGE_BACKGROUND_DOWNLOAD", True)
+    monkeypatch.setattr("src.image_queue.config.IMAGE_RETRY_DELAY", 0)
+    monkeypatch.setattr("src.image_store.config.IMAGE_STORE_DIR", str(tmp_path / "store"))
+    return StorageManager(str(tmp_path / "output"))
+
+
+def make_page() -> WebPage:
+    return WebPage(url="https://example.com/post/1", title="Post", description="", content=CONTENT)
+
+
+@pytest.mark.asyncio
+async def test_page_saved_first_then_patched(storage, monkeypatch):
+    """页面先以原始链接保存,后台下载(含一次重试)完成后回填本地路径"""
+    attempts = {}
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def fake_download(self, url, save_dir):
+        started.set()
+        await release.wait()
+        attempts[url] = attempts.get(url, 0) + 1
+        if url.endswith('b.png') and attempts[url] == 1:
+            return ImageInfo(url, "", "", False, "超时")
+        name = url.rsplit('/', 1)[-1]
+        return ImageInfo(url, f"images/{name}", name, True)
+
+    monkeypatch.setattr(AsyncImageDownloader, "download_image", fake_download)
+
+    try:
+        file_path = await storage.save_async(URLItem("https://example.com/post/1", "H1", "H2", 1), make_page())
+        await started.wait()
+
+        # 图片仍在下载中,页面已写入原始链接
+        assert "](https://cdn.example.com/a.png)" in file_path.read_text(encoding='utf-8')
+
+        release.set()
+        assert await storage.drain_images(timeout=5)
+
+        text = file_path.read_text(encoding='utf-8')
+        assert "![a](images/a.png)" in text
+        assert "![b](images/b.png)" in text
+        assert attempts == {"https://cdn.example.com/a.png": 1, "https://example.com/img/b.png": 2}
+        assert storage.image_queue.get_stats()['patched'] == 1
+    finally:
+        await storage.close()
+        await shutdown_image_download_service()
+
+
+@pytest.mark.asyncio
+async def test_drain_deadline(storage, monkeypatch):
+    """超过等待期限后放弃剩余任务,页面保留原始链接"""
+    async def slow_download(self, url, save_dir):
+        await asyncio.sleep(30)
+
+    monkeypatch.setattr(AsyncImageDownloader, "download_image", slow_download)
+
+    try:
+        file_path = await storage.save_async(URLItem("https://example.com/post/1", "H1", "H2", 1), make_page())
+
+        assert not await storage.drain_images(timeout=0.1)
+        assert file_path.read_text(encoding='utf-8').count("https://cdn.example.com/a.png") == 1
+        assert storage.image_queue.get_stats()['completed'] == 0
+    finally:
+        await storage.close()
+        await shutdown_image_download_service()
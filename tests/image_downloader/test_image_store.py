@@ -0,0 +1,84 @@
+"""
+全局图片库测试
+"""
+
+import os
+import time
+
+from src.image_store import STALE_TEMP_SECONDS, ImageStore
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x01' * 100
+
+
+def add_blob(store: ImageStore, url: str, data: bytes = PNG):
+    """模拟一次下载入库"""
+    import hashlib
+
+    tmp = store.new_temp_path()
+    tmp.write_bytes(data)
+    return store.add(url, tmp, hashlib.sha256(data).hexdigest(), 'image/png', '.png')
+
+
+class TestImageStore:
+    """测试内容寻址存储与 URL 索引"""
+
+    def test_lookup_after_add_and_across_runs(self, tmp_path):
+        """入库后可按 URL 查到,重新打开图片库后仍可查到"""
+        store = ImageStore(str(tmp_path / "store"))
+        blob = add_blob(store, "https://a.com/logo.png")
+        store.close()
+
+        reopened = ImageStore(str(tmp_path / "store"))
+        found = reopened.lookup("https://a.com/logo.png")
+
+        assert found == (blob, 'image/png')
+        assert reopened.lookup("https://a.com/other.png") is None
+        assert reopened.stats['bytes_saved'] == len(PNG)
+
+    def test_same_content_stored_once(self, tmp_path):
+        """不同 URL 的相同内容只保存一份"""
+        store = ImageStore(str(tmp_path / "store"))
+        first = add_blob(store, "https://a.com/logo.png")
+        second = add_blob(store, "https://cdn.a.com/logo.png?v=2")
+
+        assert first == second
+        assert store.stats['content_dedup'] == 1
+        assert len(list((tmp_path / "store" / "blobs").rglob("*.png"))) == 1
+        assert not list((tmp_path / "store" / "tmp").iterdir())
+
+    def test_link_into_pages(self, tmp_path):
+        """页面目录中的文件是图片库文件的硬链接,重复链接复用同一文件"""
+        store = ImageStore(str(tmp_path / "store"))
+        blob = add_blob(store, "https://a.com/logo.png")
+
+        page1 = store.link_into(blob, tmp_path / "p1" / "images", "logo.png")
+        page2 = store.link_into(blob, tmp_path / "p2" / "images", "logo.png")
+        again = store.link_into(blob, tmp_path / "p1" / "images", "logo.png")
+
+        assert os.path.samefile(page1, blob)
+        assert os.path.samefile(page2, blob)
+        assert again == page1
+
+    def test_missing_blob_invalidates_index(self, tmp_path):
+        """图片库文件被删除后索引失效"""
+        store = ImageStore(str(tmp_path / "store"))
+        blob = add_blob(store, "https://a.com/logo.png")
+        blob.unlink()
+
+        assert store.lookup("https://a.com/logo.png") is None
+
+    def test_stale_temp_files_removed(self, tmp_path):
+        """打开图片库时清理崩溃或取消后残留的旧临时文件,保留正在写入的新文件"""
+        store = ImageStore(str(tmp_path / "store"))
+        stale = store.new_temp_path()
+        stale.write_bytes(PNG)
+        old = time.time() - STALE_TEMP_SECONDS - 60
+        os.utime(stale, (old, old))
+        fresh = store.new_temp_path()
+        fresh.write_bytes(PNG)
+        store.close()
+
+        ImageStore(str(tmp_path / "store")).close()
+
+        assert not stale.exists()
+        assert fresh.exists()
@@ -0,0 +1,135 @@
+"""
+图片转码测试(需要 Pillow)
+"""
+
+import hashlib
+import io
+import os
+
+import pytest
+
+PIL = pytest.importorskip("PIL")
+from PIL import Image  # noqa: E402
+
+from src.image_downloader import AsyncImageDownloader, shutdown_image_download_service  # noqa: E402
+from src.image_transcoder import ImageTranscoder  # noqa: E402
+
+
+def make_png(width: int, height: int) -> bytes:
+    """生成带噪声和 EXIF 的 PNG(接近截图的体积)"""
+    image = Image.effect_noise((width, height), 64).convert('RGB')
+    exif = Image.Exif()
+    exif[0x010F] = "Camera"
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', exif=exif)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """启用转码的图片下载服务(图片库位于临时目录)"""
+    monkeypatch.setattr("src.image_store.config.IMAGE_STORE_DIR", str(tmp_path / "store"))
+    monkeypatch.setattr("src.image_downloader.config.IMAGE_TRANSCODE", True)
+    monkeypatch.setattr("src.image_downloader.config.IMAGE_KEEP_ORIGINAL", False)
+    monkeypatch.setattr("src.image_transcoder.config.IMAGE_MAX_DIMENSION", 800)
+
+
+class TestImageTranscoder:
+    """测试转码器"""
+
+    @pytest.mark.asyncio
+    async def test_downscale_and_strip(self, tmp_path):
+        blob = tmp_path / "shot.png"
+        blob.write_bytes(make_png(1600, 1000))
+        transcoder = ImageTranscoder(max_dimension=800, quality=75, workers=1)
+
+        try:
+            target = await transcoder.transcode(blob, tmp_path / "out.tmp")
+        finally:
+            transcoder.close()
+
+        assert target.suffix == '.webp'
+        with Image.open(target) as image:
+            assert image.format == 'WEBP'
+            assert image.size == (800, 500)
+            assert not image.getexif()
+
+        stats = transcoder.get_stats()
+        assert stats['transcoded'] == 1
+        assert stats['bytes_after'] < stats['bytes_before'] == blob.stat().st_size
+
+    @pytest.mark.asyncio
+    async def test_reused_result_counted_once(self, tmp_path):
+        """多个页面复用同一转码结果时只计入一次统计"""
+        blob = tmp_path / "shot.png"
+        blob.write_bytes(make_png(1600, 1000))
+        transcoder = ImageTranscoder(max_dimension=800, quality=75, workers=1)
+
+        try:
+            first = await transcoder.transcode(blob, tmp_path / "a.tmp")
+            second = await transcoder.transcode(blob, tmp_path / "b.tmp")
+        finally:
+            transcoder.close()
+
+        assert first == second
+        stats = transcoder.get_stats()
+        assert (stats['images'], stats['transcoded']) == (1, 1)
+        assert stats['bytes_before'] == blob.stat().st_size
+
+    @pytest.mark.asyncio
+    async def test_svg_skipped(self, tmp_path):
+        blob = tmp_path / "logo.svg"
+        blob.write_text("<svg></svg>")
+        transcoder = ImageTranscoder(workers=1)
+
+        assert await transcoder.transcode(blob, tmp_path / "out.tmp") is None
+        assert transcoder.get_stats()['images'] == 0
+
+
+class TestDownloaderTranscode:
+    """测试下载器使用转码结果并改写 Markdown"""
+
+    @pytest.mark.asyncio
+    async def test_markdown_points_to_webp(self, tmp_path, service):
+        url = "https://example.com/shot.png"
+        data = make_png(1200, 900)
+
+        try:
+            downloader = AsyncImageDownloader(base_url="https://example.com/post")
+            tmp = downloader.store.new_temp_path()
+            tmp.write_bytes(data)
+            downloader.store.add(url, tmp, hashlib.sha256(data).hexdigest(), 'image/png', '.png')
+
+            images_dir = tmp_path / "page" / "images"
+            content = await downloader.download_valid_images(f"![shot]({url})", [url], images_dir)
+
+            files = os.listdir(images_dir)
+            assert len(files) == 1 and files[0].endswith(".webp")
+            assert content == f"![shot](images/{files[0]})"
+            assert downloader.service.get_stats()['transcode']['transcoded'] == 1
+        finally:
+            await shutdown_image_download_service()
+
+    @pytest.mark.asyncio
+    async def test_existing_original_kept(self, tmp_path, service):
+        """同一目录中其他页面已链接的原图不被删除"""
+        url = "https://example.com/shot.png"
+        data = make_png(1200, 900)
+
+        try:
+            downloader = AsyncImageDownloader(base_url="https://example.com/post")
+            tmp = downloader.store.new_temp_path()
+            tmp.write_bytes(data)
+            blob = downloader.store.add(url, tmp, hashlib.sha256(data).hexdigest(), 'image/png', '.png')
+
+            # 前一个页面(未启用转码时)已在同一 H2 目录中链接了原图
+            images_dir = tmp_path / "page" / "images"
+            existing = downloader.store.link_into(blob, images_dir, downloader._generate_filename(url, 'image/png'))
+
+            content = await downloader.download_valid_images(f"![shot]({url})", [url], images_dir)
+
+            webp, = [name for name in os.listdir(images_dir) if name.endswith(".webp")]
+            assert content == f"![shot](images/{webp})"
+            assert existing.exists()
+        finally:
+            await shutdown_image_download_service()
@@ -0,0 +1,84 @@
+"""
+图片地址单次替换测试与基准
+"""
+
+import time
+
+from src.image_downloader import ImageDownloadService, rewrite_image_urls
+
+
+def make_gallery(count: int) -> str:
+    """生成包含大量图片的 Markdown"""
+    lines = ["# Gallery", ""]
+    for i in range(count):
+        lines.append(f"Photo {i} of the collection.")
+        lines.append(f"![photo {i}](/img/{i}.jpg)")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def legacy_rewrite(content: str, local_paths: dict, base_url: str) -> str:
+    """旧实现: 每张图片重新提取一次全文并逐个 str.replace"""
+    for original_url, local_path in local_paths.items():
+        for alt_text, markdown_url, resolved_url in ImageDownloadService.extract_image_urls(content, base_url):
+            if resolved_url == original_url:
+                content = content.replace(f"![{alt_text}]({markdown_url})", f"![{alt_text}]({local_path})")
+                break
+    return content
+
+
+class TestRewriteImageUrls:
+    """测试一次遍历替换图片地址"""
+
+    def test_relative_duplicate_and_missing(self):
+        """相对路径按基础 URL 解析,重复引用全部替换,未下载的保持原样"""
+        content = (
+            "![a](/img/a.png)\n"
+            "![ spaced alt ]( https://cdn.com/b.png )\n"
+            "![again](https://example.com/img/a.png)\n"
+            "![failed](https://cdn.com/c.png)\n"
+            "![inline](data:image/png;base64,xyz)"
+        )
+        local_paths = {
+            "https://example.com/img/a.png": "images/a.png",
+            "https://cdn.com/b.png": "images/b.png",
+        }
+
+        result, replaced = rewrite_image_urls(content, local_paths, "https://example.com/post")
+
+        assert replaced == 3
+        assert result == (
+            "![a](images/a.png)\n"
+            "![ spaced alt ](images/b.png)\n"
+            "![again](images/a.png)\n"
+            "![failed](https://cdn.com/c.png)\n"
+            "![inline](data:image/png;base64,xyz)"
+        )
+
+    def test_no_downloads(self):
+        """没有下载结果时原样返回"""
+        assert rewrite_image_urls("![a](x.png)", {}) == ("![a](x.png)", 0)
+
+
+class TestRewriteBenchmark:
+    """数百张图片的替换耗时基准"""
+
+    def test_gallery_benchmark(self):
+        """300 张图片: 单次替换明显快于逐张重扫全文"""
+        base_url = "https://example.com/gallery/"
+        count = 300
+        content = make_gallery(count)
+        local_paths = {f"https://example.com/img/{i}.jpg": f"images/{i}.jpg" for i in range(count)}
+
+        start = time.perf_counter()
+        result, replaced = rewrite_image_urls(content, local_paths, base_url)
+        single_pass = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = legacy_rewrite(content, local_paths, base_url)
+        legacy = time.perf_counter() - start
+
+        print(f"\n{count} 张图片: 单次替换 {single_pass * 1000:.1f}ms, 旧实现 {legacy * 1000:.1f}ms")
+        assert replaced == count
+        assert result == expected
+        assert single_pass < legacy
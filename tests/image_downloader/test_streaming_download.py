@@ -0,0 +1,118 @@
+"""
+单次流式 GET 下载测试
+"""
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from src.image_downloader import AsyncImageDownloader, shutdown_image_download_service, sniff_image_type
+
+# 64x64 的 PNG 文件头(高于过滤阈值)
+PNG = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + (64).to_bytes(4, 'big') * 2 + b'\x00' * 400
+
+
+@pytest.fixture(autouse=True)
+def image_store(tmp_path, monkeypatch):
+    """图片库使用临时目录"""
+    store_dir = tmp_path / "store"
+    monkeypatch.setattr("src.image_store.config.IMAGE_STORE_DIR", str(store_dir))
+    return store_dir
+
+
+@pytest.fixture
+def page_dir(tmp_path):
+    """页面的 images 目录"""
+    return tmp_path / "page" / "images"
+
+
+@pytest_asyncio.fixture
+async def server():
+    """本地图片服务器(记录请求方法)"""
+    methods = []
+
+    async def png(request):
+        methods.append(request.method)
+        return web.Response(body=PNG, content_type='application/octet-stream')
+
+    async def html(request):
+        methods.append(request.method)
+        return web.Response(body=b'<!DOCTYPE html><html>blocked</html>', content_type='image/png')
+
+    async def huge(request):
+        methods.append(request.method)
+        response = web.StreamResponse(headers={'Content-Type': 'image/png'})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        await response.write(PNG)
+        for _ in range(64):
+            await response.write(b'\x00' * 65536)
+        return response
+
+    app = web.Application()
+    app.router.add_get('/a.png', png)
+    app.router.add_get('/html.png', html)
+    app.router.add_get('/huge.png', huge)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    yield f"http://127.0.0.1:{port}", methods
+
+    await shutdown_image_download_service()
+    await runner.cleanup()
+
+
+class TestSniff:
+    """测试文件头识别"""
+
+    def test_known_signatures(self):
+        assert sniff_image_type(PNG) == 'image/png'
+        assert sniff_image_type(b'\xff\xd8\xff\xe0') == 'image/jpeg'
+        assert sniff_image_type(b'RIFF\x00\x00\x00\x00WEBPVP8') == 'image/webp'
+        assert sniff_image_type(b'<?xml version="1.0"?><svg ') == 'image/svg+xml'
+        assert sniff_image_type(b'<html>') is None
+
+
+class TestStreamingDownload:
+    """测试单次请求、文件头校验与大小上限"""
+
+    @pytest.mark.asyncio
+    async def test_single_get_and_magic_bytes(self, server, page_dir, image_store):
+        """只发一次 GET,Content-Type 不是图片但文件头是 PNG 时仍保存"""
+        base, methods = server
+        downloader = AsyncImageDownloader()
+
+        result = await downloader._download_with_aiohttp(f"{base}/a.png", page_dir)
+
+        assert result.success
+        assert methods == ['GET']
+        assert (page_dir / result.filename).read_bytes() == PNG
+        assert not list((image_store / "tmp").iterdir())
+
+    @pytest.mark.asyncio
+    async def test_html_rejected(self, server, page_dir, image_store):
+        """文件头是 HTML 时拒绝保存"""
+        base, _ = server
+        result = await AsyncImageDownloader()._download_with_aiohttp(f"{base}/html.png", page_dir)
+
+        assert not result.success
+        assert not page_dir.exists()
+        assert not list((image_store / "tmp").iterdir())
+
+    @pytest.mark.asyncio
+    async def test_size_limit_without_content_length(self, server, page_dir, image_store):
+        """没有 Content-Length 时写入过程中超过上限即中止并删除临时文件"""
+        base, _ = server
+        downloader = AsyncImageDownloader()
+        downloader.max_size_bytes = 1024 * 1024
+
+        result = await downloader._download_with_aiohttp(f"{base}/huge.png", page_dir)
+
+        assert not result.success
+        assert "文件过大" in result.error
+        assert not page_dir.exists()
+        assert not list((image_store / "tmp").iterdir())
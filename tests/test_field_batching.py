@@ -0,0 +1,148 @@
+"""
+短字段跨页面批量翻译测试
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.async_fetcher import WebPage
+from src.micro_batcher import MicroBatcher
+from src.translation_cache import TranslationCache
+from src.translation_memory import TranslationMemory
+from src.translator import PROMPT_VERSION, Translator
+
+
+class TestMicroBatcher:
+    """测试微批处理器"""
+
+    @pytest.mark.asyncio
+    async def test_items_merged_within_window(self):
+        """时间窗口内的条目合并为一批,结果按条目分发"""
+        calls = []
+
+        async def handler(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(handler, max_items=100, window_ms=20)
+        results = await asyncio.gather(*[batcher.submit(i) for i in range(5)])
+
+        assert results == [0, 2, 4, 6, 8]
+        assert calls == [[0, 1, 2, 3, 4]]
+
+    @pytest.mark.asyncio
+    async def test_flush_when_max_items_reached(self):
+        """攒够 max_items 立即发送"""
+        calls = []
+
+        async def handler(items):
+            calls.append(len(items))
+            return items
+
+        batcher = MicroBatcher(handler, max_items=3, window_ms=10000)
+        results = await asyncio.wait_for(asyncio.gather(*[batcher.submit(i) for i in range(6)]), 1)
+
+        assert results == list(range(6))
+        assert calls == [3, 3]
+
+    @pytest.mark.asyncio
+    async def test_count_mismatch_raises(self):
+        """结果数量不一致时所有等待方收到异常"""
+        async def handler(items):
+            return items[:-1]
+
+        batcher = MicroBatcher(handler, max_items=2, window_ms=10)
+
+        with pytest.raises(ValueError):
+            await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+
+
+class TestTranslatorFieldBatching:
+    """测试仅翻译标题/摘要时多个页面合并为一次请求"""
+
+    @pytest.fixture
+    def translator(self, monkeypatch):
+        monkeypatch.setattr("src.translator.config.TRANSLATE_CONTENT", False)
+        translator = Translator(
+            api_key="test-key",
+            cache=TranslationCache(backend="none"),
+            memory=TranslationMemory(store=TranslationCache(backend="none"))
+        )
+        translator._capability_detected = True
+        return translator
+
+    @pytest.mark.asyncio
+    async def test_pages_share_one_request(self, translator):
+        """多个页面的标题和摘要合并为一次 JSON 数组请求"""
+        prompts = []
+
+        async def fake_chat(prompt, system_prompt=None, on_delta=None):
+            prompts.append(prompt)
+            texts = json.loads(prompt)
+            return json.dumps([f"译:{t}" for t in texts], ensure_ascii=False)
+
+        translator._chat = fake_chat
+        pages = [
+            WebPage(url=f"https://a.com/{i}", title=f"Title number {i} of the series",
+                    description=f"A short description of article {i}.",
+                    content="This is the English body text of the article, long enough to detect.")
+            for i in range(4)
+        ]
+
+        await asyncio.gather(*[translator.translate_webpage(page) for page in pages])
+
+        assert len(prompts) == 1
+        assert pages[2].title == "译:Title number 2 of the series"
+        assert pages[3].description == "译:A short description of article 3."
+
+    @pytest.mark.asyncio
+    async def test_count_mismatch_falls_back(self, translator):
+        """返回数量不一致时降级为逐个翻译"""
+        async def fake_chat(prompt, system_prompt=None, on_delta=None):
+            return '["只有一个"]'
+
+        async def fake_translate(text, source_lang="en", target_lang="zh", skip_detection=False):
+            return f"单独:{text}"
+
+        translator._chat = fake_chat
+        translator.translate = fake_translate
+        page = WebPage(url="https://a.com/x", title="A title in English words",
+                       description="A description in English words.",
+                       content="This is the English body text of the article, long enough to detect.")
+
+        await translator.translate_webpage(page)
+
+        assert page.title == "单独:A title in English words"
+        assert page.description == "单独:A description in English words."
+
+    @pytest.mark.asyncio
+    async def test_cache_key_uses_field_language(self, translator):
+        """缓存键使用各字段自己的语言,而不是正文语言"""
+        keys = []
+
+        class RecordingCache:
+            def get(self, key, text):
+                keys.append(key)
+                return None
+
+            def set(self, key, value):
+                pass
+
+        async def fake_chat(prompt, system_prompt=None, on_delta=None):
+            return json.dumps([f"译:{t}" for t in json.loads(prompt)], ensure_ascii=False)
+
+        translator.cache = RecordingCache()
+        translator._chat = fake_chat
+
+        results = await translator._translate_fields_batched([
+            ("title", "日本語のタイトル", "ja"),
+            ("description", "An English description.", "en"),
+        ])
+
+        assert results == {"title": "译:日本語のタイトル", "description": "译:An English description."}
+        assert keys == [
+            TranslationCache.make_key(translator.model, "ja", "zh", PROMPT_VERSION, "日本語のタイトル"),
+            TranslationCache.make_key(translator.model, "en", "zh", PROMPT_VERSION, "An English description."),
+        ]
@@ -0,0 +1,73 @@
+"""
+增量输入清单测试
+"""
+
+from src.input_manifest import InputManifest
+from src.parser import MarkdownParser
+
+
+def run_once(path, manifest_dir, load=True, failed=()):
+    """模拟一次运行: 解析、(可选)标记失败、保存清单"""
+    manifest = InputManifest(str(path), manifest_dir=str(manifest_dir), load=load)
+    items = list(MarkdownParser(str(path)).iter_items(manifest))
+    manifest.forget(failed)
+    manifest.save()
+    return [item.url for item in items], manifest
+
+
+class TestInputManifest:
+    """测试只调度新增的 URL"""
+
+    def test_first_run_schedules_everything(self, tmp_path):
+        """没有清单时所有 URL 都是新增"""
+        path = tmp_path / "input.md"
+        path.write_text("# A\nhttps://example.com/1\nhttps://example.com/2\n", encoding="utf-8")
+
+        urls, manifest = run_once(path, tmp_path / "manifests")
+
+        assert urls == ["https://example.com/1", "https://example.com/2"]
+        assert manifest.get_stats() == {'unchanged_lines': 0, 'added': 2, 'removed': 0}
+        assert manifest.path.exists()
+
+    def test_only_added_urls(self, tmp_path):
+        """未变化的行跳过,新增的 URL 带正确的标题,删除的 URL 计入统计"""
+        path = tmp_path / "input.md"
+        path.write_text(
+            "# A\n## B\nhttps://example.com/1\nhttps://example.com/2\nhttps://example.com/3\n",
+            encoding="utf-8"
+        )
+        run_once(path, tmp_path / "manifests")
+
+        path.write_text(
+            "# A\n## B\nhttps://example.com/1\n- 改写过的行 https://example.com/2\n"
+            "## C\nhttps://example.com/new\n",
+            encoding="utf-8"
+        )
+        manifest = InputManifest(str(path), manifest_dir=str(tmp_path / "manifests"))
+        items = list(MarkdownParser(str(path)).iter_items(manifest))
+
+        assert [(i.url, i.h1, i.h2) for i in items] == [("https://example.com/new", "A", "C")]
+        assert manifest.get_stats() == {'unchanged_lines': 1, 'added': 1, 'removed': 1}
+        assert manifest.removed_urls() == {"https://example.com/3"}
+
+    def test_failed_urls_rescheduled(self, tmp_path):
+        """爬取失败的 URL 不记入清单,下次运行重新调度"""
+        path = tmp_path / "input.md"
+        path.write_text("https://example.com/ok\nhttps://example.com/bad\n", encoding="utf-8")
+
+        run_once(path, tmp_path / "manifests", failed=["https://example.com/bad"])
+        urls, _ = run_once(path, tmp_path / "manifests")
+
+        assert urls == ["https://example.com/bad"]
+
+    def test_force_ignores_previous(self, tmp_path):
+        """--force 时不加载清单,所有 URL 都重新调度"""
+        path = tmp_path / "input.md"
+        path.write_text("https://example.com/1\n", encoding="utf-8")
+
+        run_once(path, tmp_path / "manifests")
+        urls, _ = run_once(path, tmp_path / "manifests")
+        forced, _ = run_once(path, tmp_path / "manifests", load=False)
+
+        assert urls == []
+        assert forced == ["https://example.com/1"]
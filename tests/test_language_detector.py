@@ -0,0 +1,65 @@
+"""
+语言检测服务测试
+"""
+
+from src.language_detector import LanguageDetector
+
+
+class TestScriptHistogram:
+    """测试文字分布快速判断"""
+
+    def test_chinese(self):
+        detector = LanguageDetector()
+        assert detector.detect("这是一段用于测试的中文内容，包含足够多的汉字。") == "zh"
+        assert detector.stats['fallbacks'] == 0
+
+    def test_english(self):
+        detector = LanguageDetector()
+        assert detector.detect("This is a short paragraph of English text for the detector.") == "en"
+        assert detector.stats['fallbacks'] == 0
+
+    def test_japanese_with_kanji(self):
+        """含假名的日文不会因汉字较多被判为中文"""
+        detector = LanguageDetector()
+        assert detector.detect("日本語の文章です。東京都内で開催された会議について説明します。") == "other"
+
+    def test_korean_and_cyrillic(self):
+        detector = LanguageDetector()
+        assert detector.detect("한국어 문장입니다. 테스트를 위한 내용입니다.") == "other"
+        assert detector.detect("Это предложение на русском языке для проверки.") == "other"
+
+    def test_short_text_unknown(self):
+        assert LanguageDetector().detect("Hi") == "unknown"
+
+
+class TestFallback:
+    """测试不明确时的统计检测兜底"""
+
+    def test_french_uses_fallback_deterministically(self):
+        """拉丁字母的非英文文本走统计检测,结果稳定"""
+        text = "Le chat est assis sur le tapis et regarde la pluie tomber dehors."
+        results = {LanguageDetector().detect(text) for _ in range(5)}
+
+        assert results == {"other"}
+
+
+class TestMemo:
+    """测试检测结果缓存"""
+
+    def test_same_text_detected_once(self):
+        detector = LanguageDetector()
+        text = "Le chat est assis sur le tapis et regarde la pluie tomber dehors."
+
+        for _ in range(3):
+            detector.detect(text)
+
+        assert detector.stats['detections'] == 1
+        assert detector.stats['memo_hits'] == 2
+        assert detector.stats['fallbacks'] == 1
+
+    def test_memo_bounded(self):
+        detector = LanguageDetector(max_entries=2)
+        for i in range(5):
+            detector.detect(f"This is the English sentence number {i} for the test.")
+
+        assert len(detector._memo) == 2
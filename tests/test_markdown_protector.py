@@ -0,0 +1,127 @@
+"""
+代码块与链接保护测试
+"""
+
+import pytest
+
+from src import markdown_protector
+from src.rate_limiter import estimate_tokens
+from src.translation_cache import TranslationCache
+from src.translation_memory import TranslationMemory
+from src.translator import Translator
+
+CODE_PAGE = """# Installing the client
+
+Run the following command to install the package:
+
+```bash
+pip install some-package==1.2.3 --extra-index-url https://pypi.example.com/simple
+```
+
+Then call `client.connect(timeout=30)` before sending requests.
+See [the docs](https://docs.example.com/guide/getting-started#install) for details.
+
+![architecture diagram](https://cdn.example.com/images/architecture-overview.png)
+
+```python
+def main():
+    client = Client(api_key=os.environ["API_KEY"])
+    for item in client.list_items(limit=100):
+        print(item.id, item.name)
+```
+"""
+
+
+class TestProtect:
+    """测试占位符替换与还原"""
+
+    def test_roundtrip(self):
+        """替换后还原得到原文"""
+        protected, spans = markdown_protector.protect(CODE_PAGE)
+
+        assert "pip install" not in protected
+        assert "client.connect" not in protected
+        assert "architecture-overview.png" not in protected
+        assert "[the docs]" in protected
+
+        restored, missing = markdown_protector.restore(protected, spans)
+        assert restored == CODE_PAGE
+        assert missing == []
+
+    def test_token_drop_on_code_heavy_page(self):
+        """代码较多的页面发送的 token 明显减少"""
+        protected, _ = markdown_protector.protect(CODE_PAGE)
+
+        assert estimate_tokens(protected) < estimate_tokens(CODE_PAGE) * 0.6
+
+    def test_missing_placeholder_reported(self):
+        """译文缺失占位符时返回缺失编号"""
+        protected, spans = markdown_protector.protect("Use `some_function()` here.")
+        _, missing = markdown_protector.restore("在这里使用。", spans)
+
+        assert missing == [0]
+
+    def test_short_spans_kept(self):
+        """过短的片段不替换"""
+        protected, spans = markdown_protector.protect("Set `x` to 1.")
+
+        assert protected == "Set `x` to 1."
+        assert spans == []
+
+
+class TestTranslatorProtection:
+    """测试 translate() 中的保护层"""
+
+    @pytest.fixture
+    def translator(self):
+        translator = Translator(
+            api_key="test-key",
+            cache=TranslationCache(backend="none"),
+            memory=TranslationMemory(store=TranslationCache(backend="none"))
+        )
+        translator._capability_detected = True
+        return translator
+
+    @pytest.mark.asyncio
+    async def test_code_not_sent_and_restored(self, translator):
+        """代码不发送给模型,译文中原样还原"""
+        sent = []
+
+        async def fake_chat(prompt, system_prompt=None, on_delta=None):
+            sent.append(prompt)
+            return prompt.split("\n\n", 1)[1].replace("Run the following", "运行以下")
+
+        translator._chat = fake_chat
+        result = await translator.translate(CODE_PAGE, skip_detection=True)
+
+        assert "def main()" not in sent[0]
+        assert "def main()" in result
+        assert "运行以下" in result
+        assert translator.stats['protected_tokens'] > 0
+
+    @pytest.mark.asyncio
+    async def test_code_only_text_skips_api(self, translator):
+        """只有代码的文本不调用 API"""
+        async def fake_chat(prompt, system_prompt=None, on_delta=None):
+            raise AssertionError("不应调用 API")
+
+        translator._chat = fake_chat
+        text = "```python\nprint('hello world')\n```"
+
+        assert await translator.translate(text, skip_detection=True) == text
+
+    @pytest.mark.asyncio
+    async def test_missing_placeholder_falls_back(self, translator):
+        """占位符丢失时改为不替换直接翻译"""
+        prompts = []
+
+        async def fake_chat(prompt, system_prompt=None, on_delta=None):
+            prompts.append(prompt)
+            return "译文没有占位符" if len(prompts) == 1 else "完整译文 `client.connect()`"
+
+        translator._chat = fake_chat
+        result = await translator.translate("Call `client.connect()` first.", skip_detection=True)
+
+        assert len(prompts) == 2
+        assert "`client.connect()`" in prompts[1]
+        assert result == "完整译文 `client.connect()`"
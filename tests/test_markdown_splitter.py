@@ -0,0 +1,153 @@
+"""
+Markdown 分块与长文档分块翻译测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.markdown_splitter import join_chunks, split_blocks, split_markdown, split_markdown_with_separators
+from src.markdown_protector import protect
+from src.translation_cache import TranslationCache
+from src.translation_memory import TranslationMemory
+from src.translator import Translator
+
+
+def word_count(text: str) -> int:
+    """测试用 token 计数: 按空白分词"""
+    return len(text.split())
+
+
+class TestSplitBlocks:
+    """测试结构块拆分"""
+
+    def test_code_fence_kept_whole(self):
+        """代码块内部的空行不拆分"""
+        text = "intro\n\n```python\na = 1\n\nb = 2\n```\n\noutro"
+        blocks = split_blocks(text)
+
+        assert blocks == ["intro", "```python\na = 1\n\nb = 2\n```", "outro"]
+
+    def test_heading_starts_new_block(self):
+        """标题单独开始新块"""
+        text = "para line\n## Section\nbody"
+        blocks = split_blocks(text)
+
+        assert blocks == ["para line", "## Section\nbody"]
+
+
+class TestSplitMarkdown:
+    """测试按 token 上限分块"""
+
+    def test_short_text_single_chunk(self):
+        """短文本不分块"""
+        assert split_markdown("one two three", 10, word_count) == ["one two three"]
+
+    def test_chunks_respect_limit_and_order(self):
+        """分块不超过上限且按原顺序拼接可还原"""
+        paragraphs = [f"p{i} " + "word " * 4 for i in range(10)]
+        text = "\n\n".join(p.strip() for p in paragraphs)
+
+        chunks = split_markdown(text, 12, word_count)
+
+        assert len(chunks) > 1
+        assert all(word_count(c) <= 12 for c in chunks)
+        assert "\n\n".join(chunks) == text
+
+    def test_oversized_paragraph_split(self):
+        """超长段落按行拆分"""
+        text = "\n".join(["a b c d"] * 6)
+        chunks = split_markdown(text, 8, word_count)
+
+        assert all(word_count(c) <= 8 for c in chunks)
+        assert "\n".join(chunks) == text
+
+
+class TestRoundTrip:
+    """测试分块后按分隔符拼接还原原文"""
+
+    def make_document(self):
+        """超长代码块、超长表格、超长段落和单行超长文本"""
+        code = "```python\n" + "\n".join(f"value_{i} = compute({i}) + offset" for i in range(60)) + "\n```"
+        table = "| name | value |\n| --- | --- |\n" + "\n".join(f"| row {i} | cell {i} |" for i in range(30))
+        paragraph = "\n".join(f"line {i} of a long paragraph" for i in range(20))
+        long_line = " ".join(f"w{i}" for i in range(50))
+        return "\n\n".join(["# Title", "intro text", code, table, paragraph, long_line, "outro"]), code, table
+
+    def test_split_join_round_trip(self):
+        """代码块和表格保持完整,超长块的片段之间不插入空行"""
+        text, code, table = self.make_document()
+
+        pairs = split_markdown_with_separators(text, 20, word_count)
+        chunks = [chunk for chunk, _ in pairs]
+
+        assert len(chunks) > 5
+        assert code in chunks
+        assert table in chunks
+        assert join_chunks(chunks, [sep for _, sep in pairs]) == text
+        assert split_markdown(text, 20, word_count) == chunks
+
+    def test_code_chunks_fully_protected(self):
+        """每个包含代码的分块中围栏配对,代码整体替换为占位符"""
+        text, code, _ = self.make_document()
+
+        for chunk in split_markdown(text, 20, word_count):
+            assert chunk.count("```") % 2 == 0
+            if "```" in chunk:
+                protected, spans = protect(chunk)
+                assert "```" not in protected
+                assert code in spans
+
+
+class TestTranslateDocument:
+    """测试长文档并发分块翻译"""
+
+    @pytest.mark.asyncio
+    async def test_chunks_translated_concurrently_in_order(self, monkeypatch):
+        """分块并发翻译并按顺序拼接"""
+        translator = Translator(
+            api_key="test-key",
+            cache=TranslationCache(backend="none"),
+            memory=TranslationMemory(store=TranslationCache(backend="none"))
+        )
+        translator._capability_detected = True
+        monkeypatch.setattr(Translator, "chunk_tokens", property(lambda self: 20))
+
+        active = []
+        peak = []
+
+        async def fake_translate(text, source_lang="en", target_lang="zh", skip_detection=False):
+            active.append(text)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.remove(text)
+            return text.upper()
+
+        translator.translate = fake_translate
+        text = "\n\n".join(f"paragraph {i} " + "x" * 60 for i in range(5))
+
+        result = await translator.translate_document(text)
+
+        assert result == "\n\n".join(f"PARAGRAPH {i} " + "X" * 60 for i in range(5))
+        assert max(peak) > 1
+
+    @pytest.mark.asyncio
+    async def test_oversized_block_rejoined_with_newline(self, monkeypatch):
+        """同一个超长块拆出的分块译文以换行拼接,不插入空行"""
+        translator = Translator(
+            api_key="test-key",
+            cache=TranslationCache(backend="none"),
+            memory=TranslationMemory(store=TranslationCache(backend="none"))
+        )
+        translator._capability_detected = True
+        monkeypatch.setattr(Translator, "chunk_tokens", property(lambda self: 20))
+
+        async def fake_translate(text, source_lang="en", target_lang="zh", skip_detection=False):
+            return text.upper()
+
+        translator.translate = fake_translate
+        text = "\n".join(f"line {i} " + "y" * 40 for i in range(8))
+
+        result = await translator.translate_document(text)
+
+        assert result == text.upper()
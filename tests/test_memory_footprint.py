@@ -0,0 +1,90 @@
+"""
+URLItem/WebPage 内存占用基准
+"""
+
+import tracemalloc
+from dataclasses import dataclass
+
+from creeper import AsyncCrawler
+from src.async_fetcher import WebPage
+from src.parser import MarkdownParser, URLItem
+
+
+@dataclass
+class LegacyURLItem:
+    """改动前的 URLItem(每个实例带 __dict__)"""
+    url: str
+    h1: str
+    h2: str
+    line_number: int
+
+
+def allocated(factory, count: int) -> int:
+    """创建 count 个对象占用的字节数"""
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size
+
+
+class TestMemoryFootprint:
+    """测试高在途数量时的内存占用"""
+
+    def test_url_item_benchmark(self):
+        """10 万个 URLItem: __slots__ 明显小于带 __dict__ 的旧实现"""
+        count = 100_000
+        urls = [f"https://example.com/page/{i}" for i in range(count)]
+
+        slotted = allocated(lambda i: URLItem(urls[i], "科技", "AI", i % 100), count)
+        legacy = allocated(lambda i: LegacyURLItem(urls[i], "科技", "AI", i % 100), count)
+
+        print(f"\n{count} 个 URLItem: __slots__ {slotted / 1024 / 1024:.1f}MB, 旧实现 {legacy / 1024 / 1024:.1f}MB")
+        assert not hasattr(URLItem(urls[0], "a", "b", 1), '__dict__')
+        assert slotted < legacy * 0.7
+
+    def test_headings_interned(self, tmp_path):
+        """不同文件中的相同标题共享同一个字符串对象"""
+        for name in ("a.md", "b.md"):
+            (tmp_path / name).write_text(
+                f"# 科技新闻\n## 人工智能\nhttps://example.com/{name}\n", encoding="utf-8"
+            )
+
+        a, = MarkdownParser(str(tmp_path / "a.md")).iter_items()
+        b, = MarkdownParser(str(tmp_path / "b.md")).iter_items()
+
+        assert a.h1 is b.h1
+        assert a.h2 is b.h2
+
+    def test_release_page(self):
+        """页面写入文件后释放正文,只保留元数据"""
+        tracemalloc.start()
+        page = WebPage(url="https://example.com/a", title="标题", description="摘要",
+                       content="正文" * 100_000, image_hints={"https://example.com/1.png": (10, 10)})
+        hints = page.image_hints
+        held, _ = tracemalloc.get_traced_memory()
+        page.release()
+        released, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"\n释放正文: {held / 1024:.0f}KB -> {released / 1024:.0f}KB")
+        assert not hasattr(page, '__dict__')
+        assert page.content == "" and page.image_hints == {}
+        assert (page.url, page.title, page.success) == ("https://example.com/a", "标题", True)
+        # 后台图片任务持有的尺寸提示不受影响
+        assert hints == {"https://example.com/1.png": (10, 10)}
+        assert held - released > 300_000
+
+    def test_failure_tuples(self):
+        """失败记录只保留 (url, h1, h2, 错误) 元组,错误信息截断"""
+        crawler = AsyncCrawler.__new__(AsyncCrawler)
+        crawler.stats = {'failed': 0}
+        crawler.failed_items = []
+
+        crawler._record_failure(URLItem("https://example.com/a", "科技", "AI", 3), "x" * 1000)
+
+        assert crawler.stats['failed'] == 1
+        url, h1, h2, error = crawler.failed_items[0]
+        assert (url, h1, h2) == ("https://example.com/a", "科技", "AI")
+        assert len(error) == 200
@@ -0,0 +1,70 @@
+"""
+提示词前缀缓存测试
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.translation_cache import TranslationCache
+from src.translation_memory import TranslationMemory
+from src.translator import Translator, TRANSLATION_SYSTEM_PROMPT
+
+
+def make_response(content: str, usage) -> SimpleNamespace:
+    """构造与 SDK 结构一致的响应对象"""
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+@pytest.fixture
+def translator():
+    translator = Translator(
+        api_key="test-key",
+        cache=TranslationCache(backend="none"),
+        memory=TranslationMemory(store=TranslationCache(backend="none"))
+    )
+    translator._capability_detected = True
+    return translator
+
+
+class TestPromptLayout:
+    """测试请求结构: 固定前缀在前,可变文本在后"""
+
+    @pytest.mark.asyncio
+    async def test_stable_prefix_and_text_last(self, translator, monkeypatch):
+        """不同文本的请求共享逐字节一致的系统提示词,正文位于最后"""
+        monkeypatch.setattr("src.translator.config.TRANSLATION_STREAMING", False)
+        requests = []
+
+        async def fake_call(func, *args, estimated_tokens=0, **kwargs):
+            requests.append(kwargs['messages'])
+            usage = SimpleNamespace(prompt_tokens=100, completion_tokens=10, total_tokens=110,
+                                    prompt_cache_hit_tokens=64)
+            return make_response("译文", usage)
+
+        translator.rate_limiter.call = fake_call
+
+        await translator.translate("First article text.", skip_detection=True)
+        await translator.translate("Second, different article text.", skip_detection=True)
+
+        assert requests[0][0] == requests[1][0] == {"role": "system", "content": TRANSLATION_SYSTEM_PROMPT}
+        assert requests[0][1]['content'].endswith("First article text.")
+        assert requests[1][1]['content'].endswith("Second, different article text.")
+        assert translator.get_stats()['cache_hit_tokens'] == 128
+
+
+class TestCachedTokens:
+    """测试不同服务商的缓存命中字段"""
+
+    def test_deepseek_field(self):
+        usage = SimpleNamespace(prompt_cache_hit_tokens=512)
+        assert Translator._cached_prompt_tokens(usage) == 512
+
+    def test_openai_field(self):
+        usage = SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=1024))
+        assert Translator._cached_prompt_tokens(usage) == 1024
+
+    def test_missing_field(self):
+        usage = SimpleNamespace(prompt_tokens=10)
+        assert Translator._cached_prompt_tokens(usage) == 0
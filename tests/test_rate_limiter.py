@@ -0,0 +1,155 @@
+"""
+LLM 限流器测试
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.rate_limiter import LLMRateLimiter, TokenBucket, estimate_tokens
+
+
+class FakeResponse:
+    """模拟带头部的 HTTP 响应"""
+
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeRateLimitError(Exception):
+    """模拟 openai.RateLimitError"""
+
+    status_code = 429
+
+    def __init__(self, headers=None):
+        super().__init__("rate limited")
+        self.response = FakeResponse(headers or {})
+
+
+class FakeServerError(Exception):
+    """模拟 openai.InternalServerError"""
+
+    status_code = 503
+
+    def __init__(self):
+        super().__init__("service unavailable")
+        self.response = FakeResponse({})
+
+
+class TestTokenBucket:
+    """测试令牌桶"""
+
+    def test_wait_time_when_exhausted(self):
+        """令牌耗尽后需要等待"""
+        bucket = TokenBucket(60)  # 每秒 1 个
+        bucket.consume(60)
+        assert bucket.wait_time(1) == pytest.approx(1.0, abs=0.05)
+
+    def test_amount_clamped_to_capacity(self):
+        """超过容量的请求按容量计算,避免永久等待"""
+        bucket = TokenBucket(100)
+        assert bucket.wait_time(1000) == 0.0
+
+
+class TestLLMRateLimiter:
+    """测试限流器"""
+
+    @pytest.mark.asyncio
+    async def test_retry_after_honored(self):
+        """429 时按 Retry-After 等待后重试"""
+        limiter = LLMRateLimiter(rpm=0, tpm=0, max_retries=2)
+        calls = []
+
+        async def flaky():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise FakeRateLimitError({'retry-after': '0.2'})
+            return "ok"
+
+        result = await limiter.call(flaky)
+
+        assert result == "ok"
+        assert len(calls) == 2
+        assert calls[1] - calls[0] >= 0.19
+        assert limiter.stats['rate_limited'] == 1
+        assert limiter.stats['throttle_time'] > 0
+
+    @pytest.mark.asyncio
+    async def test_retries_exhausted(self):
+        """重试耗尽后抛出异常"""
+        limiter = LLMRateLimiter(rpm=0, tpm=0, max_retries=1, base_delay=0.01, max_delay=0.01)
+
+        async def always_limited():
+            raise FakeRateLimitError()
+
+        with pytest.raises(FakeRateLimitError):
+            await limiter.call(always_limited)
+        assert limiter.stats['requests'] == 2
+
+    @pytest.mark.asyncio
+    async def test_non_rate_limit_error_not_retried(self):
+        """非限流错误直接抛出"""
+        limiter = LLMRateLimiter(rpm=0, tpm=0)
+
+        async def broken():
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            await limiter.call(broken)
+        assert limiter.stats['requests'] == 1
+        assert limiter.stats['queue_depth'] == 0
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_retried(self):
+        """连接失败、超时和 5xx 按退避重试,不触发全局冷却"""
+        from openai import APIConnectionError, APITimeoutError
+
+        errors = [APIConnectionError(request=None), APITimeoutError(request=None), FakeServerError()]
+        limiter = LLMRateLimiter(rpm=0, tpm=0, max_retries=3, base_delay=0.01, max_delay=0.01)
+
+        async def flaky():
+            if errors:
+                raise errors.pop(0)
+            return "ok"
+
+        assert await limiter.call(flaky) == "ok"
+        assert limiter.stats['requests'] == 4
+        assert limiter.stats['transient_retries'] == 3
+        assert limiter.stats['rate_limited'] == 0
+
+    @pytest.mark.asyncio
+    async def test_client_error_not_retried(self):
+        """400 等客户端错误直接抛出"""
+        limiter = LLMRateLimiter(rpm=0, tpm=0, base_delay=0.01)
+
+        class BadRequest(Exception):
+            status_code = 400
+
+        async def bad():
+            raise BadRequest()
+
+        with pytest.raises(BadRequest):
+            await limiter.call(bad)
+        assert limiter.stats['requests'] == 1
+
+    def test_shared_across_event_loops(self):
+        """同一限流器在多次 asyncio.run 中使用(如先登录再爬取),锁不绑定已关闭的事件循环"""
+        limiter = LLMRateLimiter(rpm=6000, tpm=0)
+
+        async def contended():
+            # RPM 配额耗尽时排队,锁在等待中被争用
+            limiter.request_bucket.tokens = 0
+            await asyncio.gather(*[limiter.acquire() for _ in range(3)])
+
+        for _ in range(2):
+            asyncio.run(contended())
+
+        assert limiter.stats['queue_depth'] == 0
+
+
+def test_estimate_tokens():
+    """token 估算: 中文按字计,英文按 4 字符计"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("中文测试") == 5
+    assert estimate_tokens("a" * 400) == 101
@@ -0,0 +1,177 @@
+"""
+流式解析与有界工作队列测试
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from creeper import AsyncCrawler
+from src.parser import MarkdownParser, resolve_input_files
+
+
+def write_markdown(tmp_path, count: int):
+    """生成包含 count 个 URL 的 Markdown 文件"""
+    lines = ["# 分类", "## 子分类"]
+    lines += [f"- https://example.com/page/{i}" for i in range(count)]
+    path = tmp_path / "input.md"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def make_crawler():
+    """不初始化 Redis/浏览器的爬虫实例"""
+    crawler = AsyncCrawler.__new__(AsyncCrawler)
+    crawler.stats = {'total': 0, 'success': 0, 'skipped': 0, 'failed': 0, 'duplicates': 0}
+    crawler.failed_items = []
+    crawler.fetcher = SimpleNamespace(concurrency=2)
+    return crawler
+
+
+class TestIterItems:
+    """测试逐行解析"""
+
+    def test_matches_parse(self, tmp_path):
+        """流式解析结果与 parse() 一致"""
+        path = write_markdown(tmp_path, 5)
+        with path.open("a", encoding="utf-8") as f:
+            f.write("# 第二类\n[链接](https://example.org/a) 和 https://example.org/b\n")
+
+        streamed = list(MarkdownParser(str(path)).iter_items())
+        parsed = MarkdownParser(str(path)).parse()
+
+        assert streamed == parsed
+        assert [(i.h1, i.h2) for i in streamed[-2:]] == [("第二类", "默认")] * 2
+
+    def test_lazy(self, tmp_path):
+        """取出第一个 URL 时不解析整个文件"""
+        path = write_markdown(tmp_path, 1000)
+        parser = MarkdownParser(str(path))
+
+        first = next(parser.iter_items())
+
+        assert first.url == "https://example.com/page/0"
+        assert first.line_number == 3
+        assert parser.items == []
+
+
+class TestCrawlPipeline:
+    """测试有界队列与固定工作协程"""
+
+    @pytest.mark.asyncio
+    async def test_bounded_queue(self, tmp_path):
+        """生产者领先处理进度不超过队列容量,并发数等于工作协程数"""
+        path = write_markdown(tmp_path, 200)
+        crawler = make_crawler()
+        state = {'produced': 0, 'processed': 0, 'active': 0, 'max_active': 0, 'max_ahead': 0}
+
+        def items():
+            for item in MarkdownParser(str(path)).iter_items():
+                state['produced'] += 1
+                state['max_ahead'] = max(state['max_ahead'], state['produced'] - state['processed'])
+                yield item
+
+        async def process(item):
+            state['active'] += 1
+            state['max_active'] = max(state['max_active'], state['active'])
+            await asyncio.sleep(0.001)
+            state['active'] -= 1
+            state['processed'] += 1
+
+        crawler._process_url = process
+        await crawler._crawl(items(), workers=3)
+
+        assert crawler.stats['total'] == 200
+        assert state['processed'] == 200
+        assert state['max_active'] == 3
+        # 队列容量 6 + 3 个工作协程手上的 + 生产者正在放入的 1 个
+        assert state['max_ahead'] <= 10
+
+    @pytest.mark.asyncio
+    async def test_first_item_starts_before_parse_finishes(self):
+        """第一个 URL 在输入读完前就开始处理"""
+        crawler = make_crawler()
+        started = []
+        produced = []
+
+        def items():
+            for i in range(50):
+                produced.append(i)
+                yield SimpleNamespace(url=f"https://example.com/{i}")
+
+        async def process(item):
+            if not started:
+                started.append(len(produced))
+            await asyncio.sleep(0)
+
+        crawler._process_url = process
+        await crawler._crawl(items(), workers=1)
+
+        assert started[0] < 50
+
+    @pytest.mark.asyncio
+    async def test_parse_error_propagates(self):
+        """解析异常不会让工作协程永远等待"""
+        crawler = make_crawler()
+
+        def items():
+            yield SimpleNamespace(url="https://example.com/ok")
+            raise UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+
+        async def process(item):
+            pass
+
+        crawler._process_url = process
+        with pytest.raises(UnicodeDecodeError):
+            await asyncio.wait_for(crawler._crawl(items(), workers=2), timeout=5)
+        assert crawler.stats['total'] == 1
+
+
+class TestMultipleInputs:
+    """测试目录/glob 输入"""
+
+    def make_tree(self, tmp_path):
+        """inputs/科技/a.md 与 inputs/编程/b.md 共享一个 URL"""
+        tech = tmp_path / "inputs" / "科技"
+        code = tmp_path / "inputs" / "编程"
+        tech.mkdir(parents=True)
+        code.mkdir(parents=True)
+        (tech / "a.md").write_text(
+            "# 科技\n## AI\nhttps://example.com/shared\nhttps://example.com/a\n", encoding="utf-8"
+        )
+        (code / "b.md").write_text(
+            "# 编程\n## Python\nhttps://example.com/b\nhttps://example.com/shared\n", encoding="utf-8"
+        )
+        (code / "notes.txt").write_text("https://example.com/ignored\n", encoding="utf-8")
+        return tmp_path / "inputs"
+
+    def test_resolve_directory_and_glob(self, tmp_path):
+        """目录递归收集 Markdown 文件,glob 按模式匹配,不存在时返回空列表"""
+        root = self.make_tree(tmp_path)
+
+        names = [p.name for p in resolve_input_files(str(root))]
+        assert names == ["a.md", "b.md"]
+        assert [p.name for p in resolve_input_files(str(root / "**" / "b.md"))] == ["b.md"]
+        assert resolve_input_files(str(root / "科技" / "a.md")) == [root / "科技" / "a.md"]
+        assert resolve_input_files(str(tmp_path / "missing.md")) == []
+
+    @pytest.mark.asyncio
+    async def test_cross_file_dedup(self, tmp_path):
+        """多个文件共用一个队列,重复 URL 只处理一次,保留各自文件的标题"""
+        root = self.make_tree(tmp_path)
+        crawler = make_crawler()
+        processed = {}
+
+        async def process(item):
+            processed[item.url] = (item.h1, item.h2)
+
+        crawler._process_url = process
+        parsers = [MarkdownParser(str(p)) for p in resolve_input_files(str(root))]
+        await crawler._crawl(*(p.iter_items() for p in parsers), workers=2)
+
+        assert crawler.stats['total'] == 3
+        assert crawler.stats['duplicates'] == 1
+        assert processed["https://example.com/a"] == ("科技", "AI")
+        assert processed["https://example.com/b"] == ("编程", "Python")
+        assert processed["https://example.com/shared"] in {("科技", "AI"), ("编程", "Python")}
@@ -0,0 +1,163 @@
+"""
+翻译缓存测试
+"""
+
+import time
+
+import pytest
+
+from src.translation_cache import TranslationCache
+from src.translation_memory import TranslationMemory
+from src.translator import Translator, PROMPT_VERSION
+
+
+class FakeRedis:
+    """内存中的 Redis 替身(仅实现 Redis 后端用到的命令,按 time.time() 判断过期)"""
+
+    def __init__(self):
+        self.values = {}   # {键: (值, 过期时间)}
+        self.zsets = {}
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def get(self, name):
+        value, expires_at = self.values.get(name, (None, 0))
+        return value if time.time() < expires_at else None
+
+    def setex(self, name, ttl, value):
+        self.values[name] = (value, time.time() + ttl)
+
+    def delete(self, *names):
+        for name in names:
+            self.values.pop(name, None)
+
+    def zadd(self, name, mapping):
+        self.zsets.setdefault(name, {}).update(mapping)
+
+    def zremrangebyscore(self, name, low, high):
+        zset = self.zsets.get(name, {})
+        for member in [m for m, score in zset.items() if score <= high]:
+            del zset[member]
+
+    def zcard(self, name):
+        return len(self.zsets.get(name, {}))
+
+    def zpopmin(self, name, count):
+        zset = self.zsets.get(name, {})
+        popped = sorted(zset.items(), key=lambda item: item[1])[:count]
+        for member, _ in popped:
+            del zset[member]
+        return popped
+
+
+class FakePipeline:
+    """按顺序执行排队的命令"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args) for name, args in self.calls]
+
+
+@pytest.fixture
+def file_cache(tmp_path):
+    """创建本地文件后端的缓存"""
+    cache = TranslationCache(backend="file", cache_file=str(tmp_path / "cache.db"), max_entries=3)
+    yield cache
+    cache.close()
+
+
+class TestTranslationCache:
+    """测试缓存读写与淘汰"""
+
+    def test_key_depends_on_all_parts(self):
+        """模型、语言、提示词版本任一变化都会改变缓存键"""
+        base = TranslationCache.make_key("m", "en", "zh", "v1", "hello")
+
+        assert base == TranslationCache.make_key("m", "en", "zh", "v1", "hello")
+        assert base != TranslationCache.make_key("m2", "en", "zh", "v1", "hello")
+        assert base != TranslationCache.make_key("m", "fr", "zh", "v1", "hello")
+        assert base != TranslationCache.make_key("m", "en", "zh", "v2", "hello")
+        assert base != TranslationCache.make_key("m", "en", "zh", "v1", "hello!")
+
+    def test_hit_and_miss_stats(self, file_cache):
+        """命中率与节省 token 统计"""
+        assert file_cache.get("k1", "hello") is None
+        file_cache.set("k1", "你好")
+
+        assert file_cache.get("k1", "hello") == "你好"
+
+        stats = file_cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+        assert stats['tokens_saved'] > 0
+
+    def test_ttl_expiry(self, file_cache):
+        """过期条目视为未命中"""
+        file_cache.set("k1", "v1")
+        file_cache.ttl_seconds = 0
+        time.sleep(0.01)
+
+        assert file_cache.get("k1") is None
+
+    def test_lru_eviction(self, file_cache):
+        """超出容量时淘汰最久未访问的条目"""
+        for i in range(4):
+            file_cache.set(f"k{i}", f"v{i}")
+            time.sleep(0.01)
+        file_cache.get("k0")  # 刷新 k0 的访问时间
+        file_cache._file_evict()
+
+        assert file_cache.get("k0") == "v0"
+        assert file_cache.get("k1") is None
+        assert file_cache.get("k3") == "v3"
+
+    def test_redis_lru_drops_expired_members(self, monkeypatch):
+        """Redis 后端: 按 TTL 过期的键同时从 LRU 有序集合中移除"""
+        clock = [1000.0]
+        monkeypatch.setattr("src.translation_cache.time.time", lambda: clock[0])
+        cache = TranslationCache(backend="none", ttl_days=1, max_entries=2)
+        cache.redis = FakeRedis()
+
+        cache.set("k0", "v0")
+        cache.set("k1", "v1")
+        clock[0] += cache.ttl_seconds + 1
+        cache.set("k2", "v2")
+
+        assert set(cache.redis.zsets[cache.lru_key]) == {"k2"}
+        assert cache.get("k2") == "v2"
+        assert cache.get("k0") is None
+
+
+class TestTranslatorCache:
+    """测试 Translator 在调用 API 前查询缓存"""
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_api(self, file_cache):
+        """缓存命中时不调用 API"""
+        translator = Translator(
+            api_key="test-key",
+            cache=file_cache,
+            memory=TranslationMemory(store=TranslationCache(backend="none"))
+        )
+        translator._capability_detected = True
+
+        key = TranslationCache.make_key(translator.model, "en", "zh", PROMPT_VERSION, "Hello world")
+        file_cache.set(key, "你好世界")
+
+        async def fail(*args, **kwargs):
+            raise AssertionError("不应调用 API")
+
+        translator.rate_limiter.call = fail
+
+        result = await translator.translate("Hello world", skip_detection=True)
+
+        assert result == "你好世界"
+        assert translator.get_stats()['cache']['hits'] == 1
@@ -0,0 +1,125 @@
+"""
+段落级翻译记忆测试
+"""
+
+import pytest
+
+from src.async_fetcher import WebPage
+from src.translation_cache import TranslationCache
+from src.translation_memory import TranslationMemory
+from src.translator import Translator
+
+FOOTER = "This article is for informational purposes only and does not constitute advice."
+BIO = "John Doe is a senior reporter covering technology and science for our newsroom."
+
+
+@pytest.fixture
+def memory(tmp_path):
+    """使用本地文件存储的翻译记忆"""
+    store = TranslationCache(backend="file", namespace="tm", cache_file=str(tmp_path / "tm.db"))
+    yield TranslationMemory(store=store, min_segment_chars=20)
+    store.close()
+
+
+def fake_translation(text: str) -> str:
+    """测试用翻译: 段落加前缀,保留占位符"""
+    return "\n\n".join(
+        block if block.startswith("⟦TM") else f"译:{block}"
+        for block in text.split("\n\n")
+    )
+
+
+class TestTranslationMemory:
+    """测试段落复用"""
+
+    def test_prepare_replaces_known_segments(self, memory):
+        """已知段落替换为占位符"""
+        first = memory.prepare(f"Intro paragraph of page one.\n\n{FOOTER}", "m", "en", "zh", "v1", "a.com")
+        memory.learn(first, fake_translation(first.outgoing))
+
+        second = memory.prepare(f"Another intro for page two.\n\n{FOOTER}", "m", "en", "zh", "v1", "a.com")
+
+        assert second.known == {1: f"译:{FOOTER}"}
+        assert second.outgoing == "Another intro for page two.\n\n⟦TM1⟧"
+
+        restored = memory.restore(second, fake_translation(second.outgoing))
+        assert restored == f"译:Another intro for page two.\n\n译:{FOOTER}"
+
+    def test_missing_placeholder_returns_none(self, memory):
+        """占位符被模型丢失时返回 None"""
+        first = memory.prepare(FOOTER, "m", "en", "zh", "v1", "a.com")
+        memory.learn(first, f"译:{FOOTER}")
+        second = memory.prepare(f"Fresh paragraph here.\n\n{FOOTER}", "m", "en", "zh", "v1", "a.com")
+
+        assert memory.restore(second, "译:Fresh paragraph here.") is None
+
+    def test_misaligned_segments_not_learned(self, memory):
+        """段落数相同但一段被合并、另一段被拆开时不写入记忆"""
+        source = (
+            f"# Heading for the article\n\n{BIO}\n\n"
+            "Run `pip install creeper` before you start.\n\n"
+            "- first item in the list\n- second item in the list"
+        )
+        first = memory.prepare(source, "m", "en", "zh", "v1", "a.com")
+        # 标题与简介被合并,列表被拆成两段,总段落数不变
+        merged = (
+            "# 文章标题 简介段落的译文内容\n\n"
+            "开始前先运行 `pip install creeper`。\n\n"
+            "- 列表第一项\n\n- 列表第二项"
+        )
+        memory.learn(first, merged)
+
+        assert memory.prepare(source, "m", "en", "zh", "v1", "a.com").known == {}
+
+        aligned = (
+            f"# 文章标题\n\n译:{BIO}\n\n"
+            "开始前先运行 `pip install creeper`。\n\n"
+            "- 列表第一项\n- 列表第二项"
+        )
+        memory.learn(first, aligned)
+
+        assert memory.prepare(source, "m", "en", "zh", "v1", "a.com").known[1] == f"译:{BIO}"
+
+    def test_domain_reuse_stats(self, memory):
+        """按域名统计复用率"""
+        first = memory.prepare(f"{BIO}\n\n{FOOTER}", "m", "en", "zh", "v1", "a.com")
+        memory.learn(first, fake_translation(first.outgoing))
+        memory.prepare(f"{BIO}\n\n{FOOTER}", "m", "en", "zh", "v1", "a.com")
+
+        stats = memory.get_stats()
+        assert stats['domains']['a.com']['segments'] == 4
+        assert stats['domains']['a.com']['reused'] == 2
+        assert stats['reuse_rate'] == 0.5
+        assert stats['tokens_saved'] > 0
+
+
+class TestTranslatorWithMemory:
+    """测试翻译网页时只发送新段落"""
+
+    @pytest.mark.asyncio
+    async def test_only_novel_segments_sent(self, memory, monkeypatch):
+        """第二个页面只发送新段落,重复段落从记忆中填充"""
+        monkeypatch.setattr("src.translator.config.TRANSLATE_TITLE", False)
+        monkeypatch.setattr("src.translator.config.TRANSLATE_DESCRIPTION", False)
+        translator = Translator(api_key="test-key", cache=TranslationCache(backend="none"), memory=memory)
+        translator._capability_detected = True
+
+        sent = []
+
+        async def fake_translate(text, source_lang="en", target_lang="zh", skip_detection=False):
+            sent.append(text)
+            return fake_translation(text)
+
+        translator.translate = fake_translate
+
+        page1 = WebPage(url="https://a.com/1", title="", description="",
+                        content=f"First article body text in English.\n\n{FOOTER}")
+        await translator.translate_webpage(page1)
+
+        page2 = WebPage(url="https://a.com/2", title="", description="",
+                        content=f"Second article body text in English.\n\n{FOOTER}")
+        await translator.translate_webpage(page2)
+
+        assert FOOTER not in sent[1]
+        assert "⟦TM1⟧" in sent[1]
+        assert page2.content == f"译:Second article body text in English.\n\n译:{FOOTER}"
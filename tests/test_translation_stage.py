@@ -0,0 +1,66 @@
+"""
+翻译阶段与爬取并发解耦测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.async_fetcher import AsyncWebFetcher, WebPage
+
+
+class SlowTranslator:
+    """模拟耗时的 LLM 翻译"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def translate_webpage(self, page):
+        await asyncio.sleep(self.delay)
+        page.translated = True
+        return page
+
+
+class TestTranslationStage:
+    """测试翻译阶段不占用爬取并发槽"""
+
+    @pytest.mark.asyncio
+    async def test_translation_releases_fetch_slot(self):
+        """翻译期间爬取信号量已释放"""
+        fetcher = AsyncWebFetcher(use_playwright=False, concurrency=1, translation_concurrency=2)
+        fetcher.translator = SlowTranslator(0.2)
+
+        async def fake_fetch(url, retry_count=0):
+            async with fetcher.semaphore:
+                return WebPage(url=url, title="t", description="", content="c")
+
+        fetcher._fetch_with_semaphore = fake_fetch
+
+        task = asyncio.create_task(fetcher.fetch("https://example.com/a"))
+        await asyncio.sleep(0.05)
+
+        # 翻译进行中，爬取并发槽应空闲
+        assert not fetcher.semaphore.locked()
+        assert fetcher.translation_semaphore._value == 1
+
+        page = await task
+        assert page.translated is True
+        assert fetcher.translation_waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_translation_failure_keeps_original(self):
+        """翻译异常时返回原文"""
+        fetcher = AsyncWebFetcher(use_playwright=False, concurrency=1)
+
+        class BrokenTranslator:
+            async def translate_webpage(self, page):
+                raise RuntimeError("boom")
+
+        fetcher.translator = BrokenTranslator()
+        page = WebPage(url="https://example.com", title="t", description="", content="c")
+
+        result = await fetcher._translate(page)
+
+        assert result is page
+        assert result.translated is False
+        assert fetcher.translation_semaphore._value == fetcher.translation_concurrency
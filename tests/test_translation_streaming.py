@@ -0,0 +1,160 @@
+"""
+流式翻译测试
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.async_fetcher import WebPage
+from src.translation_cache import TranslationCache
+from src.translation_memory import TranslationMemory
+from src.translation_stream import StreamBuffer, PlaceholderRestorer
+from src.markdown_protector import PLACEHOLDER_PATTERN
+from src.parser import URLItem
+from src.storage import StorageManager
+from src.translator import Translator
+
+
+def make_chunk(content=None, usage=None):
+    """构造与 SDK 流式响应结构一致的分片"""
+    choices = [] if content is None else [SimpleNamespace(delta=SimpleNamespace(content=content))]
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class FakeStream:
+    """逐片返回的异步迭代器"""
+
+    def __init__(self, pieces, usage):
+        self.chunks = [make_chunk(p) for p in pieces] + [make_chunk(usage=usage)]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(0.001)
+            yield chunk
+
+
+class TestStreamBuffer:
+    """测试增量缓冲区"""
+
+    @pytest.mark.asyncio
+    async def test_follow_and_reset(self):
+        """跟随读取追加内容,重置后从头重写"""
+        buffer = StreamBuffer()
+        received = []
+
+        async def consume():
+            async for restart, text in buffer.follow():
+                received.append((restart, text))
+
+        task = asyncio.ensure_future(consume())
+        buffer.append("a")
+        await asyncio.sleep(0)
+        buffer.append("b")
+        await asyncio.sleep(0)
+        buffer.reset()
+        buffer.append("c")
+        buffer.close()
+        await task
+
+        assert received[0] == (False, "a")
+        assert received[-1] == (True, "c")
+
+    def test_restorer_holds_partial_placeholder(self):
+        """占位符被拆到两个分片时等完整后再还原"""
+        buffer = StreamBuffer()
+        restorer = PlaceholderRestorer(buffer, PLACEHOLDER_PATTERN, lambda m: "`code_here()`")
+
+        restorer.append("调用 ⟦P")
+        assert buffer.getvalue() == "调用 "
+
+        restorer.append("0⟧ 即可")
+        restorer.flush()
+        assert buffer.getvalue() == "调用 `code_here()` 即可"
+
+
+class TestStreamingTranslator:
+    """测试流式调用与逐页指标"""
+
+    @pytest.mark.asyncio
+    async def test_deltas_streamed_and_metrics_recorded(self, monkeypatch):
+        """译文片段实时写入缓冲区,并记录首 token 时间和生成速度"""
+        monkeypatch.setattr("src.translator.config.TRANSLATION_STREAMING", True)
+        monkeypatch.setattr("src.translator.config.TRANSLATE_TITLE", False)
+        monkeypatch.setattr("src.translator.config.TRANSLATE_DESCRIPTION", False)
+        translator = Translator(
+            api_key="test-key",
+            cache=TranslationCache(backend="none"),
+            memory=TranslationMemory(store=TranslationCache(backend="none"))
+        )
+        translator._capability_detected = True
+
+        async def fake_call(func, *args, estimated_tokens=0, **kwargs):
+            assert kwargs['stream'] is True
+            usage = SimpleNamespace(prompt_tokens=50, completion_tokens=6, total_tokens=56)
+            return FakeStream(["这是", "一段", "译文。"], usage)
+
+        translator.rate_limiter.call = fake_call
+
+        page = WebPage(url="https://a.com/1", title="", description="",
+                       content="This is the English body text of the article, long enough to detect.")
+        page.stream = StreamBuffer()
+        seen = []
+
+        async def watch():
+            async for _, text in page.stream.follow():
+                seen.append(text)
+
+        watcher = asyncio.ensure_future(watch())
+        await translator.translate_webpage(page)
+        await watcher
+
+        assert page.content == "这是一段译文。"
+        assert len(seen) > 1
+        assert page.translation_ttft is not None
+        assert page.translation_tps > 0
+        assert translator.get_stats()['streamed_pages'] == 1
+
+
+class TestProgressiveWriter:
+    """测试增量写入临时文件"""
+
+    @pytest.mark.asyncio
+    async def test_no_translation_leaves_no_part_file(self, tmp_path):
+        """翻译未产生译文(中文页面、缓存命中)且缓冲区已关闭后才启动写入: 不创建临时文件"""
+        storage = StorageManager(str(tmp_path))
+        item = URLItem("https://a.com/1", "H1", "H2", 1)
+        page = WebPage(url=item.url, title="中文标题", description="", content="正文")
+        stream = StreamBuffer()
+
+        writer = asyncio.ensure_future(storage.write_progressive(item, page, stream))
+        stream.close()
+        page.stream = None  # 翻译结束后 page 不再持有缓冲区
+
+        assert await writer is None
+        assert list(tmp_path.rglob("*.part")) == []
+        await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_deltas_written_then_removed(self, tmp_path):
+        """收到译文后创建临时文件,完成后由调用方删除"""
+        storage = StorageManager(str(tmp_path))
+        item = URLItem("https://a.com/1", "H1", "H2", 1)
+        page = WebPage(url=item.url, title="Title", description="", content="")
+        stream = StreamBuffer()
+
+        writer = asyncio.ensure_future(storage.write_progressive(item, page, stream))
+        stream.append("第一段")
+        await asyncio.sleep(0.01)
+        stream.close()
+        part_path = await writer
+
+        assert part_path is not None
+        assert part_path.read_text(encoding="utf-8").endswith("第一段")
+        storage.remove_partial(part_path)
+        assert list(tmp_path.rglob("*.part")) == []
+        await storage.close()
@@ -0,0 +1,91 @@
+"""
+URL列表模式 NDJSON 流式输出测试
+"""
+
+import asyncio
+import json
+from io import StringIO
+
+import pytest
+
+from src.async_fetcher import AsyncWebFetcher, WebPage
+from src.url_list_mode import URLListMode, dumps_line
+
+
+class RecordingStream(StringIO):
+    """记录每次 flush 时已写出的行数"""
+
+    def __init__(self):
+        super().__init__()
+        self.flushed_lines = []
+
+    def flush(self):
+        self.flushed_lines.append(self.getvalue().count("\n"))
+
+
+def make_fetcher(delays):
+    """按 URL 延迟返回结果的抓取器(不启动浏览器)"""
+    fetcher = AsyncWebFetcher(use_playwright=False, concurrency=len(delays))
+
+    async def fake_fetch(url, on_translate=None):
+        await asyncio.sleep(delays[url])
+        if url.endswith("/bad"):
+            return WebPage(url=url, title="", description="", content="", success=False, error="超时")
+        return WebPage(url=url, title=f"标题 {url[-1]}", description="", content="正文")
+
+    fetcher.fetch = fake_fetch
+    return fetcher
+
+
+class TestFetchAsCompleted:
+    """测试按完成顺序产出"""
+
+    @pytest.mark.asyncio
+    async def test_completion_order(self):
+        """先完成的 URL 先产出"""
+        delays = {"https://a.com/1": 0.05, "https://a.com/2": 0.0, "https://a.com/3": 0.02}
+        fetcher = make_fetcher(delays)
+
+        urls = [page.url async for page in fetcher.fetch_as_completed(list(delays))]
+
+        assert urls == ["https://a.com/2", "https://a.com/3", "https://a.com/1"]
+
+    @pytest.mark.asyncio
+    async def test_early_exit_cancels_pending(self):
+        """提前结束迭代时取消未完成的请求"""
+        delays = {"https://a.com/1": 0.0, "https://a.com/2": 10}
+        fetcher = make_fetcher(delays)
+
+        pages = fetcher.fetch_as_completed(list(delays))
+        first = await pages.__anext__()
+        await asyncio.wait_for(pages.aclose(), timeout=1)
+
+        assert first.url == "https://a.com/1"
+
+
+class TestNDJSONOutput:
+    """测试逐行输出"""
+
+    def test_dumps_line_compact(self):
+        """单行紧凑编码,中文不转义"""
+        line = dumps_line({"title": "标题", "content": "第一行\n第二行"})
+
+        assert "\n" not in line
+        assert "标题" in line
+        assert json.loads(line) == {"title": "标题", "content": "第一行\n第二行"}
+
+    @pytest.mark.asyncio
+    async def test_stream_ndjson(self, capsys):
+        """每个结果完成即写出一行并刷新,失败也输出一行"""
+        delays = {"https://a.com/1": 0.03, "https://a.com/bad": 0.0, "https://a.com/3": 0.01}
+        mode = URLListMode(use_playwright=False, ndjson=True)
+        mode.fetcher = make_fetcher(delays)
+        out = RecordingStream()
+
+        await mode.stream_ndjson(list(delays), out=out)
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [r["url"] for r in lines] == ["https://a.com/bad", "https://a.com/3", "https://a.com/1"]
+        assert lines[0]["title"] == "获取失败"
+        assert out.flushed_lines == [1, 2, 3]
+        assert "成功 2 个，失败 1 个" in capsys.readouterr().err
@@ -0,0 +1,160 @@
+"""
+URL列表模式文件/标准输入流式读取测试
+"""
+
+import asyncio
+import json
+import os
+import time
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+
+from src.async_fetcher import AsyncWebFetcher, WebPage
+from src.cli_parser import create_argument_parser
+from src.url_list_mode import URLListMode
+
+
+def make_fetcher(state, delay=0.01):
+    """记录在途请求数的抓取器(不启动浏览器)"""
+    fetcher = AsyncWebFetcher(use_playwright=False, concurrency=2)
+
+    async def fake_fetch(url, on_translate=None):
+        state['active'] += 1
+        state['max_active'] = max(state['max_active'], state['active'])
+        await asyncio.sleep(delay)
+        state['active'] -= 1
+        state['done'] += 1
+        return WebPage(url=url, title="t", description="", content="c")
+
+    fetcher.fetch = fake_fetch
+    return fetcher
+
+
+def new_state():
+    return {'active': 0, 'max_active': 0, 'done': 0, 'read': 0, 'max_ahead': 0}
+
+
+class TestURLStreamInput:
+    """测试逐行读取与有界在途请求"""
+
+    def test_cli_arguments(self):
+        """--urls-file 与 --urls - 参数解析"""
+        parser = create_argument_parser()
+
+        assert parser.parse_args(['--urls-file', 'urls.txt']).urls_file == 'urls.txt'
+        assert parser.parse_args(['--urls', '-', '--ndjson']).urls == '-'
+
+    def test_urls_and_urls_file_rejected(self):
+        """同时指定 --urls 与 --urls-file 时报错退出,不静默丢弃其中一个"""
+        from creeper import main
+
+        test_args = ['creeper.py', '--urls', 'https://a.com/1', '--urls-file', 'urls.txt']
+        with patch('sys.argv', test_args), patch('src.url_list_mode.run_url_list_mode') as mock_run:
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+        assert exc.value.code == 1
+        mock_run.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_read_url_lines(self):
+        """每行一个或逗号分隔多个,跳过空行、注释和无效 URL"""
+        mode = URLListMode(use_playwright=False)
+        stream = StringIO(
+            "# 上游任务输出\n"
+            "https://a.com/1\n"
+            "\n"
+            "https://a.com/2, https://a.com/3\n"
+            "ftp://a.com/bad\n"
+        )
+
+        urls = [url async for url in mode.read_url_lines(stream)]
+
+        assert urls == ["https://a.com/1", "https://a.com/2", "https://a.com/3"]
+
+    @pytest.mark.asyncio
+    async def test_read_url_lines_chunks(self, tmp_path):
+        """跨块的行和末尾无换行的最后一行都能完整读出"""
+        path = tmp_path / "urls.txt"
+        expected = [f"https://a.com/{'x' * 50}/{i}" for i in range(5000)]
+        path.write_text("\n".join(expected), encoding="utf-8")
+        mode = URLListMode(use_playwright=False)
+
+        with open(path, "r", encoding="utf-8") as stream:
+            urls = [url async for url in mode.read_url_lines(stream)]
+
+        assert urls == expected
+
+    def test_early_exit_does_not_block_shutdown(self):
+        """提前结束读取时,阻塞在上游输入上的读取线程不拖住事件循环退出"""
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b"https://a.com/1\n")
+        stream = open(read_fd, "r", encoding="utf-8")
+        mode = URLListMode(use_playwright=False)
+
+        async def first():
+            urls = mode.read_url_lines(stream)
+            url = await urls.__anext__()
+            await urls.aclose()
+            return url
+
+        try:
+            started = time.monotonic()
+            assert asyncio.run(first()) == "https://a.com/1"
+            assert time.monotonic() - started < 2
+        finally:
+            os.close(write_fd)
+            stream.close()
+
+    @pytest.mark.asyncio
+    async def test_bounded_in_flight(self):
+        """在途请求不超过上限,输入不会提前读取"""
+        state = new_state()
+        fetcher = make_fetcher(state)
+
+        async def source():
+            for i in range(100):
+                state['read'] += 1
+                state['max_ahead'] = max(state['max_ahead'], state['read'] - state['done'])
+                yield f"https://a.com/{i}"
+
+        pages = [page async for page in fetcher.fetch_as_completed(source(), max_in_flight=4)]
+
+        assert len(pages) == 100
+        assert state['max_active'] == 4
+        # 在途 4 个 + 正在读取的 1 个
+        assert state['max_ahead'] <= 5
+
+    @pytest.mark.asyncio
+    async def test_slow_input_does_not_delay_results(self):
+        """等待上游输入时,已完成的结果照常产出"""
+        fetcher = make_fetcher(new_state())
+        second_read = asyncio.Event()
+
+        async def source():
+            yield "https://a.com/1"
+            await asyncio.sleep(0.3)
+            second_read.set()
+            yield "https://a.com/2"
+
+        pages = fetcher.fetch_as_completed(source(), max_in_flight=4)
+        first = await pages.__anext__()
+
+        assert first.url == "https://a.com/1"
+        assert not second_read.is_set()
+        assert [page.url async for page in pages] == ["https://a.com/2"]
+
+    @pytest.mark.asyncio
+    async def test_run_urls_file_ndjson(self, tmp_path, capsys):
+        """--urls-file 配合 --ndjson 逐行输出所有结果"""
+        path = tmp_path / "urls.txt"
+        path.write_text("\n".join(f"https://a.com/{i}" for i in range(20)) + "\n", encoding="utf-8")
+        mode = URLListMode(concurrency=2, use_playwright=False, ndjson=True)
+        mode.fetcher = make_fetcher(new_state(), delay=0)
+
+        await mode.run(urls_file=str(path))
+
+        lines = capsys.readouterr().out.splitlines()
+        assert sorted(json.loads(line)["url"] for line in lines) == sorted(f"https://a.com/{i}" for i in range(20))